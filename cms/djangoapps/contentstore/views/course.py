@@ -35,6 +35,7 @@ from models.settings.course_details import (
 from models.settings.course_grading import CourseGradingModel
 from models.settings.course_metadata import CourseMetadata
 from auth.authz import create_all_course_groups, is_user_in_creator_group
+from course_summaries.models import CourseSummary
 from util.json_request import expect_json
 
 from .access import has_access, get_location_and_verify_access
@@ -229,6 +230,7 @@ def create_new_course(request):
     )
 
     initialize_course_tabs(new_course)
+    CourseSummary.update_for_course(modulestore('direct').get_item(dest_location))
 
     create_all_course_groups(request.user, new_course.location)
 
@@ -23,6 +23,7 @@ from django.utils.translation import ugettext as _
 
 from mitxmako.shortcuts import render_to_response
 from auth.authz import create_all_course_groups
+from course_summaries.models import CourseSummary
 
 from xmodule.modulestore.xml_importer import import_from_xml
 from xmodule.contentstore.django import contentstore
@@ -224,6 +225,10 @@ def import_course(request, org, course, name):
                 create_all_course_groups(request.user, course_items[0].location)
                 logging.debug('created all course groups at {0}'.format(course_items[0].location))
 
+                # the import doesn't give the course a new content version, so
+                # the summary of the course has to be made again here
+                CourseSummary.update_for_course(modulestore('direct').get_item(course_items[0].location))
+
             # Send errors to client with stage at which error occured.
             except Exception as exception:   # pylint: disable=W0703
                 return JsonResponse(
@@ -157,6 +157,7 @@ MIDDLEWARE_CLASSES = (
     'cache_toolbox.middleware.CacheBackedAuthenticationMiddleware',
     'student.middleware.UserStandingMiddleware',
     'contentserver.middleware.StaticContentServer',
+    'crum.CurrentRequestUserMiddleware',
 
     'django.contrib.messages.middleware.MessageMiddleware',
     'track.middleware.TrackMiddleware',
@@ -165,6 +166,8 @@ MIDDLEWARE_CLASSES = (
     # Detects user-requested locale from 'accept-language' header in http request
     'django.middleware.locale.LocaleMiddleware',
 
+    # Forgets cached enrollments changed by the request after they're committed
+    'student.middleware.EnrollmentModesCacheMiddleware',
     'django.middleware.transaction.TransactionMiddleware',
 
     # catches any uncaught RateLimitExceptions and returns a 403 instead of a 500
@@ -216,6 +219,11 @@ STATICFILES_DIRS = [
     # ("book", ENV_ROOT / "book_images")
 ]
 
+# Local disk cache for course assets (c4x urls) too large for memcached, such as
+# videos and PDF textbooks. Set the directory to enable it.
+STATIC_CONTENT_DISK_CACHE_DIR = None
+STATIC_CONTENT_DISK_CACHE_MAX_SIZE = 10 * 1024 * 1024 * 1024
+
 # Locale/Internationalization
 TIME_ZONE = 'America/New_York'  # http://en.wikipedia.org/wiki/List_of_tz_zones_by_name
 LANGUAGE_CODE = 'en'  # http://www.i18nguy.com/unicode/language-identifiers.html
@@ -387,6 +395,9 @@ INSTALLED_APPS = (
     # for managing course modes
     'course_modes',
 
+    # for keeping the summaries of courses shown in the lms up to date
+    'course_summaries',
+
     # for managing coupons
     'coupons'
 )
@@ -0,0 +1,223 @@
+"""
+A local disk cache for large static content, which can't be kept in memcached.
+
+Files are named after the md5 digest of their content, so a file never goes
+stale: new content gets a new name, and unused files are evicted, least
+recently used first, once the cache grows beyond its maximum size.
+
+Content that isn't on disk yet is served from GridFS while a background thread
+copies it, so that a miss (or a Range request for a few bytes of a large
+asset) doesn't wait for the whole copy.
+"""
+import errno
+import logging
+import os
+import threading
+import time
+
+from xmodule.contentstore.content import StaticContentStream
+from xmodule.contentstore.django import contentstore
+
+log = logging.getLogger(__name__)
+
+# Copies in progress are written to files whose names start with this, so that
+# they're never served, and renamed once complete
+TEMP_FILE_PREFIX = '.'
+
+# A copy that hasn't been completed after this many seconds was abandoned (e.g.
+# its process was killed), and its file is removed
+TEMP_FILE_MAX_AGE = 60 * 60
+
+# The size of the cache is tracked as files are added, and the directory is
+# only listed again after this many seconds, to count the files added by the
+# other processes sharing it, or when the cache has grown beyond its maximum size
+RESCAN_INTERVAL = 5 * 60
+
+# When the cache has grown beyond its maximum size, files are evicted until it
+# is back to this fraction of it, so that it isn't pruned again on the next add
+PRUNED_SIZE_RATIO = 0.9
+
+
+class StaticContentDiskCache(object):
+    """
+    Keeps copies of static content in files under `directory`, using at most
+    `max_size` bytes of disk.
+    """
+    def __init__(self, directory, max_size):
+        self.directory = directory
+        self.max_size = max_size
+
+        # Guards the fields below, which are shared by the copying threads
+        self._lock = threading.Lock()
+        # The digests of the content this process is copying
+        self._adding = set()
+        # The total size of the files in the cache, or None until the directory has been listed
+        self._size = None
+        self._scanned_at = 0
+
+    def _path(self, content_digest):
+        return os.path.join(self.directory, content_digest)
+
+    def _temp_path(self, content_digest):
+        return os.path.join(self.directory, TEMP_FILE_PREFIX + content_digest)
+
+    def get(self, content):
+        """
+        Returns a StaticContentStream of the copy of `content` on disk.
+
+        Returns None if there isn't one yet, after starting to copy `content`
+        in the background, or if `content` can't be cached.
+        """
+        if not getattr(content, 'content_digest', None):
+            return None
+
+        path = self._path(content.content_digest)
+        try:
+            stream = open(path, 'rb')
+            # record the use of the file, for the eviction of the least recently used files
+            os.utime(path, None)
+        except (IOError, OSError):
+            self._add_later(content)
+            return None
+
+        return StaticContentStream(
+            content.location, content.name, content.content_type, stream,
+            last_modified_at=content.last_modified_at, thumbnail_location=content.thumbnail_location,
+            import_path=content.import_path, length=content.length, locked=content.locked,
+            content_digest=content.content_digest
+        )
+
+    def _add_later(self, content):
+        """
+        Copies `content` to disk in a background thread, unless this process
+        is already copying it.
+        """
+        with self._lock:
+            if content.content_digest in self._adding:
+                return
+            self._adding.add(content.content_digest)
+
+        def add():
+            try:
+                self._add(content.location, content.content_digest)
+            finally:
+                with self._lock:
+                    self._adding.discard(content.content_digest)
+
+        thread = threading.Thread(target=add)
+        thread.daemon = True
+        thread.start()
+
+    def _load(self, location):
+        """
+        Returns the content at `location`, as a stream of its own: the stream
+        of the content being served can't be shared with the copying thread.
+        """
+        return contentstore().find(location, as_stream=True)
+
+    def _add(self, location, content_digest):
+        """
+        Copies the content at `location`, whose md5 digest is `content_digest`,
+        to disk.
+
+        The copy is written to a temporary file named after the digest, which
+        is created exclusively, so that only one thread of any process copies
+        the same content at a time; it is renamed once complete, so that no
+        one can read a partial copy.
+        """
+        temp_path = self._temp_path(content_digest)
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            handle = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0644)
+        except OSError as exc:
+            if exc.errno != errno.EEXIST:
+                log.exception("Unable to cache %s on disk", location)
+            elif self._is_abandoned(temp_path):
+                # so that the next request copies it again
+                self._remove(os.path.basename(temp_path))
+            return
+
+        try:
+            with os.fdopen(handle, 'wb') as temp_file:
+                content = self._load(location)
+                if content.content_digest != content_digest:
+                    # the content has changed since it was requested
+                    raise IOError("{0} has changed".format(location))
+                size = 0
+                for chunk in content.stream_data():
+                    temp_file.write(chunk)
+                    size += len(chunk)
+            os.rename(temp_path, self._path(content_digest))
+        except Exception:  # pylint: disable=broad-except
+            log.exception("Unable to cache %s on disk", location)
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+
+        self._added(size)
+
+    def _added(self, size):
+        """
+        Counts a file of `size` bytes added to the cache, and evicts files if the
+        cache is now too large.
+        """
+        with self._lock:
+            if self._size is not None:
+                self._size += size
+            if self._size is None or self._size > self.max_size or time.time() - self._scanned_at > RESCAN_INTERVAL:
+                self._prune()
+
+    def _prune(self):
+        """
+        Lists the cache, removing abandoned temporary files, and removes the
+        least recently used files while the cache is larger than its maximum
+        size.  Must be called with self._lock held.
+        """
+        now = time.time()
+        files = []
+        total_size = 0
+        for name in os.listdir(self.directory):
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            if name.startswith(TEMP_FILE_PREFIX):
+                if now - stat.st_mtime > TEMP_FILE_MAX_AGE:
+                    # an abandoned copy
+                    self._remove(name)
+                continue
+            files.append((stat.st_mtime, stat.st_size, name))
+            total_size += stat.st_size
+
+        if total_size > self.max_size:
+            files.sort()
+            while total_size > self.max_size * PRUNED_SIZE_RATIO and files:
+                _, size, name = files.pop(0)
+                if self._remove(name):
+                    total_size -= size
+
+        self._size = total_size
+        self._scanned_at = now
+
+    @staticmethod
+    def _is_abandoned(temp_path):
+        """
+        True if the copy being written to `temp_path` hasn't progressed for too long
+        """
+        try:
+            return time.time() - os.stat(temp_path).st_mtime > TEMP_FILE_MAX_AGE
+        except OSError:
+            return False
+
+    def _remove(self, name):
+        """
+        Removes the file `name` from the cache, returning whether it could be removed.
+        """
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except OSError:
+            return False
+        return True
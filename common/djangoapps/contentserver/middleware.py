@@ -1,15 +1,74 @@
+import calendar
+
+from django.conf import settings
 from django.http import (HttpResponse, HttpResponseNotModified,
     HttpResponseForbidden)
+from django.utils.http import http_date, parse_http_date_safe
 from student.models import CourseEnrollment
 
 from xmodule.contentstore.django import contentstore
-from xmodule.contentstore.content import StaticContent, XASSET_LOCATION_TAG
+from xmodule.contentstore.content import StaticContent, StaticContentStream, XASSET_LOCATION_TAG
 from xmodule.modulestore import InvalidLocationError
 from cache_toolbox.core import get_cached_content, set_cached_content
 from xmodule.exceptions import NotFoundError
 
+from contentserver.disk_cache import StaticContentDiskCache
+
+# content smaller than this is kept in memcached, larger content may be kept in the disk cache
+MAX_CACHED_CONTENT_LENGTH = 1048576
+
+
+class UnsatisfiableRange(Exception):
+    """
+    Raised when a Range header doesn't overlap the content
+    """
+    pass
+
+
+def parse_range_header(header_value, content_length):
+    """
+    Returns the (first byte, last byte) of the byte range requested by the Range
+    header `header_value`, clipped to content of `content_length` bytes.
+
+    Returns None if the header isn't a single byte range, in which case it is
+    ignored and the whole content is served. Raises UnsatisfiableRange if the
+    range doesn't overlap the content.
+    """
+    unit, _, byte_range = header_value.partition('=')
+    if unit.strip() != 'bytes' or ',' in byte_range:
+        return None
+    first, separator, last = byte_range.strip().partition('-')
+    if not separator:
+        return None
+
+    try:
+        if first == '':
+            # a suffix range: the last bytes of the content
+            suffix_length = int(last)
+            if suffix_length == 0 or content_length == 0:
+                raise UnsatisfiableRange()
+            return max(content_length - suffix_length, 0), content_length - 1
+
+        first = int(first)
+        last = int(last) if last != '' else content_length - 1
+    except ValueError:
+        return None
+
+    if first >= content_length:
+        raise UnsatisfiableRange()
+    if first > last:
+        return None
+    return first, min(last, content_length - 1)
+
 
 class StaticContentServer(object):
+    def __init__(self):
+        disk_cache_dir = getattr(settings, 'STATIC_CONTENT_DISK_CACHE_DIR', None)
+        if disk_cache_dir:
+            self.disk_cache = StaticContentDiskCache(disk_cache_dir, settings.STATIC_CONTENT_DISK_CACHE_MAX_SIZE)
+        else:
+            self.disk_cache = None
+
     def process_request(self, request):
         # look to see if the request is prefixed with 'c4x' tag
         if request.path.startswith('/' + XASSET_LOCATION_TAG + '/'):
@@ -24,7 +83,8 @@ class StaticContentServer(object):
             # first look in our cache so we don't have to round-trip to the DB
             content = get_cached_content(loc)
             if content is None:
-                # nope, not in cache, let's fetch from DB
+                # nope, not in cache, let's fetch from DB. As a stream, only the file's
+                # attributes are fetched until its data is read
                 try:
                     content = contentstore().find(loc, as_stream=True)
                 except NotFoundError:
@@ -35,7 +95,7 @@ class StaticContentServer(object):
                 # since we fetched it from DB, let's cache it going forward, but only if it's < 1MB
                 # this is because I haven't been able to find a means to stream data out of memcached
                 if content.length is not None:
-                    if content.length < 1048576:
+                    if content.length < MAX_CACHED_CONTENT_LENGTH:
                         # since we've queried as a stream, let's read in the stream into memory to set in cache
                         content = content.copy_to_in_mem()
                         set_cached_content(content)
@@ -52,18 +112,69 @@ class StaticContentServer(object):
                         request.user, course_partial_id):
                     return HttpResponseForbidden('Unauthorized')
 
-            # convert over the DB persistent last modified timestamp to a HTTP compatible
-            # timestamp, so we can simply compare the strings
-            last_modified_at_str = content.last_modified_at.strftime("%a, %d-%b-%Y %H:%M:%S GMT")
+            # convert over the DB persistent last modified timestamp to a HTTP compatible timestamp
+            last_modified_at = calendar.timegm(content.last_modified_at.utctimetuple())
+            last_modified_at_str = http_date(last_modified_at)
+
+            # GridFS computes an md5 of the content when it is stored, which makes a strong ETag
+            content_digest = getattr(content, 'content_digest', None)
+            etag = '"{0}"'.format(content_digest) if content_digest else None
 
             # see if the client has cached this content, if so then compare the
-            # timestamps, if they are the same then just return a 304 (Not Modified)
-            if 'HTTP_IF_MODIFIED_SINCE' in request.META:
-                if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
-                if if_modified_since == last_modified_at_str:
-                    return HttpResponseNotModified()
+            # ETags or the timestamps, if they match then just return a 304 (Not Modified)
+            if etag is not None and 'HTTP_IF_NONE_MATCH' in request.META:
+                if_none_match = [tag.strip() for tag in request.META['HTTP_IF_NONE_MATCH'].split(',')]
+                if etag in if_none_match or '*' in if_none_match:
+                    return self._not_modified(etag, last_modified_at_str)
+            elif 'HTTP_IF_MODIFIED_SINCE' in request.META:
+                if_modified_since = parse_http_date_safe(request.META['HTTP_IF_MODIFIED_SINCE'])
+                if if_modified_since is not None and last_modified_at <= if_modified_since:
+                    return self._not_modified(etag, last_modified_at_str)
+
+            # serve large content from the local disk cache rather than reading it from GridFS again;
+            # content that isn't on disk yet is served from GridFS while it is copied in the background
+            if (self.disk_cache is not None and isinstance(content, StaticContentStream) and
+                    content.length is not None and content.length >= MAX_CACHED_CONTENT_LENGTH):
+                content = self.disk_cache.get(content) or content
+
+            byte_range = None
+            if 'HTTP_RANGE' in request.META and content.length is not None:
+                # a Range is only honoured if the content is still what the client has
+                if_range = request.META.get('HTTP_IF_RANGE')
+                if if_range is None or if_range in (etag, last_modified_at_str):
+                    try:
+                        byte_range = parse_range_header(request.META['HTTP_RANGE'], content.length)
+                    except UnsatisfiableRange:
+                        response = HttpResponse(status=416)
+                        response['Content-Range'] = 'bytes */{0}'.format(content.length)
+                        return response
 
-            response = HttpResponse(content.stream_data(), content_type=content.content_type)
+            if byte_range is not None:
+                first_byte, last_byte = byte_range
+                response = HttpResponse(
+                    content.stream_data_in_range(first_byte, last_byte), content_type=content.content_type
+                )
+                response.status_code = 206
+                response['Content-Range'] = 'bytes {0}-{1}/{2}'.format(first_byte, last_byte, content.length)
+                response['Content-Length'] = str(last_byte - first_byte + 1)
+            else:
+                response = HttpResponse(content.stream_data(), content_type=content.content_type)
+                if content.length is not None:
+                    response['Content-Length'] = str(content.length)
+
+            response['Accept-Ranges'] = 'bytes'
             response['Last-Modified'] = last_modified_at_str
+            if etag is not None:
+                response['ETag'] = etag
 
             return response
+
+    def _not_modified(self, etag, last_modified_at_str):
+        """
+        Returns a 304 (Not Modified) response, with the validators of the content
+        """
+        response = HttpResponseNotModified()
+        response['Last-Modified'] = last_modified_at_str
+        if etag is not None:
+            response['ETag'] = etag
+        return response
@@ -3,7 +3,13 @@ Tests for StaticContentServer
 """
 import copy
 import logging
+import os
+import shutil
+import tempfile
+import time
+import unittest
 from uuid import uuid4
+from mock import Mock, patch
 from path import path
 from pymongo import MongoClient
 
@@ -14,6 +20,8 @@ from django.test.utils import override_settings
 
 from student.models import CourseEnrollment
 
+from contentserver.disk_cache import StaticContentDiskCache, TEMP_FILE_MAX_AGE
+from contentserver.middleware import parse_range_header, UnsatisfiableRange
 from xmodule.contentstore.django import contentstore, _CONTENTSTORE
 from xmodule.modulestore import Location
 from xmodule.contentstore.content import StaticContent
@@ -134,3 +142,128 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
         resp = self.client.get(self.url_locked)
         self.assertEqual(resp.status_code, 200) #pylint: disable=E1103
 
+    def test_range_request(self):
+        """
+        Test that byte ranges of assets are served.
+        """
+        length = self.contentstore.find(self.loc_unlocked).length
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-1')
+        self.assertEqual(resp.status_code, 206)  # pylint: disable=E1103
+        self.assertEqual(resp['Content-Range'], 'bytes 0-1/{0}'.format(length))
+        self.assertEqual(resp['Content-Length'], '2')
+        self.assertEqual(len(resp.content), 2)  # pylint: disable=E1103
+
+    def test_unsatisfiable_range_request(self):
+        """
+        Test that a range past the end of an asset is rejected.
+        """
+        length = self.contentstore.find(self.loc_unlocked).length
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes={0}-'.format(length))
+        self.assertEqual(resp.status_code, 416)  # pylint: disable=E1103
+        self.assertEqual(resp['Content-Range'], 'bytes */{0}'.format(length))
+
+    def test_etag(self):
+        """
+        Test that assets have a strong ETag, which is honoured by If-None-Match.
+        """
+        resp = self.client.get(self.url_unlocked)
+        etag = resp['ETag']
+        self.assertEqual(etag, '"{0}"'.format(self.contentstore.find(self.loc_unlocked).content_digest))
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)  # pylint: disable=E1103
+
+    def test_if_modified_since(self):
+        """
+        Test that If-Modified-Since is compared as a date.
+        """
+        resp = self.client.get(self.url_unlocked)
+        resp = self.client.get(self.url_unlocked, HTTP_IF_MODIFIED_SINCE=resp['Last-Modified'])
+        self.assertEqual(resp.status_code, 304)  # pylint: disable=E1103
+
+
+class ParseRangeHeaderTest(unittest.TestCase):
+    """
+    Tests for parse_range_header
+    """
+    def test_ranges(self):
+        self.assertEqual((0, 9), parse_range_header('bytes=0-9', 100))
+        self.assertEqual((90, 99), parse_range_header('bytes=90-', 100))
+        self.assertEqual((90, 99), parse_range_header('bytes=-10', 100))
+        self.assertEqual((0, 99), parse_range_header('bytes=-200', 100))
+        self.assertEqual((50, 99), parse_range_header('bytes=50-200', 100))
+
+    def test_ignored_ranges(self):
+        self.assertIsNone(parse_range_header('bytes=0-9,20-29', 100))
+        self.assertIsNone(parse_range_header('lines=0-9', 100))
+        self.assertIsNone(parse_range_header('bytes=9-0', 100))
+        self.assertIsNone(parse_range_header('bytes=a-b', 100))
+
+    def test_unsatisfiable_ranges(self):
+        with self.assertRaises(UnsatisfiableRange):
+            parse_range_header('bytes=100-', 100)
+        with self.assertRaises(UnsatisfiableRange):
+            parse_range_header('bytes=-0', 100)
+
+
+class StaticContentDiskCacheTest(unittest.TestCase):
+    """
+    Tests for StaticContentDiskCache
+    """
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.cache = StaticContentDiskCache(self.directory, 25)
+        self.contents = {}
+
+    def content(self, digest, data='0123456789'):
+        """
+        A stand-in for the StaticContentStream of `data` found in GridFS
+        """
+        content = Mock(location=digest, content_digest=digest, length=len(data))
+        content.stream_data.side_effect = lambda: iter([data])
+        self.contents[digest] = content
+        return content
+
+    def add(self, content):
+        """
+        Copy `content` to disk, as the background thread started on a miss does
+        """
+        with patch.object(self.cache, '_load', side_effect=self.contents.get):
+            self.cache._add(content.location, content.content_digest)  # pylint: disable=protected-access
+
+    def test_miss_is_served_from_gridfs_and_copied_later(self):
+        content = self.content('a')
+        with patch.object(self.cache, '_add_later') as mock_add_later:
+            self.assertIsNone(self.cache.get(content))
+        mock_add_later.assert_called_once_with(content)
+
+        self.add(content)
+        self.assertEqual(''.join(self.cache.get(content).stream_data()), '0123456789')
+
+    def test_content_is_copied_once(self):
+        content = self.content('a')
+        open(os.path.join(self.directory, '.a'), 'w').close()
+        self.add(content)
+        self.assertFalse(content.stream_data.called)
+        self.assertEqual(os.listdir(self.directory), ['.a'])
+
+    def test_abandoned_copies_are_removed(self):
+        temp_path = os.path.join(self.directory, '.a')
+        open(temp_path, 'w').close()
+        abandoned_at = time.time() - TEMP_FILE_MAX_AGE - 1
+        os.utime(temp_path, (abandoned_at, abandoned_at))
+
+        self.add(self.content('a'))
+        self.assertEqual(os.listdir(self.directory), [])
+        self.add(self.content('a'))
+        self.assertEqual(os.listdir(self.directory), ['a'])
+
+    def test_least_recently_used_files_are_evicted(self):
+        for digest in 'abc':
+            with patch('contentserver.disk_cache.os.listdir', wraps=os.listdir) as mock_listdir:
+                self.add(self.content(digest))
+            # the directory is only listed on the first add, and once the cache is full
+            self.assertEqual(mock_listdir.call_count, 1 if digest in 'ac' else 0)
+            os.utime(os.path.join(self.directory, digest), (time.time() - 10 + ord(digest) - ord('c'), ) * 2)
+        self.assertEqual(sorted(os.listdir(self.directory)), ['b', 'c'])
@@ -3,11 +3,13 @@ This file contains the logic for cohort groups, as exposed internally to the
 forums, and to the cohort admin views.
 """
 
+from crum import get_current_request
 from django.http import Http404
 import logging
 import random
 
 from courseware import courses
+from request_cache.middleware import RequestCache
 from student.models import get_user_by_username_or_email
 from .models import CourseUserGroup
 
@@ -194,6 +196,34 @@ def get_cohort_by_id(course_id, cohort_id):
                                        id=cohort_id)
 
 
+def get_cohort_name(course_id, cohort_id):
+    """
+    Return the name of the cohort with the given id.  Raises DoesNotExist if it
+    isn't a cohort of the course.
+
+    The names of all of the cohorts of the course are loaded together, and
+    kept for the rest of the request, so naming the cohorts of many forum
+    posts only takes one query.
+    """
+    cohort_id = int(cohort_id)
+    if get_current_request() is None:
+        names = {}
+    else:
+        names = RequestCache.get_request_cache().data.setdefault('cohort_names', {}).setdefault(course_id, {})
+
+    if cohort_id not in names:
+        # The cohort may have been added since the names were loaded
+        names.update(CourseUserGroup.objects.filter(
+            course_id=course_id,
+            group_type=CourseUserGroup.COHORT
+        ).values_list('id', 'name'))
+        if cohort_id not in names:
+            raise CourseUserGroup.DoesNotExist(
+                "Cohort {0} doesn't exist in {1}".format(cohort_id, course_id)
+            )
+    return names[cohort_id]
+
+
 def add_cohort(course_id, name):
     """
     Add a cohort to a course.  Raises ValueError if a cohort of the same name already
@@ -3,10 +3,12 @@ from django.contrib.auth.models import User
 from django.conf import settings
 
 from django.test.utils import override_settings
+from mock import Mock, patch
 
 from course_groups.models import CourseUserGroup
+from request_cache.middleware import RequestCache
 from course_groups.cohorts import (get_cohort, get_course_cohorts,
-                                   is_commentable_cohorted, get_cohort_by_name)
+                                   is_commentable_cohorted, get_cohort_by_name, get_cohort_name)
 
 from xmodule.modulestore.django import modulestore, clear_existing_modulestores
 
@@ -212,6 +214,38 @@ class TestCohorts(django.test.TestCase):
         cohorts = sorted([c.name for c in get_course_cohorts(course1_id)])
         self.assertEqual(cohorts, ['TestCohort', 'TestCohort2'])
 
+    def test_get_cohort_name(self):
+        course_id = 'a/b/c'
+        cohort = CourseUserGroup.objects.create(name="TestCohort",
+                                                course_id=course_id,
+                                                group_type=CourseUserGroup.COHORT)
+
+        self.assertEqual(get_cohort_name(course_id, cohort.id), "TestCohort")
+        self.assertEqual(get_cohort_name(course_id, str(cohort.id)), "TestCohort")
+        self.assertRaises(CourseUserGroup.DoesNotExist, get_cohort_name, 'e/f/g', cohort.id)
+
+    @patch('course_groups.cohorts.get_current_request', Mock(return_value=Mock()))
+    def test_get_cohort_name_loads_names_once(self):
+        course_id = 'a/b/c'
+        cohorts = [
+            CourseUserGroup.objects.create(name="TestCohort{0}".format(i),
+                                           course_id=course_id,
+                                           group_type=CourseUserGroup.COHORT)
+            for i in range(3)
+        ]
+        RequestCache().clear_request_cache()
+
+        with self.assertNumQueries(1):
+            names = [get_cohort_name(course_id, cohort.id) for cohort in cohorts]
+        self.assertEqual(names, ["TestCohort0", "TestCohort1", "TestCohort2"])
+
+        # A cohort added since the names were loaded is found
+        cohort = CourseUserGroup.objects.create(name="NewCohort",
+                                                course_id=course_id,
+                                                group_type=CourseUserGroup.COHORT)
+        self.assertEqual(get_cohort_name(course_id, cohort.id), "NewCohort")
+        RequestCache().clear_request_cache()
+
     def test_is_commentable_cohorted(self):
         course = modulestore().get_course("edX/toy/2012_Fall")
         self.assertFalse(course.is_cohorted)
@@ -77,6 +77,32 @@ class CourseMode(models.Model):
         """
         return {mode.slug: mode for mode in cls.modes_for_course(course_id)}
 
+    @classmethod
+    def modes_for_courses_dict(cls, course_ids):
+        """
+        Returns the modes for each of the courses in `course_ids`, in one
+        query, as a dictionary from course id to the dictionary that
+        modes_for_course_dict returns for the course
+        """
+        now = datetime.now(pytz.UTC)
+        found_course_modes = cls.objects.filter(Q(course_id__in=list(course_ids)) &
+                                                (Q(expiration_date__isnull=True) |
+                                                Q(expiration_date__gte=now)))
+        modes = {course_id: {} for course_id in course_ids}
+        for mode in found_course_modes:
+            modes[mode.course_id][mode.mode_slug] = Mode(
+                mode.mode_slug,
+                mode.mode_display_name,
+                mode.min_price,
+                mode.suggested_prices,
+                mode.currency,
+                mode.expiration_date
+            )
+        for course_id, course_modes in modes.iteritems():
+            if not course_modes:
+                course_modes[cls.DEFAULT_MODE.slug] = cls.DEFAULT_MODE
+        return modes
+
     @classmethod
     def mode_for_course(cls, course_id, mode_slug):
         """
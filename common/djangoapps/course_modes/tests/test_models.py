@@ -112,3 +112,17 @@ class CourseModeModelTest(TestCase):
 
         modes = CourseMode.modes_for_course('second_test_course')
         self.assertEqual([CourseMode.DEFAULT_MODE], modes)
+
+    def test_modes_for_courses_dict(self):
+        """
+        Find the modes of several courses at once
+        """
+        mode = Mode(u'verified', u'Verified Certificate', 0, '', 'usd', None)
+        self.create_mode(mode.slug, mode.name)
+
+        modes = CourseMode.modes_for_courses_dict([self.course_id, 'second_test_course'])
+        self.assertEqual(modes, {
+            self.course_id: {u'verified': mode},
+            'second_test_course': {CourseMode.DEFAULT_MODE.slug: CourseMode.DEFAULT_MODE},
+        })
+        self.assertEqual(modes[self.course_id], CourseMode.modes_for_course_dict(self.course_id))
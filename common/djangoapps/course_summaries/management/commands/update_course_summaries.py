@@ -0,0 +1,34 @@
+"""
+Command to (re)make the summaries of courses.
+"""
+from django.core.management.base import BaseCommand
+
+from course_summaries.models import CourseSummary
+from xmodule.course_module import CourseDescriptor
+from xmodule.modulestore.django import modulestore
+
+
+class Command(BaseCommand):
+
+    args = "[<course_id> ...]"
+    help = """
+    Makes the summaries of the given courses, or of all of the courses in the
+    modulestore, which are listed from the summaries when
+    MITX_FEATURES['USE_COURSE_SUMMARIES'] is on.  Run it when turning that on,
+    and after changing XML courses.
+
+        $ ... update_course_summaries MITx/6.002x/2012_Fall
+    """
+
+    def handle(self, *args, **options):
+        if args:
+            courses = [
+                modulestore().get_instance(course_id, CourseDescriptor.id_to_location(course_id))
+                for course_id in args
+            ]
+        else:
+            courses = [course for course in modulestore().get_courses() if isinstance(course, CourseDescriptor)]
+
+        for course in courses:
+            CourseSummary.update_for_course(course)
+            self.stdout.write("Updated the summary of {0}\n".format(course.id))
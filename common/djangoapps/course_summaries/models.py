@@ -0,0 +1,191 @@
+"""
+Summaries of courses, with what the pages that list courses show about them,
+so that those pages don't have to load each course from the modulestore.
+
+A summary is kept with the content version of its course (see
+xmodule.modulestore.get_course_content_version), and made again from the
+course when the course has changed since.
+"""
+import logging
+
+from django.db import models
+
+from xmodule.course_module import CourseDescriptor
+from xmodule.modulestore.django import modulestore, course_content_version, course_content_versions
+from xmodule.modulestore.exceptions import ItemNotFoundError
+
+log = logging.getLogger(__name__)
+
+
+class CourseSummary(models.Model):
+    """
+    The display name, dates, organization, image and enrollment settings of a
+    course.  These can be used in place of the CourseDescriptor in course
+    listings, templates and access checks on the course.
+    """
+    course_id = models.CharField(max_length=255, primary_key=True)
+    content_version = models.CharField(max_length=255, blank=True)
+    modified = models.DateTimeField(auto_now=True)
+
+    display_name = models.TextField(null=True)
+    display_name_with_default = models.TextField()
+    display_coursenumber = models.TextField(null=True)
+    display_organization = models.TextField(null=True)
+
+    start = models.DateTimeField(null=True)
+    end = models.DateTimeField(null=True)
+    advertised_start = models.CharField(max_length=255, null=True)
+    announcement = models.DateTimeField(null=True)
+    is_new = models.NullBooleanField()
+
+    enrollment_start = models.DateTimeField(null=True)
+    enrollment_end = models.DateTimeField(null=True)
+    enrollment_domain = models.CharField(max_length=255, null=True)
+    ispublic = models.NullBooleanField()
+    days_early_for_beta = models.FloatField(null=True)
+
+    static_asset_path = models.CharField(max_length=255, blank=True)
+    data_dir = models.CharField(max_length=255, blank=True)
+    course_image = models.CharField(max_length=255, blank=True)
+
+    lowest_passing_grade = models.FloatField(null=True)
+    end_of_course_survey_url = models.TextField(null=True)
+
+    # These are worked out from the fields above as for a CourseDescriptor
+    is_newish = CourseDescriptor.is_newish
+    sorting_score = CourseDescriptor.sorting_score
+    _sorting_dates = CourseDescriptor._sorting_dates.im_func  # pylint: disable=protected-access
+    start_date_text = CourseDescriptor.start_date_text
+    end_date_text = CourseDescriptor.end_date_text
+    display_number_with_default = CourseDescriptor.display_number_with_default
+    display_org_with_default = CourseDescriptor.display_org_with_default
+    has_started = CourseDescriptor.has_started.im_func
+    has_ended = CourseDescriptor.has_ended.im_func
+
+    @property
+    def id(self):  # pylint: disable=invalid-name
+        """
+        The course id, as for a CourseDescriptor.
+        """
+        return self.course_id
+
+    @property
+    def location(self):
+        """
+        The location of the course.
+        """
+        return CourseDescriptor.id_to_location(self.course_id)
+
+    @property
+    def number(self):
+        """
+        The course number, from the location of the course.
+        """
+        return self.location.course
+
+    @property
+    def org(self):
+        """
+        The course organization, from the location of the course.
+        """
+        return self.location.org
+
+    @classmethod
+    def update_for_course(cls, course, content_version=None):
+        """
+        Make the summary of `course`, a CourseDescriptor, save it and return it.
+
+        `content_version` is the content version of the course that `course`
+        was loaded at.  If it isn't given, the current one is used.
+        """
+        if content_version is None:
+            content_version = course_content_version(course.id)
+        is_new = course.is_new
+        if isinstance(is_new, basestring):
+            is_new = is_new.lower() in ['true', 'yes', 'y']
+
+        summary = cls(
+            course_id=course.id,
+            content_version=content_version or '',
+            display_name=course.display_name,
+            display_name_with_default=course.display_name_with_default,
+            display_coursenumber=course.display_coursenumber,
+            display_organization=course.display_organization,
+            start=course.start,
+            end=course.end,
+            advertised_start=course.advertised_start,
+            announcement=course.announcement,
+            is_new=is_new,
+            enrollment_start=course.enrollment_start,
+            enrollment_end=course.enrollment_end,
+            enrollment_domain=course.enrollment_domain,
+            ispublic=getattr(course, 'ispublic', None),
+            days_early_for_beta=course.days_early_for_beta,
+            static_asset_path=course.static_asset_path or '',
+            data_dir=getattr(course, 'data_dir', None) or '',
+            course_image=course.course_image or '',
+            lowest_passing_grade=course.lowest_passing_grade,
+            end_of_course_survey_url=course.end_of_course_survey_url,
+        )
+        summary.save()
+        return summary
+
+    @classmethod
+    def summaries_for_courses(cls, course_ids):
+        """
+        Returns a dictionary from each of the `course_ids` to the summary of
+        the course, in one query, making the summaries that are missing or out
+        of date.  Courses that don't exist are left out.
+        """
+        course_ids = list(course_ids)
+        summaries = cls.objects.in_bulk(course_ids)
+        return cls._up_to_date(course_ids, summaries)
+
+    @classmethod
+    def all_summaries(cls):
+        """
+        Returns the up to date summaries of all of the courses that have one,
+        as a list.  The courses that have one are those that were created or
+        imported in Studio, those summarized by the `update_course_summaries`
+        command, and those that summaries were asked for since.
+        """
+        summaries = {summary.course_id: summary for summary in cls.objects.all()}
+        return cls._up_to_date(summaries.keys(), summaries).values()
+
+    @classmethod
+    def _up_to_date(cls, course_ids, summaries):
+        """
+        Returns a dictionary from each of the `course_ids` to its summary, which
+        is taken from `summaries` if it's up to date, or made from the course.
+
+        When the content version of a course is unknown (e.g. the cache that
+        holds it is down, or is a DummyCache), its stored summary is used as is,
+        rather than remaking it every time.
+        """
+        versions = course_content_versions(course_ids)
+        up_to_date = {}
+        for course_id in course_ids:
+            summary = summaries.get(course_id)
+            version = versions[course_id]
+            if summary is None or (version is not None and summary.content_version != version):
+                summary = cls._summarize(course_id, version)
+            if summary is not None:
+                up_to_date[course_id] = summary
+        return up_to_date
+
+    @classmethod
+    def _summarize(cls, course_id, content_version):
+        """
+        Make and return the summary of the course `course_id`, or delete it and
+        return None if the course doesn't exist anymore.
+        """
+        try:
+            course = modulestore().get_instance(course_id, CourseDescriptor.id_to_location(course_id))
+        except ItemNotFoundError:
+            log.warning("Summary requested of non-existent course %s", course_id)
+            cls.objects.filter(course_id=course_id).delete()
+            return None
+        return cls.update_for_course(course, content_version)
+
+    def __unicode__(self):
+        return u"Summary of {0}".format(self.course_id)
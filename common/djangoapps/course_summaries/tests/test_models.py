@@ -0,0 +1,82 @@
+"""
+Tests of course summaries
+"""
+import datetime
+
+from django.test.utils import override_settings
+from django.utils.timezone import UTC
+from mock import patch
+
+from course_summaries.models import CourseSummary
+from courseware.access import has_access
+from courseware.tests.tests import TEST_DATA_MONGO_MODULESTORE
+from student.tests.factories import UserFactory
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.inheritance import own_metadata
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory
+
+
+@override_settings(MODULESTORE=TEST_DATA_MONGO_MODULESTORE)
+class CourseSummaryTest(ModuleStoreTestCase):
+    """
+    Tests of CourseSummary
+    """
+    def setUp(self):
+        self.course = CourseFactory.create(
+            org='edX', number='999', display_name='Robot Super Course',
+            start=datetime.datetime(2013, 1, 1, tzinfo=UTC()),
+            end=datetime.datetime(2013, 6, 1, tzinfo=UTC()),
+        )
+
+    def test_summary_of_course(self):
+        summary = CourseSummary.summaries_for_courses([self.course.id])[self.course.id]
+
+        self.assertEqual(summary.id, self.course.id)
+        self.assertEqual(summary.location, self.course.location)
+        for attr in ['display_name_with_default', 'display_number_with_default', 'display_org_with_default',
+                     'start', 'end', 'enrollment_start', 'enrollment_end', 'start_date_text', 'end_date_text',
+                     'is_newish', 'sorting_score', 'lowest_passing_grade', 'number', 'org']:
+            self.assertEqual(getattr(summary, attr), getattr(self.course, attr), attr)
+        self.assertTrue(summary.has_ended())
+        self.assertTrue(summary.has_started())
+
+    def test_summary_is_kept(self):
+        CourseSummary.summaries_for_courses([self.course.id])
+        with patch('course_summaries.models.modulestore') as mock_modulestore:
+            summary = CourseSummary.summaries_for_courses([self.course.id])[self.course.id]
+        self.assertFalse(mock_modulestore.called)
+        self.assertEqual(summary.display_name, 'Robot Super Course')
+        self.assertEqual(CourseSummary.all_summaries(), [summary])
+
+    def test_summary_is_kept_when_the_version_is_unknown(self):
+        CourseSummary.summaries_for_courses([self.course.id])
+        with patch('course_summaries.models.course_content_versions', return_value={self.course.id: None}):
+            with patch('course_summaries.models.modulestore') as mock_modulestore:
+                summary = CourseSummary.summaries_for_courses([self.course.id])[self.course.id]
+        self.assertFalse(mock_modulestore.called)
+        self.assertEqual(summary.display_name, 'Robot Super Course')
+
+    def test_summary_follows_course_changes(self):
+        CourseSummary.summaries_for_courses([self.course.id])
+
+        self.course.display_name = 'Robot Duper Course'
+        modulestore('direct').update_metadata(self.course.location, own_metadata(self.course))
+
+        summary = CourseSummary.summaries_for_courses([self.course.id])[self.course.id]
+        self.assertEqual(summary.display_name, 'Robot Duper Course')
+
+    def test_missing_courses_are_left_out(self):
+        CourseSummary.summaries_for_courses([self.course.id])
+        modulestore('direct').delete_item(self.course.location)
+
+        self.assertEqual(CourseSummary.summaries_for_courses([self.course.id, 'edX/missing/course']), {})
+        self.assertEqual(CourseSummary.objects.count(), 0)
+
+    @patch.dict('django.conf.settings.MITX_FEATURES', {'DISABLE_START_DATES': False})
+    def test_access_to_summary(self):
+        summary = CourseSummary.update_for_course(self.course)
+        user = UserFactory.create()
+
+        self.assertTrue(has_access(user, summary, 'load'))
+        self.assertFalse(has_access(user, summary, 'staff'))
@@ -0,0 +1,110 @@
+"""
+Loads what the student dashboard shows about a user's enrollments in bulk,
+with one query per kind of data rather than one per course.
+"""
+import logging
+
+from django.conf import settings
+
+from bulk_email.models import CourseAuthorization
+from certificates.models import certificate_statuses_for_student
+from course_modes.models import CourseMode
+from course_summaries.models import CourseSummary
+from student.models import CourseEnrollment
+from xmodule.course_module import CourseDescriptor
+from xmodule.modulestore import MONGO_MODULESTORE_TYPE
+from xmodule.modulestore.django import course_content_version, course_content_versions, modulestore
+from xmodule.modulestore.exceptions import ItemNotFoundError
+
+log = logging.getLogger("mitx.student")
+
+# The courses loaded for dashboards, shared by all users: a dict from course id
+# to the content version of the course and the CourseDescriptor of that version.
+COURSE_CACHE = {}
+
+
+def get_course(course_id, version=None):
+    """
+    Return the CourseDescriptor of `course_id`, which is kept until the content
+    of the course changes, in a cache of at most
+    settings.DASHBOARD_COURSE_CACHE_MAX_SIZE courses.
+
+    `version` is the current content version of the course, if it's known.
+    """
+    max_size = getattr(settings, 'DASHBOARD_COURSE_CACHE_MAX_SIZE', 0)
+    if max_size and version is None:
+        version = course_content_version(course_id)
+    if not max_size or version is None:
+        return modulestore().get_instance(course_id, CourseDescriptor.id_to_location(course_id))
+
+    cached = COURSE_CACHE.get(course_id)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    course = modulestore().get_instance(course_id, CourseDescriptor.id_to_location(course_id))
+    if course_id not in COURSE_CACHE and len(COURSE_CACHE) >= max_size:
+        COURSE_CACHE.clear()
+    COURSE_CACHE[course_id] = (version, course)
+    return course
+
+
+def get_enrolled_courses(user):
+    """
+    Return a list of (course, enrollment) pairs of the courses `user` is
+    enrolled in, ignoring any courses that no longer exist.  The courses are
+    CourseSummaries when MITX_FEATURES['USE_COURSE_SUMMARIES'] is on.
+    """
+    enrollments = list(CourseEnrollment.enrollments_for_user(user))
+    if settings.MITX_FEATURES.get('USE_COURSE_SUMMARIES'):
+        courses = CourseSummary.summaries_for_courses(enrollment.course_id for enrollment in enrollments)
+    else:
+        versions = {}
+        if getattr(settings, 'DASHBOARD_COURSE_CACHE_MAX_SIZE', 0):
+            versions = course_content_versions(enrollment.course_id for enrollment in enrollments)
+        courses = {}
+        for enrollment in enrollments:
+            try:
+                courses[enrollment.course_id] = get_course(enrollment.course_id, versions.get(enrollment.course_id))
+            except ItemNotFoundError:
+                pass
+
+    enrolled_courses = []
+    for enrollment in enrollments:
+        if enrollment.course_id in courses:
+            enrolled_courses.append((courses[enrollment.course_id], enrollment))
+        else:
+            log.error("User {0} enrolled in non-existent course {1}"
+                      .format(user.username, enrollment.course_id))
+    return enrolled_courses
+
+
+def get_course_modes(courses):
+    """
+    Return a dictionary from the id of each of `courses` to its modes, as
+    returned by CourseMode.modes_for_course_dict.
+    """
+    return CourseMode.modes_for_courses_dict([course.id for course in courses])
+
+
+def get_certificate_statuses(user, courses):
+    """
+    Return a dictionary from the id of each of `courses` that has ended to
+    the status of the certificate of `user`, as returned by
+    certificate_status_for_student.
+    """
+    return certificate_statuses_for_student(user, [course.id for course in courses if course.has_ended()])
+
+
+def get_email_enabled_course_ids(courses):
+    """
+    Return the ids of `courses` for which the email settings are shown: Mongo
+    courses, when bulk email is turned on.
+    """
+    if not settings.MITX_FEATURES['ENABLE_INSTRUCTOR_EMAIL']:
+        return frozenset()
+
+    mongo_course_ids = [
+        course.id for course in courses
+        if modulestore().get_modulestore_type(course.id) == MONGO_MODULESTORE_TYPE
+    ]
+    return frozenset(CourseAuthorization.instructor_email_enabled_courses(mongo_course_ids))
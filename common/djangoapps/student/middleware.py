@@ -1,11 +1,12 @@
 """
 Middleware that checks user standing for the purpose of keeping users with
-disabled accounts from accessing the site.
+disabled accounts from accessing the site, and that keeps the cached
+enrollments of users in step with the database.
 """
 from django.http import HttpResponseForbidden
 from django.utils.translation import ugettext as _
 from django.conf import settings
-from student.models import UserStanding
+from student.models import UserStanding, clear_changed_enrollment_modes
 
 class UserStandingMiddleware(object):
     """
@@ -35,3 +36,17 @@ class UserStandingMiddleware(object):
                             link_end=u'</a>'
                         )
                 return HttpResponseForbidden(msg)
+
+
+class EnrollmentModesCacheMiddleware(object):
+    """
+    Forgets the cached enrollment modes of the users whose enrollments changed
+    during the request once the change has been committed, so that modes
+    cached by concurrent requests in the meantime aren't kept.
+
+    Must come before TransactionMiddleware, so that its process_response runs
+    after the commit.
+    """
+    def process_response(self, request, response):
+        clear_changed_enrollment_modes()
+        return response
@@ -22,11 +22,14 @@ from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib.auth.signals import user_logged_in, user_logged_out
 from django.db import models
-from django.db.models.signals import post_save
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.forms import ModelForm, forms
 
 import comment_client as cc
+from crum import get_current_request
+from request_cache.middleware import RequestCache
 from pytz import UTC
 
 
@@ -860,11 +863,25 @@ class CourseEnrollment(models.Model):
 
         `course_id` is our usual course_id string (e.g. "edX/Test101/2013_Fall)
         """
-        try:
-            record = CourseEnrollment.objects.get(user=user, course_id=course_id)
-            return record.is_active
-        except cls.DoesNotExist:
-            return False
+        return course_id in cls._enrollment_modes(user)
+
+    @classmethod
+    def is_enrolled_many(cls, users, course_id):
+        """
+        Returns a dictionary from the id of each of `users` to whether the user
+        is enrolled in the course, looked up in one query.
+
+        `users` is a list or QuerySet of Django User objects.
+
+        `course_id` is our usual course_id string (e.g. "edX/Test101/2013_Fall)
+        """
+        user_ids = [user.id for user in users]
+        enrolled_ids = set(CourseEnrollment.objects.filter(
+            user__in=user_ids,
+            course_id=course_id,
+            is_active=1
+        ).values_list('user_id', flat=True))
+        return {user_id: user_id in enrolled_ids for user_id in user_ids}
 
     @classmethod
     def is_enrolled_by_partial(cls, user, course_id_partial):
@@ -882,14 +899,9 @@ class CourseEnrollment(models.Model):
         `course_id_partial` is a starting substring for a fully qualified
                course_id (e.g. "edX/Test101/").
         """
-        try:
-            return CourseEnrollment.objects.filter(
-                user=user,
-                course_id__startswith=course_id_partial,
-                is_active=1
-            ).exists()
-        except cls.DoesNotExist:
-            return False
+        return any(
+            course_id.startswith(course_id_partial) for course_id in cls._enrollment_modes(user)
+        )
 
     @classmethod
     def enrollment_mode_for_user(cls, user, course_id):
@@ -899,19 +911,46 @@ class CourseEnrollment(models.Model):
         `user` is a Django User object
         `course_id` is our usual course_id string (e.g. "edX/Test101/2013_Fall)
         """
-        try:
-            record = CourseEnrollment.objects.get(user=user, course_id=course_id)
-            if record.is_active:
-                return record.mode
-            else:
-                return None
-        except cls.DoesNotExist:
-            return None
+        return cls._enrollment_modes(user).get(course_id)
 
     @classmethod
     def enrollments_for_user(cls, user):
         return CourseEnrollment.objects.filter(user=user, is_active=1)
 
+    @classmethod
+    def _enrollment_modes(cls, user):
+        """
+        Returns a dictionary from the id of each course the user is enrolled in
+        to the mode of the enrollment.
+
+        This is kept in the request cache for the rest of the request, and in
+        the Django cache for settings.ENROLLMENT_CACHE_TIMEOUT seconds, until
+        an enrollment of the user is saved or deleted.
+        """
+        if user.id is None:
+            # anonymous users aren't enrolled in anything
+            return {}
+
+        request_modes = None
+        if get_current_request() is not None:
+            request_modes = RequestCache.get_request_cache().data.setdefault('course_enrollment_modes', {})
+            if user.id in request_modes:
+                return request_modes[user.id]
+
+        timeout = getattr(settings, 'ENROLLMENT_CACHE_TIMEOUT', 0)
+        modes = cache.get(_enrollment_modes_cache_key(user.id)) if timeout else None
+        if modes is None:
+            modes = dict(CourseEnrollment.objects.filter(
+                user=user,
+                is_active=1
+            ).values_list('course_id', 'mode'))
+            if timeout:
+                cache.set(_enrollment_modes_cache_key(user.id), modes, timeout)
+
+        if request_modes is not None:
+            request_modes[user.id] = modes
+        return modes
+
     def activate(self):
         """Makes this `CourseEnrollment` record active. Saves immediately."""
         if not self.is_active:
@@ -1039,6 +1078,42 @@ def add_user_to_default_group(user, group):
     utg.save()
 
 
+def _enrollment_modes_cache_key(user_id):
+    """
+    Returns the key of the enrollment modes of a user in the Django cache.
+    """
+    return "student.course_enrollment_modes.{0}".format(user_id)
+
+
+@receiver(post_save, sender=CourseEnrollment)
+@receiver(post_delete, sender=CourseEnrollment)
+def clear_cached_enrollment_modes(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Forget the cached enrollment modes of the user of an enrollment that changed.
+
+    Within a request the change is only committed by TransactionMiddleware once
+    the view returns, and a concurrent request can put the old modes back in
+    the cache before then. So the user is also remembered in the request
+    cache, and `EnrollmentModesCacheMiddleware` forgets their modes again
+    after the commit.
+    """
+    cache.delete(_enrollment_modes_cache_key(instance.user_id))
+    request_cache = RequestCache.get_request_cache().data
+    request_cache.get('course_enrollment_modes', {}).pop(instance.user_id, None)
+    if get_current_request() is not None:
+        request_cache.setdefault('changed_enrollment_users', set()).add(instance.user_id)
+
+
+def clear_changed_enrollment_modes():
+    """
+    Forget the cached enrollment modes of the users whose enrollments changed
+    during the current request.
+    """
+    user_ids = RequestCache.get_request_cache().data.pop('changed_enrollment_users', ())
+    if user_ids:
+        cache.delete_many([_enrollment_modes_cache_key(user_id) for user_id in user_ids])
+
+
 @receiver(post_save, sender=User)
 def update_user_information(sender, instance, created, **kwargs):
     if not settings.MITX_FEATURES['ENABLE_DISCUSSION_SERVICE']:
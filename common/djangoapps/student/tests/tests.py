@@ -12,6 +12,7 @@ from datetime import datetime, timedelta
 import pytz
 
 from django.conf import settings
+from django.core.cache import cache
 from django.test import TestCase
 from django.test.utils import override_settings
 from django.test.client import RequestFactory
@@ -21,6 +22,7 @@ from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import int_to_base36
 from django.core.urlresolvers import reverse
 
+from xmodule.modulestore.django import bump_course_content_version
 from xmodule.modulestore.tests.factories import CourseFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from courseware.tests.tests import TEST_DATA_MIXED_MODULESTORE
@@ -28,7 +30,9 @@ from courseware.tests.tests import TEST_DATA_MIXED_MODULESTORE
 from mock import Mock, patch
 from textwrap import dedent
 
-from student.models import unique_id_for_user, CourseEnrollment
+from student import dashboard
+from student.middleware import EnrollmentModesCacheMiddleware
+from student.models import unique_id_for_user, CourseEnrollment, _enrollment_modes_cache_key
 from student.views import (process_survey_link, _cert_info, password_reset, password_reset_confirm_wrapper,
                            change_enrollment, complete_course_mode_info)
 from student.tests.factories import UserFactory, CourseModeFactory
@@ -256,6 +260,25 @@ class DashboardTest(TestCase):
         self.assertFalse(course_mode_info['show_upsell'])
         self.assertIsNone(course_mode_info['days_for_upsell'])
 
+    @override_settings(DASHBOARD_COURSE_CACHE_MAX_SIZE=1)
+    def test_courses_are_kept_until_they_change(self):
+        dashboard.COURSE_CACHE.clear()
+        self.addCleanup(dashboard.COURSE_CACHE.clear)
+
+        course = dashboard.get_course(self.course.id)
+        self.assertEqual(course.id, self.course.id)
+        self.assertIs(dashboard.get_course(self.course.id), course)
+        CourseEnrollment.enroll(self.user, self.course.id)
+        self.assertIs(dashboard.get_enrolled_courses(self.user)[0][0], course)
+
+        bump_course_content_version(None, course_id=self.course.id)
+        self.assertIsNot(dashboard.get_course(self.course.id), course)
+
+        # The cache holds at most DASHBOARD_COURSE_CACHE_MAX_SIZE courses
+        other_course = CourseFactory.create(org=self.COURSE_ORG, display_name="other", number="200")
+        dashboard.get_course(other_course.id)
+        self.assertEqual(dashboard.COURSE_CACHE.keys(), [other_course.id])
+
 
 class EnrollInCourseTest(TestCase):
     """Tests enrolling and unenrolling in courses."""
@@ -394,6 +417,49 @@ class EnrollInCourseTest(TestCase):
         CourseEnrollment.enroll(user, course_id)
         self.assertTrue(CourseEnrollment.is_enrolled(user, course_id))
 
+    @override_settings(ENROLLMENT_CACHE_TIMEOUT=60)
+    def test_enrollments_are_cached(self):
+        user = User.objects.create(username="jack", email="jack@fake.edx.org")
+        course_id = "edX/Test101/2013"
+        CourseEnrollment.enroll(user, course_id, mode="verified")
+
+        with self.assertNumQueries(1):
+            self.assertTrue(CourseEnrollment.is_enrolled(user, course_id))
+        with self.assertNumQueries(0):
+            self.assertTrue(CourseEnrollment.is_enrolled_by_partial(user, "edX/Test101/"))
+            self.assertEqual(CourseEnrollment.enrollment_mode_for_user(user, course_id), "verified")
+            self.assertFalse(CourseEnrollment.is_enrolled(user, "MITx/6.003z/2012"))
+
+        # Changes to the user's enrollments are seen
+        CourseEnrollment.unenroll(user, course_id)
+        self.assertFalse(CourseEnrollment.is_enrolled(user, course_id))
+        self.assertIsNone(CourseEnrollment.enrollment_mode_for_user(user, course_id))
+
+    @override_settings(ENROLLMENT_CACHE_TIMEOUT=60)
+    def test_enrollments_are_forgotten_after_commit(self):
+        user = User.objects.create(username="jack", email="jack@fake.edx.org")
+        course_id = "edX/Test101/2013"
+        with patch('student.models.get_current_request', return_value=RequestFactory().get('/')):
+            CourseEnrollment.enroll(user, course_id, mode="verified")
+            # A concurrent request caches the modes from before the commit
+            cache.set(_enrollment_modes_cache_key(user.id), {}, 60)
+            EnrollmentModesCacheMiddleware().process_response(None, None)
+
+        self.assertIsNone(cache.get(_enrollment_modes_cache_key(user.id)))
+        self.assertTrue(CourseEnrollment.is_enrolled(user, course_id))
+
+    def test_is_enrolled_many(self):
+        course_id = "edX/Test101/2013"
+        users = [UserFactory.create() for _ in range(3)]
+        CourseEnrollment.enroll(users[0], course_id)
+        CourseEnrollment.enroll(users[1], course_id)
+        CourseEnrollment.unenroll(users[1], course_id)
+        CourseEnrollment.enroll(users[2], "MITx/6.003z/2012")
+
+        with self.assertNumQueries(1):
+            enrolled = CourseEnrollment.is_enrolled_many(users, course_id)
+        self.assertEqual(enrolled, {users[0].id: True, users[1].id: False, users[2].id: False})
+
 
 @override_settings(MODULESTORE=TEST_DATA_MIXED_MODULESTORE)
 class PaidRegistrationTest(ModuleStoreTestCase):
@@ -48,13 +48,13 @@ from student.models import (
     get_testcenter_registration, CourseEnrollmentAllowed, UserStanding,
 )
 from student.forms import PasswordResetFormNoActive
+from student import dashboard as dashboard_data
 
 from certificates.models import CertificateStatuses, certificate_status_for_student
 
 from xmodule.course_module import CourseDescriptor
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.modulestore.django import modulestore
-from xmodule.modulestore import MONGO_MODULESTORE_TYPE
 
 from collections import namedtuple
 
@@ -64,7 +64,7 @@ from courseware.access import has_access
 from external_auth.models import ExternalAuthMap
 import external_auth.views
 
-from bulk_email.models import Optout, CourseAuthorization
+from bulk_email.models import Optout
 import shoppingcart
 
 import track.views
@@ -158,7 +158,7 @@ def process_survey_link(survey_link, user):
     return survey_link.format(UNIQUE_ID=unique_id_for_user(user))
 
 
-def cert_info(user, course):
+def cert_info(user, course, cert_status=None):
     """
     Get the certificate info needed to render the dashboard section for the given
     student and course.  Returns a dictionary with keys:
@@ -170,11 +170,16 @@ def cert_info(user, course):
     'show_survey_button': bool
     'survey_url': url, only if show_survey_button is True
     'grade': if status is not 'processing'
+
+    `cert_status` is the result of certificate_status_for_student, if it's
+    already known.
     """
     if not course.has_ended():
         return {}
 
-    return _cert_info(user, course, certificate_status_for_student(user, course.id))
+    if cert_status is None:
+        cert_status = certificate_status_for_student(user, course.id)
+    return _cert_info(user, course, cert_status)
 
 
 def _cert_info(user, course, cert_status):
@@ -269,7 +274,7 @@ def register_user(request, extra_context=None):
     return render_to_response('register.html', context)
 
 
-def complete_course_mode_info(course_id, enrollment):
+def complete_course_mode_info(course_id, enrollment, modes=None):
     """
     We would like to compute some more information from the given course modes
     and the user's current enrollment
@@ -277,8 +282,12 @@ def complete_course_mode_info(course_id, enrollment):
     Returns the given information:
         - whether to show the course upsell information
         - numbers of days until they can't upsell anymore
+
+    `modes` are the modes of the course, as returned by
+    CourseMode.modes_for_course_dict, if they're already known.
     """
-    modes = CourseMode.modes_for_course_dict(course_id)
+    if modes is None:
+        modes = CourseMode.modes_for_course_dict(course_id)
     mode_info = {'show_upsell': False, 'days_for_upsell': None}
     # we want to know if the user is already verified and if verified is an
     # option
@@ -300,13 +309,7 @@ def dashboard(request):
     # Build our courses list for the user, but ignore any courses that no longer
     # exist (because the course IDs have changed). Still, we don't delete those
     # enrollments, because it could have been a data push snafu.
-    courses = []
-    for enrollment in CourseEnrollment.enrollments_for_user(user):
-        try:
-            courses.append((course_from_id(enrollment.course_id), enrollment))
-        except ItemNotFoundError:
-            log.error("User {0} enrolled in non-existent course {1}"
-                      .format(user.username, enrollment.course_id))
+    courses = dashboard_data.get_enrolled_courses(user)
 
     course_optouts = Optout.objects.filter(user=user).values_list('course_id', flat=True)
 
@@ -325,17 +328,21 @@ def dashboard(request):
     show_courseware_links_for = frozenset(course.id for course, _enrollment in courses
                                           if has_access(request.user, course, 'load'))
 
-    course_modes = {course.id: complete_course_mode_info(course.id, enrollment) for course, enrollment in courses}
-    cert_statuses = {course.id: cert_info(request.user, course) for course, _enrollment in courses}
+    # The modes and certificates of all the courses are fetched at once
+    enrolled_courses = [course for course, _enrollment in courses]
+    modes = dashboard_data.get_course_modes(enrolled_courses)
+    course_modes = {
+        course.id: complete_course_mode_info(course.id, enrollment, modes[course.id])
+        for course, enrollment in courses
+    }
+    certificate_statuses = dashboard_data.get_certificate_statuses(user, enrolled_courses)
+    cert_statuses = {
+        course.id: cert_info(request.user, course, certificate_statuses.get(course.id))
+        for course, _enrollment in courses
+    }
 
     # only show email settings for Mongo course and when bulk email is turned on
-    show_email_settings_for = frozenset(
-        course.id for course, _enrollment in courses if (
-            settings.MITX_FEATURES['ENABLE_INSTRUCTOR_EMAIL'] and
-            modulestore().get_modulestore_type(course.id) == MONGO_MODULESTORE_TYPE and
-            CourseAuthorization.instructor_email_enabled(course.id)
-        )
-    )
+    show_email_settings_for = dashboard_data.get_email_enabled_course_ids(enrolled_courses)
     # get info w.r.t ExternalAuthMap
     external_auth_map = None
     try:
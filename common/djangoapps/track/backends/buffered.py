@@ -0,0 +1,191 @@
+"""
+Event tracker backend that sends events to another backend in batches, from
+a background thread, so that requests don't wait for the events to be stored.
+
+"""
+
+from __future__ import absolute_import
+
+import atexit
+import logging
+import os
+import threading
+import time
+import Queue
+
+from dogapi import dog_stats_api
+
+from track.backends import BaseBackend
+
+
+log = logging.getLogger(__name__)
+
+
+class BufferedBackend(BaseBackend):
+    """
+    Event tracker backend that buffers events in a bounded queue, which a
+    background thread drains into another backend, in batches.
+
+    Configured like this::
+
+      TRACKING_BACKENDS = {
+          'mongo': {
+              'ENGINE': 'track.backends.buffered.BufferedBackend',
+              'OPTIONS': {
+                  'backend': {
+                      'ENGINE': 'track.backends.mongodb.MongoBackend',
+                      'OPTIONS': {...}
+                  },
+                  'max_queue_size': 10000,
+                  'flush_size': 100,
+                  'flush_interval': 1.0,
+              }
+          }
+      }
+
+    """
+
+    def __init__(self, backend, max_queue_size=10000, flush_size=100, flush_interval=1.0,
+                 block_timeout=0, **options):
+        """
+        Configure the buffering.
+
+        :Parameters:
+
+          - `backend`: the configuration of the backend that stores the
+            events, with an `ENGINE` and `OPTIONS`, as in TRACKING_BACKENDS.
+          - `max_queue_size`: how many events can wait to be stored.
+          - `flush_size`: how many events to send to the backend at once.
+          - `flush_interval`: how many seconds an event can wait for a
+            batch to fill up.
+          - `block_timeout`: how many seconds to wait for room in the
+            queue when it's full, before dropping the event.
+
+        """
+        super(BufferedBackend, self).__init__(**options)
+
+        # Imported here, as the tracker instantiates this backend as it is imported.
+        from track.tracker import _instantiate_backend_from_name  # pylint: disable=protected-access
+        self.backend = _instantiate_backend_from_name(backend['ENGINE'], backend.get('OPTIONS', {}))
+
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.block_timeout = block_timeout
+        self.queue = Queue.Queue(max_queue_size)
+
+        self.sent_count = 0
+        self.dropped_count = 0
+
+        self._thread = None
+        # The process that the queue and the thread belong to
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+        atexit.register(self.close)
+
+    def send(self, event):
+        self._ensure_thread()
+        try:
+            if self.block_timeout:
+                self.queue.put(event, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(event)
+        except Queue.Full:
+            self.dropped_count += 1
+            dog_stats_api.increment('track.buffered.dropped')
+            log.warning('Dropped an event, as the tracking queue is full')
+
+    def _ensure_thread(self):
+        """
+        Start the thread that drains the queue, unless it's running in this process.
+        """
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+
+        self._check_fork()
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='track-buffered-backend')
+                self._thread.daemon = True
+                self._thread.start()
+
+    def _check_fork(self):
+        """
+        Forget the queue of our parent process if we've been forked.
+
+        The events in it are sent by the parent, so the child starts with an
+        empty queue of its own.  The lock is replaced as well, since it may
+        have been held by another thread of the parent.
+        """
+        if self._pid != os.getpid():
+            self.queue = Queue.Queue(self.queue.maxsize)
+            self._lock = threading.Lock()
+            self._thread = None
+            self._pid = os.getpid()
+
+    def _run(self):
+        """
+        Send the events in the queue to the backend, until told to stop by a None.
+        """
+        while True:
+            batch = []
+            stop = False
+            deadline = time.time() + self.flush_interval
+            while len(batch) < self.flush_size:
+                try:
+                    event = self.queue.get(timeout=max(deadline - time.time(), 0.001))
+                except Queue.Empty:
+                    break
+                if event is None:
+                    stop = True
+                    break
+                batch.append(event)
+
+            self._send_batch(batch)
+            if stop:
+                return
+
+    def _send_batch(self, batch):
+        """
+        Send `batch` to the backend.
+        """
+        if not batch:
+            return
+        try:
+            with dog_stats_api.timer('track.buffered.send_many'):
+                self.backend.send_many(batch)
+            self.sent_count += len(batch)
+        except Exception:  # pylint: disable=broad-except
+            log.exception('Error sending %d events to tracking backend %r', len(batch), self.backend)
+
+    def flush(self):
+        """
+        Send the events in the queue to the backend now, in this thread.
+        """
+        batch = []
+        while True:
+            try:
+                event = self.queue.get_nowait()
+            except Queue.Empty:
+                break
+            if event is not None:
+                batch.append(event)
+            if len(batch) >= self.flush_size:
+                self._send_batch(batch)
+                batch = []
+        self._send_batch(batch)
+
+    def close(self, timeout=5):
+        """
+        Stop the background thread, after it has sent the events in the queue.
+        """
+        self._check_fork()
+        thread = self._thread
+        if thread is not None and self._pid == os.getpid() and thread.is_alive():
+            try:
+                self.queue.put(None, timeout=timeout)
+            except Queue.Full:
+                pass
+            thread.join(timeout)
+        # Whatever is left is sent from here.
+        self.flush()
@@ -0,0 +1,309 @@
+"""
+Event tracker backend that writes events to gzipped files of newline-delimited
+JSON, starting a new file when the current one gets too big or too old.
+
+Each process writes its own files, named after the time they were started,
+the process id, and a sequence number.  A file is written under a temporary
+name, and renamed once it's complete.  The temporary files left behind by
+processes that died are renamed when a backend is created, and are read by
+`read_events` even before then.  Since this relies on the process ids, the
+directory shouldn't be shared between hosts.
+
+"""
+
+from __future__ import absolute_import
+
+import atexit
+import errno
+import glob
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+
+from track.backends import BaseBackend
+from track.utils import DateTimeJSONEncoder
+
+
+log = logging.getLogger(__name__)
+
+SEGMENT_SUFFIX = '.json.gz'
+PARTIAL_SEGMENT_SUFFIX = SEGMENT_SUFFIX + '.part'
+
+# How many compressed bytes read_events reads at a time.
+READ_SIZE = 64 * 1024
+
+# Reusing an encoder saves creating one for every event.
+ENCODER = DateTimeJSONEncoder(separators=(',', ':'))
+
+
+class RotatingGzipFileBackend(BaseBackend):
+    """
+    Event tracker backend that writes events to rotated gzip files.
+
+    Configured like this::
+
+      TRACKING_BACKENDS = {
+          'file': {
+              'ENGINE': 'track.backends.rotating_file.RotatingGzipFileBackend',
+              'OPTIONS': {
+                  'directory': '/edx/var/log/tracking',
+                  'max_bytes': 100 * 1024 * 1024,
+                  'max_age': 3600,
+              }
+          }
+      }
+
+    """
+
+    def __init__(self, directory, prefix='tracking', max_bytes=100 * 1024 * 1024, max_age=3600,
+                 compresslevel=6, **kwargs):
+        """
+        Configure the files the events are written to.
+
+        :Parameters:
+
+          - `directory`: where to write the files.
+          - `prefix`: the start of the names of the files.
+          - `max_bytes`: the compressed size after which a new file is started.
+          - `max_age`: the number of seconds after which a new file is started.
+          - `compresslevel`: the gzip compression level, from 1 to 9.
+
+        """
+        super(RotatingGzipFileBackend, self).__init__(**kwargs)
+
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.compresslevel = compresslevel
+
+        self._lock = threading.Lock()
+        self._raw_file = None
+        self._gzip_file = None
+        self._path = None
+        self._opened_at = None
+        self._timer = None
+        self._pid = None
+        self._sequence = 0
+
+        self._recover_partial_segments()
+        atexit.register(self.close)
+
+    def _recover_partial_segments(self):
+        """
+        Give their final name to the files of processes that died while
+        writing them.
+        """
+        pattern = os.path.join(self.directory, self.prefix + '-*' + PARTIAL_SEGMENT_SUFFIX)
+        for partial_path in glob.glob(pattern):
+            # Nothing has been written by this backend yet, so a file named
+            # after our pid was left by an earlier process with the same pid.
+            if _writer_pid(partial_path) != os.getpid() and not _is_orphaned(partial_path):
+                continue
+            try:
+                os.rename(partial_path, partial_path[:-len(PARTIAL_SEGMENT_SUFFIX)] + SEGMENT_SUFFIX)
+            except OSError as error:
+                # Another process starting up may have renamed it first.
+                if error.errno != errno.ENOENT:
+                    log.exception('Error recovering tracking file %s', partial_path)
+            else:
+                log.info('Recovered incomplete tracking file %s', partial_path)
+
+    def send(self, event):
+        self.send_many([event])
+
+    def send_many(self, events):
+        lines = []
+        for event in events:
+            try:
+                lines.append(ENCODER.encode(event))
+            except (TypeError, ValueError):
+                log.exception('Unable to serialize tracking event')
+        if not lines:
+            return
+
+        data = '\n'.join(lines) + '\n'
+        if isinstance(data, unicode):
+            data = data.encode('utf-8')
+
+        self._check_fork()
+        with self._lock:
+            try:
+                self._rotate_if_needed()
+                self._gzip_file.write(data)
+            except (IOError, OSError):
+                log.exception('Error writing tracking events to %s', self._path)
+
+    def _check_fork(self):
+        """
+        Forget the file of our parent process if we've been forked.
+
+        The file is dropped without finishing it, so that only the parent
+        writes its end.  The lock is replaced as well, since it may have been
+        held by another thread of the parent.
+        """
+        if self._pid is not None and self._pid != os.getpid():
+            if self._gzip_file is not None:
+                # GzipFile closes itself when it's collected, unless it's
+                # detached from the file.
+                self._gzip_file.fileobj = None
+            self._lock = threading.Lock()
+            self._raw_file = self._gzip_file = self._timer = None
+            self._pid = None
+
+    def _rotate_if_needed(self):
+        """
+        Start a new file if there isn't one for this process, or the current
+        one is too big or too old.
+        """
+        if self._gzip_file is not None:
+            too_big = self._raw_file.tell() >= self.max_bytes
+            too_old = time.time() - self._opened_at >= self.max_age
+            if not too_big and not too_old:
+                return
+            self._close_segment()
+
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+        self._pid = os.getpid()
+        self._opened_at = time.time()
+        self._sequence += 1
+        name = '{0}-{1}-{2}-{3:06d}'.format(
+            self.prefix, time.strftime('%Y%m%dT%H%M%S', time.gmtime(self._opened_at)), self._pid, self._sequence
+        )
+        self._path = os.path.join(self.directory, name)
+        # GzipFile does its own buffering.  Leaving the file unbuffered means
+        # that a forked child that drops its copy can't write our data again.
+        self._raw_file = open(self._path + PARTIAL_SEGMENT_SUFFIX, 'ab', 0)
+        self._gzip_file = gzip.GzipFile(
+            filename=name + '.json', mode='wb', compresslevel=self.compresslevel, fileobj=self._raw_file
+        )
+
+        # Finish the file once it's too old, even if no more events are sent.
+        if self.max_age:
+            self._timer = threading.Timer(self.max_age, self._expire_segment, [self._path])
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _expire_segment(self, path):
+        """
+        Finish the file `path` if it's still the current one.
+        """
+        with self._lock:
+            if self._gzip_file is not None and self._path == path and self._pid == os.getpid():
+                self._close_segment()
+
+    def _close_segment(self):
+        """
+        Finish the current file, and give it its final name.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        try:
+            self._gzip_file.close()
+            self._raw_file.close()
+            os.rename(self._path + PARTIAL_SEGMENT_SUFFIX, self._path + SEGMENT_SUFFIX)
+        except (IOError, OSError):
+            log.exception('Error closing tracking file %s', self._path)
+        self._raw_file = self._gzip_file = None
+
+    def close(self):
+        """
+        Finish the current file.
+        """
+        self._check_fork()
+        with self._lock:
+            if self._gzip_file is not None and self._pid == os.getpid():
+                self._close_segment()
+
+
+def _writer_pid(partial_path):
+    """
+    Return the id of the process that wrote the partial file `partial_path`,
+    or None if it isn't named like the files of RotatingGzipFileBackend.
+    """
+    name = os.path.basename(partial_path)[:-len(PARTIAL_SEGMENT_SUFFIX)]
+    try:
+        return int(name.rsplit('-', 2)[-2])
+    except (IndexError, ValueError):
+        return None
+
+
+def _is_orphaned(partial_path):
+    """
+    True if the process that wrote the partial file `partial_path` is gone.
+    """
+    pid = _writer_pid(partial_path)
+    if pid is None or pid == os.getpid():
+        return False
+    try:
+        os.kill(pid, 0)
+    except OSError as error:
+        return error.errno == errno.ESRCH
+    return False
+
+
+def read_events(path, include_partial=False):
+    """
+    Yield the events in the files written by RotatingGzipFileBackend.
+
+    `path` is either a single file, or a directory, in which case all of the
+    files in it are read, oldest first.  Files still being written are
+    skipped, unless `include_partial` is true; files whose writer died are
+    always read, up to the last complete event.
+
+    """
+    if os.path.isdir(path):
+        paths = glob.glob(os.path.join(path, '*' + SEGMENT_SUFFIX))
+        paths.extend(
+            partial_path for partial_path in glob.glob(os.path.join(path, '*' + PARTIAL_SEGMENT_SUFFIX))
+            if include_partial or _is_orphaned(partial_path)
+        )
+        # The names start with the time the files were started.
+        paths.sort(key=os.path.basename)
+    else:
+        paths = [path]
+
+    for segment_path in paths:
+        try:
+            for line in _segment_lines(segment_path):
+                if line.strip():
+                    yield json.loads(line)
+        except (IOError, zlib.error, ValueError):
+            log.warning('Tracking file %s is corrupt', segment_path)
+
+
+def _segment_lines(segment_path):
+    """
+    Yield the complete lines of the gzip file `segment_path`.
+
+    Unlike GzipFile, this reads the lines of a file that was never finished,
+    up to where it ends.
+    """
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    pending = ''
+    with open(segment_path, 'rb') as segment:
+        while True:
+            data = segment.read(READ_SIZE)
+            if not data:
+                break
+            pending += decompressor.decompress(data)
+            while decompressor.unused_data:
+                # The file has several gzip members
+                data = decompressor.unused_data
+                decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                pending += decompressor.decompress(data)
+            lines = pending.split('\n')
+            pending = lines.pop()
+            for line in lines:
+                yield line
+
+    if pending.strip():
+        # A file that's still being written, or was never finished, ends abruptly.
+        log.warning('Tracking file %s ends with an incomplete event', segment_path)
@@ -0,0 +1,91 @@
+from __future__ import absolute_import
+
+import json
+import os
+import signal
+
+from django.test import TestCase
+
+from track.backends import BaseBackend
+from track.backends.buffered import BufferedBackend
+
+
+class TestBufferedBackend(TestCase):
+    def setUp(self):
+        self.backend = BufferedBackend(
+            backend={'ENGINE': 'track.backends.tests.test_buffered.BatchRecordingBackend'},
+            max_queue_size=10,
+            flush_size=4,
+            flush_interval=0.01,
+        )
+        self.addCleanup(self.backend.close)
+
+    def test_events_are_sent_in_batches(self):
+        for i in xrange(10):
+            self.backend.send({'test': i})
+        self.backend.close()
+
+        batches = self.backend.backend.batches
+        self.assertTrue(all(len(batch) <= 4 for batch in batches))
+        self.assertEqual([event['test'] for batch in batches for event in batch], range(10))
+        self.assertEqual(self.backend.sent_count, 10)
+
+    def test_events_are_dropped_when_queue_is_full(self):
+        # Don't let the background thread drain the queue
+        self.backend._ensure_thread = lambda: None  # pylint: disable=protected-access
+
+        for i in xrange(12):
+            self.backend.send({'test': i})
+        self.assertEqual(self.backend.dropped_count, 2)
+
+        self.backend.flush()
+        self.assertEqual(self.backend.sent_count, 10)
+        self.assertEqual([len(batch) for batch in self.backend.backend.batches], [4, 4, 2])
+
+    def test_errors_are_not_raised(self):
+        self.backend.backend.fail = True
+        self.backend.send({'test': 1})
+        self.backend.close()
+        self.assertEqual(self.backend.sent_count, 0)
+
+    def test_forked_processes_send_their_own_events(self):
+        # An event the parent hasn't sent yet, and a lock another of its threads holds
+        self.backend.queue.put({'test': 1})
+        self.backend._lock.acquire()  # pylint: disable=protected-access
+
+        read_end, write_end = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                # Don't hang if the child deadlocks
+                signal.alarm(10)
+                self.backend.send({'test': 2})
+                self.backend.close()
+                events = [event['test'] for batch in self.backend.backend.batches for event in batch]
+                os.write(write_end, json.dumps(events))
+            finally:
+                os._exit(0)  # pylint: disable=protected-access
+        os.close(write_end)
+        child_events = json.loads(os.read(read_end, 1024) or 'null')
+        os.close(read_end)
+        os.waitpid(pid, 0)
+
+        self.backend._lock.release()  # pylint: disable=protected-access
+        self.backend.close()
+        self.assertEqual(child_events, [2])
+        self.assertEqual([event['test'] for batch in self.backend.backend.batches for event in batch], [1])
+
+
+class BatchRecordingBackend(BaseBackend):
+    def __init__(self, **options):
+        super(BatchRecordingBackend, self).__init__(**options)
+        self.batches = []
+        self.fail = False
+
+    def send(self, event):
+        self.send_many([event])
+
+    def send_many(self, events):
+        if self.fail:
+            raise Exception('Backend failure')
+        self.batches.append(list(events))
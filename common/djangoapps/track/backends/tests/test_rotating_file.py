@@ -0,0 +1,107 @@
+from __future__ import absolute_import
+
+import datetime
+import gzip
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+from django.test import TestCase
+
+from track.backends.rotating_file import RotatingGzipFileBackend, read_events
+
+
+class TestRotatingGzipFileBackend(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_events_are_read_back(self):
+        backend = RotatingGzipFileBackend(directory=self.directory)
+        backend.send({
+            'test': True,
+            'time': datetime.datetime(2012, 05, 01, 07, 27, 01, 200),
+            'date': datetime.date(2012, 05, 07),
+        })
+        backend.send_many([{'test': 1}, {'test': 2}])
+
+        # Nothing can be read until the file is complete
+        self.assertEqual(list(read_events(self.directory)), [])
+
+        backend.close()
+        events = list(read_events(self.directory))
+        self.assertEqual(events, [
+            {'test': True, 'time': '2012-05-01T07:27:01.000200+00:00', 'date': '2012-05-07'},
+            {'test': 1},
+            {'test': 2},
+        ])
+
+    def test_files_are_rotated_by_size(self):
+        backend = RotatingGzipFileBackend(directory=self.directory, max_bytes=1)
+        for i in xrange(3):
+            backend.send({'test': i})
+        backend.close()
+
+        self.assertEqual(len(os.listdir(self.directory)), 3)
+        self.assertEqual([event['test'] for event in read_events(self.directory)], [0, 1, 2])
+
+    def test_files_are_rotated_by_age(self):
+        backend = RotatingGzipFileBackend(directory=self.directory, max_age=0)
+        backend.send({'test': 1})
+        backend.send({'test': 2})
+        backend.close()
+
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+
+    def test_unserializable_events_are_skipped(self):
+        backend = RotatingGzipFileBackend(directory=self.directory)
+        backend.send_many([{'test': object()}, {'test': 1}])
+        backend.close()
+
+        self.assertEqual(list(read_events(self.directory)), [{'test': 1}])
+
+    def test_files_are_finished_when_too_old(self):
+        backend = RotatingGzipFileBackend(directory=self.directory, max_age=0.1)
+        self.addCleanup(backend.close)
+        backend.send({'test': 1})
+
+        deadline = time.time() + 5
+        while not list(read_events(self.directory)) and time.time() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(list(read_events(self.directory)), [{'test': 1}])
+
+    def test_orphaned_files_are_recovered(self):
+        # The id of a process that is gone
+        process = subprocess.Popen(['true'])
+        process.wait()
+        path = os.path.join(self.directory, 'tracking-20130101T000000-{0}-000001.json.gz.part'.format(process.pid))
+        with open(path, 'wb') as raw_file:
+            gzip_file = gzip.GzipFile(mode='wb', fileobj=raw_file)
+            gzip_file.write('{"test": 1}\n{"test": 2}\n{"te')
+            gzip_file.flush()
+
+        # The events are read even before the file is recovered
+        self.assertEqual(list(read_events(self.directory)), [{'test': 1}, {'test': 2}])
+
+        RotatingGzipFileBackend(directory=self.directory)
+        self.assertEqual(os.listdir(self.directory), ['tracking-20130101T000000-{0}-000001.json.gz'.format(process.pid)])
+        self.assertEqual(list(read_events(self.directory)), [{'test': 1}, {'test': 2}])
+
+    def test_forked_processes_write_their_own_files(self):
+        backend = RotatingGzipFileBackend(directory=self.directory)
+        backend.send({'test': 1})
+
+        pid = os.fork()
+        if pid == 0:
+            try:
+                backend.send({'test': 2})
+                backend.close()
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        backend.close()
+
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+        self.assertEqual(sorted(event['test'] for event in read_events(self.directory)), [1, 2])
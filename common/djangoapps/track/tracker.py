@@ -16,6 +16,10 @@ below::
       }
   }
 
+To keep the storage of events out of requests, a backend can be wrapped in a
+`track.backends.buffered.BufferedBackend`, which sends events to it in
+batches from a background thread.
+
 """
 
 import inspect
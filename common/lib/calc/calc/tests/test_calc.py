@@ -558,3 +558,58 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({'r1': 5}, {}, "r1+r2")
         with self.assertRaisesRegexp(calc.UndefinedVariable, 'r1 r3'):
             calc.evaluator(variables, {}, "r1*r3", case_sensitive=True)
+
+
+class CompileExpressionTest(unittest.TestCase):
+    """
+    Run tests for calc.compile_expression, and the evaluation of many samples
+    """
+    def setUp(self):
+        self.samples = [{'x': x, 'y': 2.0 * x} for x in (0.5, 1.0, 2.5, 4.0)]
+
+    def test_compiled_once(self):
+        """
+        Check that the same expression is only parsed once
+        """
+        compiled = calc.compile_expression("x + 1")
+        self.assertIs(compiled, calc.compile_expression("x + 1"))
+        self.assertIsNot(compiled, calc.compile_expression("x + 1", case_sensitive=True))
+        self.assertEqual(compiled.evaluate({'x': 2.0}, {}), 3.0)
+        self.assertEqual(compiled.evaluate({'x': 5.0}, {}), 6.0)
+
+    def test_samples_match_evaluator(self):
+        """
+        Check that evaluating all the samples at once gives the same values
+        """
+        for expression in ["x^2*sin(y)/(x||y) + 3k*pi", "-x + y - 7", "5", "sqrt(x)*e^(-y)", "abs(x-2)"]:
+            results = calc.compile_expression(expression).evaluate_samples(self.samples, {})
+            for sample, result in zip(self.samples, results):
+                self.assertAlmostEqual(result, calc.evaluator(sample, {}, expression))
+
+    def test_samples_with_scalar_functions(self):
+        """
+        Check that functions which can't take arrays of samples still work
+        """
+        functions = {'f': lambda x: x if x > 1 else -x}
+        results = calc.compile_expression("f(x) + fact(3)").evaluate_samples(self.samples, functions)
+        self.assertEqual(results, [5.5, 5.0, 8.5, 10.0])
+
+    def test_samples_raise_errors(self):
+        """
+        Check that a sample which fails raises the error `evaluator` would
+        """
+        with self.assertRaises(ZeroDivisionError):
+            calc.compile_expression("1/(x-1)").evaluate_samples(self.samples, {})
+        with self.assertRaises(ValueError):
+            calc.compile_expression("fact(x)").evaluate_samples(self.samples, {})
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'z'):
+            calc.compile_expression("x+z").evaluate_samples(self.samples, {})
+
+    def test_samples_parallel_resistors_with_zero(self):
+        """
+        Check that a zero in one sample only affects that sample
+        """
+        samples = [{'x': 0.0}, {'x': 2.0}]
+        results = calc.compile_expression("x||2").evaluate_samples(samples, {})
+        self.assertTrue(numpy.isnan(results[0]))
+        self.assertEqual(results[1], 1.0)
@@ -13,10 +13,13 @@ Main module which shows problems (of "capa" type).
 This is used by capa_module.
 '''
 
+from collections import OrderedDict
 from datetime import datetime
+import hashlib
 import logging
 import os.path
 import re
+import threading
 
 from lxml import etree
 from xml.sax.saxutils import unescape
@@ -63,6 +66,13 @@ html_problem_semantics = [
 
 log = logging.getLogger(__name__)
 
+# The parsed XML of the most recently used problems, with their includes
+# resolved and their IDs assigned, none of which depends on the student.
+# Keyed by (problem id, filestore root, md5 of the problem's XML).
+PROBLEM_TREE_CACHE = OrderedDict()
+PROBLEM_TREE_CACHE_MAX_SIZE = 1000
+_problem_tree_cache_lock = threading.Lock()
+
 #-----------------------------------------------------------------------------
 # main class for this module
 
@@ -113,24 +123,17 @@ class LoncapaProblem(object):
         self.done = state.get('done', False)
         self.input_state = state.get('input_state', {})
 
-        # Convert startouttext and endouttext to proper <text></text>
-        problem_text = re.sub(r"startouttext\s*/", "text", problem_text)
-        problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
-        self.problem_text = problem_text
-
-        # parse problem XML file into an element tree
-        self.tree = etree.XML(problem_text)
-
-        # handle any <include file="foo"> tags
-        self._process_includes()
+        # Get our own copy of the problem's parsed XML, which is shared between students
+        self.problem_text, problem_tree = self._get_problem_tree(problem_text)
+        self.tree = deepcopy(problem_tree)
 
         # construct script processor context (eg for customresponse problems)
         self.context = self._extract_context(self.tree)
 
-        # Pre-parse the XML tree: modifies it to add ID's and perform some in-place
-        # transformations.  This also creates the dict (self.responders) of Response
-        # instances for each question in the problem. The dict has keys = xml subtree of
-        # Response, values = Response instance
+        # Pre-parse the XML tree: perform some in-place transformations.  This
+        # creates the dict (self.responders) of Response instances for each question
+        # in the problem. The dict has keys = xml subtree of Response, values =
+        # Response instance
         self._preprocess_problem(self.tree)
 
         if not self.student_answers:  # True when student_answers is an empty dict
@@ -406,6 +409,46 @@ class LoncapaProblem(object):
 
     # ======= Private Methods Below ========
 
+    def _get_problem_tree(self, problem_text):
+        """
+        Returns the problem's XML text, after the conversion of its
+        startouttext and endouttext tags, and its parsed tree, with includes
+        resolved and IDs assigned.
+
+        The tree is shared with every other student of the problem, so it must
+        not be changed.
+        """
+        key = (
+            self.problem_id,
+            getattr(self.system.filestore, 'root_path', None),
+            hashlib.md5(problem_text.encode('utf-8') if isinstance(problem_text, unicode) else problem_text).hexdigest(),
+        )
+        with _problem_tree_cache_lock:
+            cached = PROBLEM_TREE_CACHE.pop(key, None)
+            if cached is not None:
+                PROBLEM_TREE_CACHE[key] = cached
+                return cached
+
+        # Convert startouttext and endouttext to proper <text></text>
+        problem_text = re.sub(r"startouttext\s*/", "text", problem_text)
+        problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
+
+        # parse problem XML file into an element tree
+        self.tree = etree.XML(problem_text)
+
+        # handle any <include file="foo"> tags
+        self._process_includes()
+
+        # add ID's to the responses and their inputs
+        self._assign_ids(self.tree)
+
+        cached = (problem_text, self.tree)
+        with _problem_tree_cache_lock:
+            PROBLEM_TREE_CACHE[key] = cached
+            while len(PROBLEM_TREE_CACHE) > PROBLEM_TREE_CACHE_MAX_SIZE:
+                PROBLEM_TREE_CACHE.popitem(last=False)
+        return cached
+
     def _process_includes(self):
         '''
         Handle any <include file="foo"> tags by reading in the specified file and inserting it
@@ -639,19 +682,13 @@ class LoncapaProblem(object):
 
         return tree
 
-    def _preprocess_problem(self, tree):  # private
+    def _assign_ids(self, tree):  # private
         '''
         Assign IDs to all the responses
         Assign sub-IDs to all entries (textline, schematic, etc.)
-        Annoted correctness and value
         In-place transformation
-
-        Also create capa Response instances for each responsetype and save as self.responders
-
-        Obtain all responder answers and save as self.responder_answers dict (key = response)
         '''
         response_id = 1
-        self.responders = {}
         for response in tree.xpath('//' + "|//".join(response_tag_dict)):
             response_id_str = self.problem_id + "_" + str(response_id)
             # create and save ID for this response
@@ -659,19 +696,39 @@ class LoncapaProblem(object):
             response_id += 1
 
             answer_id = 1
-            input_tags = inputtypes.registry.registered_tags()
-            inputfields = tree.xpath(
-                "|".join(['//' + response.tag + '[@id=$id]//' + x for x in (input_tags + solution_tags)]),
-                id=response_id_str
-            )
-
-            # assign one answer_id for each input type or solution type
-            for entry in inputfields:
+            for entry in self._get_inputfields(tree, response):
+                # assign one answer_id for each input type or solution type
                 entry.attrib['response_id'] = str(response_id)
                 entry.attrib['answer_id'] = str(answer_id)
                 entry.attrib['id'] = "%s_%i_%i" % (self.problem_id, response_id, answer_id)
                 answer_id = answer_id + 1
 
+    def _get_inputfields(self, tree, response):  # private
+        '''
+        Return the input and solution elements of the `response` in `tree`.
+        '''
+        input_tags = inputtypes.registry.registered_tags()
+        return tree.xpath(
+            "|".join(['//' + response.tag + '[@id=$id]//' + x for x in (input_tags + solution_tags)]),
+            id=response.get('id')
+        )
+
+    def _preprocess_problem(self, tree):  # private
+        '''
+        Annoted correctness and value
+        In-place transformation
+
+        Also create capa Response instances for each responsetype and save as self.responders
+
+        Obtain all responder answers and save as self.responder_answers dict (key = response)
+
+        The IDs of the responses and their inputs were assigned by _assign_ids, but
+        solutions are given their own IDs after the responders have seen their sub-IDs.
+        '''
+        self.responders = {}
+        for response in tree.xpath('//' + "|//".join(response_tag_dict)):
+            inputfields = self._get_inputfields(tree, response)
+
             # instantiate capa Response
             responder = response_tag_dict[response.tag](response, inputfields,
                                                         self.context, self.system)
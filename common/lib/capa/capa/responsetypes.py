@@ -31,7 +31,7 @@ from collections import namedtuple
 from shapely.geometry import Point, MultiPoint
 
 # specific library imports
-from calc import evaluator, UndefinedVariable
+from calc import compile_expression, evaluator, UndefinedVariable
 from . import correctmap
 from datetime import datetime
 from pytz import UTC
@@ -1803,47 +1803,42 @@ class FormulaResponse(LoncapaResponse):
         Each dictionary represents a test case for the answer.
         Returns a tuple of formula evaluation results.
         """
-        out = []
-        for var_dict in var_dict_list:
-            try:
-                out.append(evaluator(
-                    var_dict,
-                    dict(),
-                    answer,
-                    case_sensitive=self.case_sensitive,
-                ))
-            except UndefinedVariable as uv:
+        # Parse the answer once, and evaluate it for all the test cases at once.
+        if not var_dict_list or answer.strip() == "":
+            return [float('nan')] * len(var_dict_list)
+        try:
+            return compile_expression(answer, self.case_sensitive).evaluate_samples(var_dict_list, dict())
+        except UndefinedVariable as uv:
+            log.debug(
+                'formularesponse: undefined variable in formula=%s' % answer)
+            raise StudentInputError(
+                "Invalid input: " + uv.message + " not permitted in answer"
+            )
+        except ValueError as ve:
+            if 'factorial' in ve.message:
+                # This is thrown when fact() or factorial() is used in a formularesponse answer
+                #   that tests on negative and/or non-integer inputs
+                # ve.message will be: `factorial() only accepts integral values` or
+                # `factorial() not defined for negative values`
                 log.debug(
-                    'formularesponse: undefined variable in formula=%s' % answer)
+                    ('formularesponse: factorial function used in response '
+                     'that tests negative and/or non-integer inputs. '
+                     'given={0}').format(given)
+                )
                 raise StudentInputError(
-                    "Invalid input: " + uv.message + " not permitted in answer"
+                    ("factorial function not permitted in answer "
+                     "for this problem. Provided answer was: "
+                     "{0}").format(cgi.escape(given))
                 )
-            except ValueError as ve:
-                if 'factorial' in ve.message:
-                    # This is thrown when fact() or factorial() is used in a formularesponse answer
-                    #   that tests on negative and/or non-integer inputs
-                    # ve.message will be: `factorial() only accepts integral values` or
-                    # `factorial() not defined for negative values`
-                    log.debug(
-                        ('formularesponse: factorial function used in response '
-                         'that tests negative and/or non-integer inputs. '
-                         'given={0}').format(given)
-                    )
-                    raise StudentInputError(
-                        ("factorial function not permitted in answer "
-                         "for this problem. Provided answer was: "
-                         "{0}").format(cgi.escape(given))
-                    )
-                # If non-factorial related ValueError thrown, handle it the same as any other Exception
-                log.debug('formularesponse: error {0} in formula'.format(ve))
-                raise StudentInputError("Invalid input: Could not parse '%s' as a formula" %
-                                        cgi.escape(answer))
-            except Exception as err:
-                # traceback.print_exc()
-                log.debug('formularesponse: error %s in formula', err)
-                raise StudentInputError("Invalid input: Could not parse '%s' as a formula" %
-                                        cgi.escape(answer))
-        return out
+            # If non-factorial related ValueError thrown, handle it the same as any other Exception
+            log.debug('formularesponse: error {0} in formula'.format(ve))
+            raise StudentInputError("Invalid input: Could not parse '%s' as a formula" %
+                                    cgi.escape(answer))
+        except Exception as err:
+            # traceback.print_exc()
+            log.debug('formularesponse: error %s in formula', err)
+            raise StudentInputError("Invalid input: Could not parse '%s' as a formula" %
+                                    cgi.escape(answer))
 
     def randomize_variables(self, samples):
         """
@@ -0,0 +1,85 @@
+"""
+A two-tier cache for the results of safe_exec.
+
+Results are kept in a least-recently-used cache in this process, in front of
+a shared cache such as Django's.  Results are kept serialized in this
+process, so that callers can't change the cached copies.
+
+"""
+
+import json
+import threading
+from collections import OrderedDict
+
+
+class SafeExecCache(object):
+    """
+    A cache with the .get(key) and .set(key, value) methods safe_exec expects.
+
+    Up to `max_entries` results, taking up to `max_bytes` bytes serialized
+    along with their keys, are kept in this process, in front of
+    `backing_cache`, which may be None.  Results that serialize to more than
+    `max_result_size` bytes aren't cached at all.
+
+    """
+    def __init__(self, backing_cache=None, max_entries=1000, max_result_size=100000, max_bytes=10 * 1024 * 1024):
+        self.backing_cache = backing_cache
+        self.max_entries = max_entries
+        self.max_result_size = max_result_size
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        # The total size of the keys and serialized results in _entries
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            serialized = self._entries.pop(key, None)
+            if serialized is not None:
+                self._entries[key] = serialized
+        if serialized is not None:
+            return json.loads(serialized)
+
+        if self.backing_cache is None:
+            return None
+        value = self.backing_cache.get(key)
+        if value is not None:
+            self._remember(key, json.dumps(value))
+        return value
+
+    def set(self, key, value, timeout=None):
+        serialized = json.dumps(value)
+        if len(serialized) > self.max_result_size:
+            return
+        self._remember(key, serialized)
+        if self.backing_cache is not None:
+            self.backing_cache.set(key, value, timeout)
+
+    def _remember(self, key, serialized):
+        """
+        Keeps `serialized` in this process, evicting the least recently used entries.
+        """
+        if self.max_entries <= 0 or len(key) + len(serialized) > self.max_bytes:
+            return
+        with self._lock:
+            self._forget(key)
+            self._entries[key] = serialized
+            self._size += len(key) + len(serialized)
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                self._forget(next(iter(self._entries)))
+
+    def _forget(self, key):
+        """
+        Drops the result kept for `key`, if any.  Must be called with self._lock held.
+        """
+        serialized = self._entries.pop(key, None)
+        if serialized is not None:
+            self._size -= len(key) + len(serialized)
+
+    def clear(self):
+        """
+        Forgets the results kept in this process.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
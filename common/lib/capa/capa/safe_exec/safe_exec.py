@@ -4,9 +4,12 @@ from codejail.safe_exec import safe_exec as codejail_safe_exec
 from codejail.safe_exec import not_safe_exec as codejail_not_safe_exec
 from codejail.safe_exec import json_safe, SafeExecException
 from . import lazymod
+from .worker_pool import get_worker_pool
 from dogapi import dog_stats_api
 
 import hashlib
+import json
+import threading
 
 # Establish the Python environment for Capa.
 # Capa assumes float-friendly division always.
@@ -70,6 +73,58 @@ def update_hash(hasher, obj):
         hasher.update(repr(obj))
 
 
+# The digests of the code safe_exec has run, so that a problem's code is only
+# hashed once, however many students it's run for.
+CODE_DIGESTS = {}
+CODE_DIGESTS_MAX_SIZE = 1000
+_code_digests_lock = threading.Lock()
+
+
+def code_digest(code):
+    """
+    Returns the md5 digest of `code`, remembering it for the next time.
+    """
+    digest = CODE_DIGESTS.get(code)
+    if digest is None:
+        md5er = hashlib.md5()
+        md5er.update(repr(code))
+        digest = md5er.hexdigest()
+        with _code_digests_lock:
+            if len(CODE_DIGESTS) >= CODE_DIGESTS_MAX_SIZE:
+                CODE_DIGESTS.clear()
+            CODE_DIGESTS[code] = digest
+    return digest
+
+
+def globals_digest(globals_dict):
+    """
+    Returns the md5 digest of the JSON-safe part of `globals_dict`.
+
+    Serializing the globals in one go, with sorted keys, canonicalizes them
+    much faster than `update_hash` can.
+
+    """
+    try:
+        serialized = json.dumps(globals_dict, sort_keys=True)
+    except (TypeError, ValueError):
+        serialized = json.dumps(json_safe(globals_dict), sort_keys=True)
+    return hashlib.md5(serialized).hexdigest()
+
+
+def safe_exec_cache_key(code, globals_dict, random_seed):
+    """
+    Returns the key under which the result of running `code` with
+    `globals_dict` and `random_seed` is cached.
+
+    The digests aren't those of the `update_hash` keys used before, so results
+    cached by earlier versions aren't found, and the cache starts out cold.
+    """
+    md5er = hashlib.md5()
+    md5er.update(code_digest(code))
+    md5er.update(globals_digest(globals_dict))
+    return "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
+
+
 @dog_stats_api.timed('capa.safe_exec.time')
 def safe_exec(code, globals_dict, random_seed=None, python_path=None, cache=None, slug=None, unsafely=False):
     """
@@ -92,14 +147,13 @@ def safe_exec(code, globals_dict, random_seed=None, python_path=None, cache=None
 
     If `unsafely` is true, then the code will actually be executed without sandboxing.
 
+    If a pool of warm workers is configured, sandboxed code that doesn't need
+    anything added to the Python path is executed in one of its workers.
+
     """
     # Check the cache for a previous result.
     if cache:
-        safe_globals = json_safe(globals_dict)
-        md5er = hashlib.md5()
-        md5er.update(repr(code))
-        update_hash(md5er, safe_globals)
-        key = "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
+        key = safe_exec_cache_key(code, globals_dict, random_seed)
         cached = cache.get(key)
         if cached is not None:
             # We have a cached result.  The result is a pair: the exception
@@ -118,6 +172,9 @@ def safe_exec(code, globals_dict, random_seed=None, python_path=None, cache=None
         exec_fn = codejail_not_safe_exec
     else:
         exec_fn = codejail_safe_exec
+        worker_pool = get_worker_pool() if not python_path else None
+        if worker_pool is not None:
+            exec_fn = worker_pool.safe_exec
 
     # Run the code!  Results are side effects in globals_dict.
     try:
@@ -9,7 +9,8 @@ import unittest
 
 from nose.plugins.skip import SkipTest
 
-from capa.safe_exec import safe_exec, update_hash
+from capa.safe_exec import safe_exec, update_hash, SafeExecCache
+from capa.safe_exec.safe_exec import safe_exec_cache_key
 from codejail.safe_exec import SafeExecException
 from codejail.jail_code import is_configured
 
@@ -177,6 +178,92 @@ class TestSafeExecCaching(unittest.TestCase):
                 self.fail("Tried executing code with non-ASCII unicode: {0}".format(code))
 
 
+class TestSafeExecCacheKey(unittest.TestCase):
+    """Test that the cache keys of safe_exec are canonical."""
+
+    def test_dict_ordering(self):
+        d1 = {k: [1, {'x': k}] for k in "abcdefghijklmnopqrstuvwxyz"}
+        d2 = dict(d1)
+        for i in xrange(10000):
+            d2[i] = 1
+        for i in xrange(10000):
+            del d2[i]
+        self.assertNotEqual(d1.keys(), d2.keys())
+
+        self.assertEqual(safe_exec_cache_key("a = 1", d1, 17), safe_exec_cache_key("a = 1", d2, 17))
+
+    def test_differences(self):
+        key = safe_exec_cache_key("a = 1", {'b': 1}, 17)
+        self.assertNotEqual(key, safe_exec_cache_key("a = 2", {'b': 1}, 17))
+        self.assertNotEqual(key, safe_exec_cache_key("a = 1", {'b': 2}, 17))
+        self.assertNotEqual(key, safe_exec_cache_key("a = 1", {'b': 1}, 18))
+
+    def test_unserializable_globals(self):
+        # Values that can't be passed to the sandbox don't count.
+        key = safe_exec_cache_key("a = 1", {'b': 1}, 17)
+        self.assertEqual(key, safe_exec_cache_key("a = 1", {'b': 1, 'f': object()}, 17))
+
+
+class TestSafeExecTwoTierCache(unittest.TestCase):
+    """Test the SafeExecCache in front of another cache."""
+
+    def test_results_are_kept_in_both_tiers(self):
+        backing = {}
+        cache = SafeExecCache(DictCache(backing))
+        g = {}
+        safe_exec("a = int(math.pi)", g, cache=cache)
+        self.assertEqual(backing.values()[0], (None, {'a': 3}))
+
+        # The result is found in this process, without asking the backing cache.
+        cache.backing_cache = None
+        g = {}
+        safe_exec("a = int(math.pi)", g, cache=cache)
+        self.assertEqual(g['a'], 3)
+
+    def test_backing_cache_fills_this_process(self):
+        cache = SafeExecCache(DictCache({'key': (None, {'a': 17})}))
+        self.assertEqual(list(cache.get('key')), [None, {'a': 17}])
+        cache.backing_cache = None
+        self.assertEqual(list(cache.get('key')), [None, {'a': 17}])
+
+    def test_cached_results_cant_be_changed(self):
+        cache = SafeExecCache()
+        cache.set('key', (None, {'a': [1, 2]}))
+        cache.get('key')[1]['a'].append(3)
+        self.assertEqual(cache.get('key'), [None, {'a': [1, 2]}])
+
+    def test_least_recently_used_are_evicted(self):
+        cache = SafeExecCache(max_entries=2)
+        cache.set('one', 1)
+        cache.set('two', 2)
+        cache.get('one')
+        cache.set('three', 3)
+        self.assertEqual(cache.get('one'), 1)
+        self.assertIsNone(cache.get('two'))
+        self.assertEqual(cache.get('three'), 3)
+
+    def test_total_size_is_bounded(self):
+        cache = SafeExecCache(max_bytes=40)
+        cache.set('one', 'x' * 10)
+        cache.set('two', 'x' * 10)
+        cache.set('three', 'x' * 10)
+        # Each entry takes the length of its key and of the serialized result
+        self.assertIsNone(cache.get('one'))
+        self.assertEqual(cache.get('two'), 'x' * 10)
+        self.assertEqual(cache.get('three'), 'x' * 10)
+
+        cache.set('four', 'x' * 40)
+        self.assertIsNone(cache.get('four'))
+        self.assertEqual(cache.get('three'), 'x' * 10)
+
+    def test_large_results_arent_cached(self):
+        backing = {}
+        cache = SafeExecCache(DictCache(backing), max_result_size=100)
+        cache.set('key', (None, {'a': 'x' * 100}))
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual(backing, {})
+
+
 class TestUpdateHash(unittest.TestCase):
     """Test the safe_exec.update_hash function to be sure it canonicalizes properly."""
 
@@ -0,0 +1,107 @@
+"""Test worker_pool.py"""
+
+import shutil
+import sys
+import unittest
+
+from mock import patch
+
+from capa.safe_exec.worker_pool import WorkerPool, configure_worker_pool, get_worker_pool
+from codejail import jail_code
+from codejail.safe_exec import SafeExecException
+
+
+class TestWorkerPool(unittest.TestCase):
+    def setUp(self):
+        # An unsandboxed Python is enough to test the workings of the pool.
+        self.pool = WorkerPool(
+            [sys.executable, "-E", "-B"], preload=["math"], limits={"CPU": 1},
+            size=1, max_executions=3, timeout=2,
+        )
+        self.addCleanup(self.pool.stop)
+
+    def test_set_values(self):
+        g = {'a': 17}
+        self.pool.safe_exec("b = a + 1", g)
+        self.assertEqual(g, {'a': 17, 'b': 18})
+
+    def test_raising_exceptions(self):
+        with self.assertRaises(SafeExecException) as cm:
+            self.pool.safe_exec("1/0", {})
+        self.assertIn("ZeroDivisionError", cm.exception.message)
+
+    def test_executions_are_isolated(self):
+        g = {}
+        self.pool.safe_exec("import math; math.pi = 3", g)
+        self.pool.safe_exec("import math; a = math.pi", g)
+        self.assertNotEqual(g['a'], 3)
+
+    def test_executions_get_fresh_directories(self):
+        g = {}
+        self.pool.safe_exec(
+            "import os, tempfile; open('marker', 'w').close(); cwd = os.getcwd(); tmp = tempfile.gettempdir()", g
+        )
+        first_cwd = g['cwd']
+        self.assertEqual(g['tmp'], first_cwd)
+        self.pool.safe_exec(
+            "import os; cwd = os.getcwd(); marker = os.path.exists('marker'); old = os.path.exists(%r)" % first_cwd, g
+        )
+        self.assertNotEqual(g['cwd'], first_cwd)
+        self.assertFalse(g['marker'])
+        self.assertFalse(g['old'])
+
+    def test_output_is_ignored(self):
+        g = {}
+        self.pool.safe_exec("import sys; print 'hello'; sys.stdout.write('\\n'); a = 1", g)
+        self.assertEqual(g['a'], 1)
+
+    def test_workers_are_reused_then_recycled(self):
+        pids = set()
+        for _ in xrange(3):
+            g = {}
+            self.pool.safe_exec("import os; pid = os.getppid()", g)
+            pids.add(g['pid'])
+        self.assertEqual(len(pids), 1)
+
+        # The worker has been used enough, so another one takes over.
+        g = {}
+        self.pool.safe_exec("import os; pid = os.getppid()", g)
+        self.assertNotIn(g['pid'], pids)
+
+    def test_timeout(self):
+        with self.assertRaises(SafeExecException) as cm:
+            self.pool.safe_exec("import time; time.sleep(10)", {})
+        self.assertIn("Timed out", cm.exception.message)
+
+        # The worker survives the execution.
+        g = {}
+        self.pool.safe_exec("a = 1", g)
+        self.assertEqual(g['a'], 1)
+
+    def test_cpu_limit(self):
+        with self.assertRaises(SafeExecException):
+            self.pool.safe_exec("while True: pass", {})
+
+    def test_python_path_is_refused(self):
+        with self.assertRaises(ValueError):
+            self.pool.safe_exec("a = 1", {}, python_path=["/tmp"])
+
+
+class TestWorkerCommand(unittest.TestCase):
+    def setUp(self):
+        patcher = patch.dict(jail_code.COMMANDS, {
+            "python": {"cmdline_start": ["/sandbox/bin/python", "-E", "-B"], "user": "sandbox"},
+        })
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        configure_worker_pool(size=1)
+        self.addCleanup(configure_worker_pool)
+
+    @patch("capa.safe_exec.worker_pool.subprocess.Popen")
+    def test_worker_runs_as_the_sandbox_user(self, popen):
+        worker = get_worker_pool()._start_worker()
+        self.addCleanup(shutil.rmtree, worker.tmpdir, True)
+        cmdline = popen.call_args[0][0]
+        self.assertEqual(cmdline[:6], ["sudo", "-u", "sandbox", "/sandbox/bin/python", "-E", "-B"])
+        self.assertEqual(worker.cmdline, cmdline)
+        self.assertIsNotNone(popen.call_args[1]["preexec_fn"])
@@ -0,0 +1,383 @@
+"""
+A pool of warm sandbox workers for capa's safe_exec.
+
+Running code with codejail starts a new sandboxed Python for every execution,
+which then has to import numpy and friends before it can run the problem's
+code.  A worker in this pool is a sandboxed Python, started the same way
+codejail starts one, that imports the modules capa code assumes once, and
+then forks a fresh child for each execution.  The child runs the code with
+codejail's resource limits, in a fresh temporary directory of its own, and
+exits, so no state is shared between executions, while the cost of starting Python and importing numpy is only
+paid once per worker.  Workers are recycled after a number of executions,
+and whenever one doesn't respond in time.
+
+"""
+
+import json
+import logging
+import os
+import os.path
+import resource
+import select
+import shutil
+import subprocess
+import tempfile
+import threading
+
+from codejail import jail_code
+from codejail.safe_exec import json_safe, SafeExecException
+
+log = logging.getLogger(__name__)
+
+# The program run by each worker, in the sandboxed Python.  It reads requests,
+# a JSON list of [code, globals] per line, from stdin, and writes responses, a
+# JSON dict per line, with either the resulting "globals" or an "error", to
+# stdout.  Each execution runs in a new directory made by the worker, as the
+# sandbox user, in the world-writable `tmp_root`.
+WORKER_CODE = r"""
+import json, os, resource, select, shutil, signal, sys, tempfile, time, traceback
+
+preload, limits, timeout, tmp_root = json.loads(sys.argv[1])
+for modname in preload:
+    try:
+        __import__(modname)
+    except Exception:
+        pass
+
+# Code run by the same user can't attach to the worker, or open its pipes
+# through /proc.
+try:
+    import ctypes
+    PR_SET_DUMPABLE = 4
+    ctypes.CDLL(None).prctl(PR_SET_DUMPABLE, 0, 0, 0, 0)
+except Exception:
+    pass
+
+requests = sys.stdin
+responses = sys.stdout
+devnull = os.open(os.devnull, os.O_RDWR)
+
+def jsonable(value):
+    try:
+        json.dumps(value)
+    except Exception:
+        return False
+    return True
+
+def run(code, g_dict, result_fd, exec_dir):
+    os.setpgid(0, 0)
+    # The code can't see or write to the requests and responses.
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+    os.chdir(exec_dir)
+    os.environ["TMPDIR"] = tempfile.tempdir = exec_dir
+    # The limits codejail puts on each execution.
+    nproc = limits.get("NPROC", 0)
+    resource.setrlimit(resource.RLIMIT_NPROC, (nproc, nproc))
+    if limits.get("CPU"):
+        resource.setrlimit(resource.RLIMIT_CPU, (limits["CPU"], limits["CPU"]))
+    if limits.get("VMEM"):
+        resource.setrlimit(resource.RLIMIT_AS, (limits["VMEM"], limits["VMEM"]))
+    fsize = limits.get("FSIZE", 0)
+    resource.setrlimit(resource.RLIMIT_FSIZE, (fsize, fsize))
+    try:
+        exec code in g_dict
+        result = {"globals": dict(
+            (name, value) for name, value in g_dict.iteritems()
+            if name != "__builtins__" and jsonable(value)
+        )}
+    except BaseException:
+        result = {"error": traceback.format_exc()}
+    result_file = os.fdopen(result_fd, "w")
+    result_file.write(json.dumps(result))
+    result_file.close()
+
+while True:
+    request = requests.readline()
+    if not request:
+        break
+    code, g_dict = json.loads(request)
+    exec_dir = tempfile.mkdtemp(dir=tmp_root)
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.close(read_fd)
+            run(code, g_dict, write_fd, exec_dir)
+        finally:
+            os._exit(0)
+    try:
+        os.setpgid(pid, pid)
+    except OSError:
+        pass
+    os.close(write_fd)
+
+    chunks = []
+    timed_out = False
+    deadline = time.time() + timeout
+    while True:
+        remaining = deadline - time.time()
+        if remaining <= 0 or not select.select([read_fd], [], [], remaining)[0]:
+            timed_out = True
+            break
+        chunk = os.read(read_fd, 65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    os.close(read_fd)
+
+    # Don't leave anything the code started behind.
+    for kill in (os.killpg, os.kill):
+        try:
+            kill(pid, signal.SIGKILL)
+        except OSError:
+            pass
+    _, status = os.waitpid(pid, 0)
+    shutil.rmtree(exec_dir, ignore_errors=True)
+
+    if timed_out:
+        response = json.dumps({"error": "Timed out after %s seconds" % timeout})
+    elif not chunks:
+        response = json.dumps({"error": "Exited without a result, status %d" % status})
+    else:
+        response = "".join(chunks)
+    responses.write(response + "\n")
+    responses.flush()
+"""
+
+# How much longer than its timeout we wait for a worker before giving up on it.
+RESPONSE_GRACE_SECONDS = 5
+
+
+class WorkerDied(Exception):
+    """
+    Raised when a worker can't be used anymore.
+    """
+    pass
+
+
+def sandbox_cmdline(cmdline, user=None):
+    """
+    Returns the command line that runs `cmdline` as the sandbox `user`, as
+    `jail_code.jail_code` does.
+    """
+    if user:
+        return ["sudo", "-u", user] + list(cmdline)
+    return list(cmdline)
+
+
+def set_worker_limits(limits):
+    """
+    Puts the codejail resource `limits` that a worker can live with on the
+    current process: the size of written files and virtual memory.  The
+    limits on CPU time and processes are put on each execution instead, as
+    the worker lives for many executions, and forks one for each.
+    """
+    fsize = limits.get("FSIZE", 0)
+    resource.setrlimit(resource.RLIMIT_FSIZE, (fsize, fsize))
+    if limits.get("VMEM"):
+        resource.setrlimit(resource.RLIMIT_AS, (limits["VMEM"], limits["VMEM"]))
+
+
+class SandboxWorker(object):
+    """
+    One warm sandboxed Python, started with `cmdline` as the sandbox `user`.
+
+    Each execution runs in a child of the worker, with the codejail resource
+    `limits`, and is killed if it takes more than `timeout` seconds.
+
+    """
+    def __init__(self, cmdline, user, preload, limits, timeout):
+        self.user = user
+        self.timeout = timeout
+        self.executions = 0
+        self.tmpdir = tempfile.mkdtemp(prefix="codejail-")
+        os.chmod(self.tmpdir, 0755)
+        # The sandbox user makes the directory of each execution in here.
+        self.tmp_root = os.path.join(self.tmpdir, "tmp")
+        os.mkdir(self.tmp_root)
+        os.chmod(self.tmp_root, 01777)
+        self.cmdline = sandbox_cmdline(cmdline, user) + [
+            "-c", WORKER_CODE, json.dumps([preload, limits, timeout, self.tmp_root]),
+        ]
+        with open(os.devnull, "w") as devnull:
+            self.process = subprocess.Popen(
+                self.cmdline, cwd=self.tmpdir, env={},
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=devnull,
+                preexec_fn=lambda: set_worker_limits(limits),
+            )
+
+    @property
+    def alive(self):
+        return self.process.poll() is None
+
+    def execute(self, code, globals_dict):
+        """
+        Runs `code` with the JSON-safe `globals_dict`, and returns the response
+        of the worker.  Raises WorkerDied if the worker doesn't respond.
+        """
+        self.executions += 1
+        try:
+            self.process.stdin.write(json.dumps([code, globals_dict]) + "\n")
+            self.process.stdin.flush()
+        except (IOError, OSError) as err:
+            raise WorkerDied("Couldn't send code to the worker: {0}".format(err))
+
+        ready = select.select([self.process.stdout], [], [], self.timeout + RESPONSE_GRACE_SECONDS)[0]
+        response = self.process.stdout.readline() if ready else None
+        if not response:
+            raise WorkerDied("The worker didn't respond")
+        return json.loads(response)
+
+    def stop(self):
+        """
+        Stops the worker, and cleans up after it.
+        """
+        if self.alive:
+            try:
+                self.process.stdin.close()
+                self.process.terminate()
+            except (IOError, OSError):
+                pass
+        if self.user:
+            # Anything left by an execution belongs to the sandbox user.
+            with open(os.devnull, "w") as devnull:
+                subprocess.call(
+                    sandbox_cmdline([
+                        "/usr/bin/find", self.tmp_root, "-mindepth", "1", "-maxdepth", "1",
+                        "-exec", "rm", "-rf", "{}", ";",
+                    ], self.user),
+                    cwd=self.tmpdir, stdout=devnull, stderr=devnull,
+                )
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+
+class WorkerPool(object):
+    """
+    Keeps up to `size` warm workers, each of which is used for at most
+    `max_executions` executions.
+
+    `cmdline` is the command that starts a sandboxed Python, run as the
+    sandbox `user` if one is given, `preload` the modules each worker imports
+    before it's used, and `limits` the codejail resource limits of each
+    execution, which is killed after `timeout` seconds.
+
+    """
+    def __init__(self, cmdline, user=None, preload=(), limits=None, size=2, max_executions=100, timeout=5):
+        self.cmdline = list(cmdline)
+        self.user = user
+        self.preload = list(preload)
+        self.limits = dict(limits or {})
+        self.size = size
+        self.max_executions = max_executions
+        self.timeout = timeout
+        self._idle = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _start_worker(self):
+        return SandboxWorker(self.cmdline, self.user, self.preload, self.limits, self.timeout)
+
+    def _acquire(self):
+        """
+        Returns a worker to run code in.
+        """
+        with self._lock:
+            if os.getpid() != self._pid:
+                # We've been forked, the idle workers belong to our parent.
+                self._idle = []
+                self._pid = os.getpid()
+
+            while self._idle:
+                worker = self._idle.pop(0)
+                if worker.alive:
+                    return worker
+                worker.stop()
+
+        return self._start_worker()
+
+    def _release(self, worker):
+        """
+        Puts `worker` back in the pool, or replaces it if it's been used enough.
+        """
+        with self._lock:
+            if os.getpid() != self._pid or len(self._idle) >= self.size:
+                worker.stop()
+                return
+            if not worker.alive or worker.executions >= self.max_executions:
+                worker.stop()
+                # Workers import their modules in the background, so starting
+                # the replacement now means it's warm by the time it's needed.
+                worker = self._start_worker()
+            self._idle.append(worker)
+
+    def safe_exec(self, code, globals_dict, python_path=None, slug=None):
+        """
+        Executes `code` in a warm worker, with the same interface as
+        `codejail.safe_exec.safe_exec`.
+        """
+        if python_path:
+            raise ValueError("The worker pool can't add to the Python path of the sandbox")
+
+        worker = self._acquire()
+        if slug:
+            log.debug("Executing jailed code %s in worker %d", slug, worker.process.pid)
+        try:
+            response = worker.execute(code, json_safe(globals_dict))
+        except WorkerDied as err:
+            log.warning("Sandbox worker %d died running %s: %s", worker.process.pid, slug, err)
+            worker.stop()
+            raise SafeExecException("Couldn't execute jailed code: {0}".format(err))
+        self._release(worker)
+
+        if "error" in response:
+            raise SafeExecException("Couldn't execute jailed code: {0}".format(response["error"]))
+        globals_dict.update(response["globals"])
+
+    def stop(self):
+        """
+        Stops all the idle workers.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.stop()
+
+
+_POOL_SETTINGS = {}
+_POOL = None
+
+
+def configure_worker_pool(size=0, max_executions=100, timeout=5):
+    """
+    Configures the pool of warm workers used to run sandboxed code.  A `size`
+    of 0 disables the pool.
+    """
+    global _POOL
+    if _POOL is not None:
+        _POOL.stop()
+        _POOL = None
+    _POOL_SETTINGS.update(size=size, max_executions=max_executions, timeout=timeout)
+
+
+def get_worker_pool():
+    """
+    Returns the pool of warm workers, or None if the pool isn't configured, or
+    codejail isn't configured to run Python in a sandbox.
+    """
+    global _POOL
+    if not _POOL_SETTINGS.get("size") or not jail_code.is_configured("python"):
+        return None
+
+    if _POOL is None:
+        # Imported here, as safe_exec uses this module.
+        from .safe_exec import ASSUMED_IMPORTS
+        command = jail_code.COMMANDS["python"]
+        _POOL = WorkerPool(
+            command["cmdline_start"],
+            user=command.get("user"),
+            preload=[modname for _, modname in ASSUMED_IMPORTS],
+            limits=jail_code.LIMITS,
+            **_POOL_SETTINGS
+        )
+    return _POOL
@@ -0,0 +1,71 @@
+"""
+Tests of the construction of LoncapaProblems
+"""
+import textwrap
+import unittest
+
+from capa import capa_problem
+from .response_xml_factory import CustomResponseXMLFactory
+from . import test_system, new_loncapa_problem
+
+
+class ProblemTreeCacheTest(unittest.TestCase):
+    """
+    The parsed XML of a problem is shared between the students of the problem.
+    """
+
+    def setUp(self):
+        super(ProblemTreeCacheTest, self).setUp()
+        self.system = test_system()
+        capa_problem.PROBLEM_TREE_CACHE.clear()
+        self.addCleanup(capa_problem.PROBLEM_TREE_CACHE.clear)
+
+    def test_tree_is_parsed_once(self):
+        xml_str = CustomResponseXMLFactory().build_xml(
+            script="x = random.randint(0, 1000)",
+            cfn="check_func",
+            expect="$x",
+            num_inputs=2,
+        )
+        problem1 = capa_problem.LoncapaProblem(xml_str, id='1', seed=1, system=self.system)
+        problem2 = capa_problem.LoncapaProblem(xml_str, id='1', seed=2, system=self.system)
+        self.assertEqual(len(capa_problem.PROBLEM_TREE_CACHE), 1)
+
+        # Each student gets their own copy of the tree, with the same IDs
+        self.assertIsNot(problem1.tree, problem2.tree)
+        self.assertEqual(
+            sorted(responder.answer_ids for responder in problem1.responders.values()),
+            sorted(responder.answer_ids for responder in problem2.responders.values()),
+        )
+        self.assertEqual(
+            [entry.get('id') for entry in problem1.tree.iter('textline')],
+            ['1_2_1', '1_2_2'],
+        )
+        self.assertEqual(
+            [entry.get('id') for entry in problem2.tree.iter('textline')],
+            ['1_2_1', '1_2_2'],
+        )
+
+        # ...and their own script context
+        self.assertEqual(problem1.context['x'], capa_problem.LoncapaProblem(
+            xml_str, id='1', seed=1, system=self.system
+        ).context['x'])
+
+    def test_problems_are_told_apart(self):
+        xml_str = textwrap.dedent("""
+            <problem>
+            <startouttext/>Test text<endouttext/>
+            </problem>
+        """)
+        new_loncapa_problem(xml_str)
+        capa_problem.LoncapaProblem(xml_str, id='2', seed=1, system=self.system)
+        new_loncapa_problem(xml_str.replace("Test", "Other"))
+        self.assertEqual(len(capa_problem.PROBLEM_TREE_CACHE), 3)
+
+    def test_changes_dont_leak_between_students(self):
+        xml_str = "<problem><p>Hello</p></problem>"
+        problem1 = new_loncapa_problem(xml_str)
+        problem1.tree.find('p').text = "Changed"
+
+        problem2 = new_loncapa_problem(xml_str)
+        self.assertEqual(problem2.tree.find('p').text, "Hello")
@@ -743,6 +743,71 @@ class CourseDescriptor(CourseFields, SequenceDescriptor):
 
         return announcement, start, now
 
+    def compile_grading_plan(self):
+        """
+        Walks the descriptor tree once and returns the grading plan of this course:
+        a flat, index-based structure that only refers to descriptors by location,
+        so that it can be cached and shared between processes.
+
+        The grading plan is a dictionary with two keys:
+        locations - The urls of all of the descriptors that can affect grading
+            a student, in the order of the grading_context's all_descriptors.
+
+        graded_sections - A list with an entry per graded section, in course
+            order. Each entry is a dictionary containing
+                "format" : The section format ('' if none is set)
+                "section" : The index in locations of the section
+                "scorable" : The indices in locations of the descriptors in
+                    the section that have scores
+
+        The descriptors visited are kept, so that the grading_context of this
+        instance doesn't need to load them again.
+        """
+        locations = []
+        graded_sections = []
+        descriptors = {}
+
+        for chapter in self.get_children():
+            for section in chapter.get_children():
+                if not section.graded:
+                    continue
+
+                # The descendants of the section in depth-first order,
+                # followed by the section itself
+                section_descriptors = []
+                stack = list(reversed(section.get_children()))
+                while stack:
+                    descriptor = stack.pop()
+                    section_descriptors.append(descriptor)
+                    stack.extend(reversed(descriptor.get_children()))
+                section_descriptors.append(section)
+
+                scorable = []
+                for descriptor in section_descriptors:
+                    url = descriptor.location.url()
+                    descriptors[url] = descriptor
+                    if descriptor.has_score:
+                        scorable.append(len(locations))
+                    locations.append(url)
+
+                graded_sections.append({
+                    'format': section.format if section.format is not None else '',
+                    'section': len(locations) - 1,
+                    'scorable': scorable,
+                })
+
+        self._grading_plan_descriptors = descriptors  # pylint: disable=attribute-defined-outside-init
+        return {'locations': locations, 'graded_sections': graded_sections}
+
+    @lazy
+    def grading_plan(self):
+        """
+        The compiled grading plan of this course (see compile_grading_plan).
+        Callers that keep the plan in a cache may assign a cached plan here
+        before grading_context is first accessed.
+        """
+        return self.compile_grading_plan()
+
     @lazy
     def grading_context(self):
         """
@@ -766,36 +831,58 @@ class CourseDescriptor(CourseFields, SequenceDescriptor):
             all the xmodule state for a FieldDataCache without walking
             the descriptor tree again.
 
-
+        The grading context is built from the grading_plan.
         """
+        plan = self.grading_plan
+        descriptors = getattr(self, '_grading_plan_descriptors', None)
+        if descriptors is None:
+            # The plan was compiled by another instance
+            descriptors = self._load_graded_descriptors(plan)
 
         all_descriptors = []
-        graded_sections = {}
-
-        def yield_descriptor_descendents(module_descriptor):
-            for child in module_descriptor.get_children():
-                yield child
-                for module_descriptor in yield_descriptor_descendents(child):
-                    yield module_descriptor
-
-        for c in self.get_children():
-            for s in c.get_children():
-                if s.graded:
-                    xmoduledescriptors = list(yield_descriptor_descendents(s))
-                    xmoduledescriptors.append(s)
+        for url in plan['locations']:
+            descriptor = descriptors.get(url)
+            if descriptor is None:
+                descriptor = self.runtime.get_block(url)
+            all_descriptors.append(descriptor)
 
-                    # The xmoduledescriptors included here are only the ones that have scores.
-                    section_description = {'section_descriptor': s, 'xmoduledescriptors': filter(lambda child: child.has_score, xmoduledescriptors)}
-
-                    section_format = s.format if s.format is not None else ''
-                    graded_sections[section_format] = graded_sections.get(section_format, []) + [section_description]
-
-                    all_descriptors.extend(xmoduledescriptors)
-                    all_descriptors.append(s)
+        graded_sections = {}
+        for section in plan['graded_sections']:
+            graded_sections.setdefault(section['format'], []).append({
+                'section_descriptor': all_descriptors[section['section']],
+                'xmoduledescriptors': [all_descriptors[index] for index in section['scorable']],
+            })
 
         return {'graded_sections': graded_sections,
                 'all_descriptors': all_descriptors, }
 
+    def _load_graded_descriptors(self, plan):
+        """
+        Returns a dictionary from url to descriptor of the descriptors of the
+        graded sections of `plan`.
+
+        When the runtime has a modulestore, the course is loaded once along
+        with all of its descendants, and the sections are taken from that tree
+        rather than loading the descriptors one by one.
+        """
+        modulestore = getattr(self.runtime, 'modulestore', None)
+        if modulestore is not None:
+            course = modulestore.get_item(self.location, depth=None)
+        else:
+            course = self
+
+        section_urls = set(plan['locations'][section['section']] for section in plan['graded_sections'])
+        descriptors = {}
+        stack = [(course, False)]
+        while stack:
+            descriptor, in_section = stack.pop()
+            url = descriptor.location.url()
+            in_section = in_section or url in section_urls
+            if in_section:
+                descriptors[url] = descriptor
+            stack.extend((child, in_section) for child in descriptor.get_children())
+        return descriptors
+
     @staticmethod
     def make_id(org, course, url_name):
         return '/'.join([org, course, url_name])
@@ -5,8 +5,12 @@ that are stored in a database an accessible using their Location as an identifie
 
 import logging
 import re
+import threading
+
+from uuid import uuid4
 
 from collections import namedtuple
+from contextlib import contextmanager
 
 from .exceptions import InvalidLocationError, InsufficientSpecificationError
 from xmodule.errortracker import make_error_tracker
@@ -393,6 +397,14 @@ class ModuleStore(object):
         raise NotImplementedError
 
 
+class _BatchCache(object):
+    """
+    Stands in for the request cache in a ModuleStoreBase.read_batch
+    """
+    def __init__(self):
+        self.data = {}
+
+
 class ModuleStoreBase(ModuleStore):
     '''
     Implement interface functionality that can be shared.
@@ -402,7 +414,7 @@ class ModuleStoreBase(ModuleStore):
         self,
         doc_store_config=None,  # ignore if passed up
         metadata_inheritance_cache_subsystem=None, request_cache=None,
-        modulestore_update_signal=None, xblock_mixins=(),
+        modulestore_update_signal=None, xblock_mixins=(), request_cache_is_active=None,
         # temporary parms to enable backward compatibility. remove once all envs migrated
         db=None, collection=None, host=None, port=None, tz_aware=True, user=None, password=None
     ):
@@ -413,7 +425,41 @@ class ModuleStoreBase(ModuleStore):
         self.metadata_inheritance_cache_subsystem = metadata_inheritance_cache_subsystem
         self.modulestore_update_signal = modulestore_update_signal
         self.request_cache = request_cache
+        # a function telling whether a request is being handled, when the request cache is
+        # only cleared at the end of requests
+        self.request_cache_is_active = request_cache_is_active
         self.xblock_mixins = xblock_mixins
+        # the cache of the read_batch of each thread
+        self._batch = threading.local()
+
+    def _get_active_request_cache(self):
+        """
+        Returns the request cache while a request is being handled, or else the cache of the
+        current read_batch, or None.  Outside of requests and batches, e.g. in celery tasks and
+        management commands, nothing would ever clear what was kept in the request cache.
+        """
+        if self.request_cache is not None and (
+            self.request_cache_is_active is None or self.request_cache_is_active()
+        ):
+            return self.request_cache
+        return getattr(self._batch, 'cache', None)
+
+    @contextmanager
+    def read_batch(self):
+        """
+        Keeps what is otherwise kept for the length of a request, such as the modules of
+        a course loaded with depth=None, for the reads made in the block, outside of
+        requests as well.  As in requests, writes drop what they change.
+        """
+        if self._get_active_request_cache() is not None:
+            yield
+            return
+
+        self._batch.cache = _BatchCache()
+        try:
+            yield
+        finally:
+            self._batch.cache = None
 
     def _get_errorlog(self, location):
         """
@@ -456,3 +502,36 @@ class ModuleStoreBase(ModuleStore):
             if c.id == course_id:
                 return c
         return None
+
+
+def course_content_version_key(org, course):
+    """
+    Returns the cache key of the content version of a course. Only the org and
+    course are used, as for the metadata inheritance tree, since modulestore
+    update signals don't identify the run.
+    """
+    return u"course_content_version/{0}/{1}".format(org, course)
+
+
+def get_course_content_version(cache, org, course):
+    """
+    Returns an opaque token, kept in `cache`, that changes whenever the content
+    of the course is changed in the modulestore. Data derived from the course
+    content can be cached under keys that include this token, rather than having
+    to be invalidated explicitly.
+    """
+    key = course_content_version_key(org, course)
+    version = cache.get(key)
+    if version is None:
+        # Never stored, or evicted: start a new version, so that nothing
+        # cached under an earlier version can be picked up again.
+        cache.add(key, uuid4().hex)
+        version = cache.get(key)
+    return version
+
+
+def set_new_course_content_version(cache, org, course):
+    """
+    Gives the course a new content version in `cache`.
+    """
+    cache.set(course_content_version_key(org, course), uuid4().hex)
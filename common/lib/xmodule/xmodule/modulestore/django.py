@@ -12,8 +12,11 @@ import re
 from django.conf import settings
 from django.core.cache import get_cache, InvalidCacheBackendError
 from django.dispatch import Signal
+from xmodule.modulestore import (
+    course_content_version_key, get_course_content_version, set_new_course_content_version
+)
 from xmodule.modulestore.loc_mapper_store import LocMapperStore
-from xmodule.util.django import get_current_request_hostname
+from xmodule.util.django import get_current_request, get_current_request_hostname
 
 # We may not always have the request_cache module available
 try:
@@ -38,6 +41,61 @@ def load_function(path):
     return getattr(import_module(module_path), name)
 
 
+def get_metadata_inheritance_cache():
+    """
+    Returns the cache used for the metadata inheritance trees of courses, and
+    for other data that is derived from course content.
+    """
+    try:
+        return get_cache('mongo_metadata_inheritance')
+    except InvalidCacheBackendError:
+        return get_cache('default')
+
+
+def course_content_version(course_id):
+    """
+    Returns the content version of the course `course_id`: see
+    xmodule.modulestore.get_course_content_version.
+    """
+    org, course = course_id.split('/')[:2]
+    return get_course_content_version(get_metadata_inheritance_cache(), org, course)
+
+
+def course_content_versions(course_ids):
+    """
+    Returns a dictionary from each of `course_ids` to its content version, with
+    one cache lookup for all of the courses that have one.
+    """
+    cache = get_metadata_inheritance_cache()
+    keys = {}
+    for course_id in course_ids:
+        org, course = course_id.split('/')[:2]
+        keys[course_id] = course_content_version_key(org, course)
+
+    cached = cache.get_many(set(keys.values()))
+    versions = {}
+    for course_id, key in keys.iteritems():
+        versions[course_id] = cached.get(key)
+        if versions[course_id] is None:
+            versions[course_id] = course_content_version(course_id)
+    return versions
+
+
+def bump_course_content_version(sender, course_id, **kwargs):  # pylint: disable=unused-argument
+    """
+    Receiver of modulestore update signals, which gives the updated course a new content version.
+    """
+    org, course = course_id.split('/')[:2]
+    set_new_course_content_version(get_metadata_inheritance_cache(), org, course)
+
+
+def _request_is_active():
+    """
+    Returns whether a request is being handled, and so whether the request cache will be cleared.
+    """
+    return get_current_request() is not None
+
+
 def create_modulestore_instance(engine, doc_store_config, options):
     """
     This will return a new instance of a modulestore given an engine and options
@@ -56,15 +114,14 @@ def create_modulestore_instance(engine, doc_store_config, options):
     else:
         request_cache = None
 
-    try:
-        metadata_inheritance_cache = get_cache('mongo_metadata_inheritance')
-    except InvalidCacheBackendError:
-        metadata_inheritance_cache = get_cache('default')
+    modulestore_update_signal = Signal(providing_args=['modulestore', 'course_id', 'location'])
+    modulestore_update_signal.connect(bump_course_content_version)
 
     return class_(
-        metadata_inheritance_cache_subsystem=metadata_inheritance_cache,
+        metadata_inheritance_cache_subsystem=get_metadata_inheritance_cache(),
         request_cache=request_cache,
-        modulestore_update_signal=Signal(providing_args=['modulestore', 'course_id', 'location']),
+        request_cache_is_active=_request_is_active,
+        modulestore_update_signal=modulestore_update_signal,
         xblock_mixins=getattr(settings, 'XBLOCK_MIXINS', ()),
         doc_store_config=doc_store_config,
         **_options
@@ -6,6 +6,8 @@ In this way, courses can be served up both - say - XMLModuleStore or MongoModule
 IMPORTANT: This modulestore only supports READONLY applications, e.g. LMS
 """
 
+from contextlib import contextmanager, nested
+
 from . import ModuleStoreBase
 from xmodule.modulestore.django import create_modulestore_instance
 import logging
@@ -45,6 +47,14 @@ class MixedModuleStore(ModuleStoreBase):
         mapping = self.mappings.get(course_id, 'default')
         return self.modulestores[mapping]
 
+    @contextmanager
+    def read_batch(self):
+        """
+        Makes the reads from all of the modulestores in the block a batch
+        """
+        with nested(*[store.read_batch() for store in self.modulestores.values()]):
+            yield
+
     def has_item(self, course_id, location):
         return self._get_modulestore_for_courseid(course_id).has_item(course_id, location)
 
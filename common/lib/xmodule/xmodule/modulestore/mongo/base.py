@@ -16,8 +16,11 @@ import pymongo
 import sys
 import logging
 import copy
+import threading
+import time
 
 from bson.son import SON
+from collections import OrderedDict
 from fs.osfs import OSFS
 from itertools import repeat
 from path import path
@@ -31,7 +34,7 @@ from xblock.runtime import DbModel
 from xblock.exceptions import InvalidScopeError
 from xblock.fields import Scope, ScopeIds
 
-from xmodule.modulestore import ModuleStoreBase, Location, MONGO_MODULESTORE_TYPE
+from xmodule.modulestore import ModuleStoreBase, Location, MONGO_MODULESTORE_TYPE, get_course_content_version
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.modulestore.inheritance import own_metadata, InheritanceMixin, inherit_metadata, InheritanceKeyValueStore
 import re
@@ -124,6 +127,78 @@ class MongoKeyValueStore(InheritanceKeyValueStore):
             return False
 
 
+class DescriptorCache(object):
+    """
+    A size-bounded, least recently used cache of descriptors, keyed by location url
+    and course content version, which keeps count of its hits, misses and evictions.
+
+    Each descriptor is kept with the depth of descendents that were loaded with it (see
+    MongoModuleStore.get_item), and is only returned for that depth or less.  The cache is
+    shared by the threads of the process.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._descriptors = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, url, version, depth=0):
+        """
+        Returns the descriptor cached for `url` at `version` with at least `depth` levels of
+        descendents loaded, or None
+        """
+        key = (url, version)
+        with self._lock:
+            cached = self._descriptors.pop(key, None)
+            if cached is None:
+                self.misses += 1
+                return None
+            # re-insert the descriptor, as the most recently used
+            self._descriptors[key] = cached
+            descriptor, cached_depth = cached
+            if cached_depth is not None and (depth is None or depth > cached_depth):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return descriptor
+
+    def set(self, url, version, descriptor, depth=0):
+        """
+        Caches `descriptor` for `url` at `version`, with `depth` levels of descendents
+        loaded, evicting the least recently used descriptor if the cache is full
+        """
+        key = (url, version)
+        with self._lock:
+            self._descriptors.pop(key, None)
+            self._descriptors[key] = (descriptor, depth)
+            if len(self._descriptors) > self.max_size:
+                self._descriptors.popitem(last=False)
+                self.evictions += 1
+
+    def clear_course(self, org, course):
+        """
+        Drops all of the descriptors of the course org/course
+        """
+        prefix = u"i4x://{0}/{1}/".format(org, course)
+        with self._lock:
+            for key in [key for key in self._descriptors if key[0].startswith(prefix)]:
+                del self._descriptors[key]
+
+    def stats(self):
+        """
+        Returns a dictionary of the size, hits, misses and evictions of the cache
+        """
+        with self._lock:
+            return {
+                'size': len(self._descriptors),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
 class CachingDescriptorSystem(MakoDescriptorSystem):
     """
     A system that has a cache of module json that it will use to load modules
@@ -158,12 +233,19 @@ class CachingDescriptorSystem(MakoDescriptorSystem):
         self.course_id = None
         self.cached_metadata = cached_metadata
 
-    def load_item(self, location):
+    def load_item(self, location, use_descriptor_cache=True):
         """
         Return an XModule instance for the specified location
+
+        use_descriptor_cache: whether to look for the descriptor in the modulestore's
+            descriptor cache before loading it from the cached json data
         """
         location = Location(location)
         json_data = self.module_data.get(location)
+        if json_data is not None and use_descriptor_cache:
+            module = self.modulestore.get_cached_descriptor(location)
+            if module is not None:
+                return module
         if json_data is None:
             module = self.modulestore.get_item(location)
             if module is not None:
@@ -205,6 +287,7 @@ class CachingDescriptorSystem(MakoDescriptorSystem):
                     inherit_metadata(module, metadata_to_inherit)
                 # decache any computed pending field settings
                 module.save()
+                self.modulestore.cache_descriptor(module)
                 return module
             except:
                 log.warning("Failed to load descriptor", exc_info=True)
@@ -248,7 +331,26 @@ def location_to_query(location, wildcard=True):
 
 def metadata_cache_key(location):
     """Turn a `Location` into a useful cache key."""
-    return u"{0.org}/{0.course}".format(location)
+    return u"{0.org}/{0.course}/inheritance".format(location)
+
+
+# How many times the cached metadata inheritance tree of a course is patched after writes before
+# it is computed afresh from the DB, so that the cached tree can't drift from the DB forever
+MAX_INHERITANCE_TREE_PATCHES = 100
+
+# How many seconds a process may hold the lock on patching the cached tree of a course
+INHERITANCE_TREE_LOCK_TIMEOUT = 10
+
+# The fields of the stored modules that loading the descendents of a module needs
+MODULE_FIELDS = {'definition': True, 'metadata': True}
+
+
+# The categories of modules that have children, and so pass metadata down to them.
+# note this is a bit ugly as when we add new categories of containers, we have to add it here
+CONTAINER_CATEGORIES = [
+    'course', 'chapter', 'sequential', 'vertical', 'videosequence',
+    'wrapper', 'problemset', 'conditional', 'randomize'
+]
 
 
 class MongoModuleStore(ModuleStoreBase):
@@ -259,12 +361,19 @@ class MongoModuleStore(ModuleStoreBase):
     # TODO (cpennington): Enable non-filesystem filestores
     # pylint: disable=C0103
     # pylint: disable=W0201
+    # Whether published descriptors may be kept in the descriptor cache
+    cache_published_descriptors = True
+
     def __init__(self, doc_store_config, fs_root, render_template,
                  default_class=None,
                  error_tracker=null_error_tracker,
+                 descriptor_cache_size=0,
                  **kwargs):
         """
         :param doc_store_config: must have a host, db, and collection entries. Other common entries: port, tz_aware.
+        :param descriptor_cache_size: if not 0, the number of published descriptors to keep between
+            requests, keyed by course content version. The content versions are kept in the
+            metadata_inheritance_cache_subsystem, so one must be set when there are several processes.
         """
 
         super(MongoModuleStore, self).__init__(**kwargs)
@@ -306,18 +415,71 @@ class MongoModuleStore(ModuleStoreBase):
         self.error_tracker = error_tracker
         self.render_template = render_template
         self.ignore_write_events_on_courses = []
+        if descriptor_cache_size:
+            self.descriptor_cache = DescriptorCache(descriptor_cache_size)
+        else:
+            self.descriptor_cache = None
+
+    def get_course_content_version(self, location):
+        """
+        Returns the content version of the course of `location` (see
+        xmodule.modulestore.get_course_content_version), which is looked up
+        at most once per request.
+        """
+        key = metadata_cache_key(location)
+        request_cache = self._get_active_request_cache()
+        if request_cache is not None:
+            versions = request_cache.data.setdefault('course_content_versions', {})
+            if key in versions:
+                return versions[key]
+
+        if self.metadata_inheritance_cache_subsystem is not None:
+            version = get_course_content_version(self.metadata_inheritance_cache_subsystem, location.org, location.course)
+        else:
+            # descriptors are then only invalidated by writes made in this process
+            version = None
+
+        if request_cache is not None:
+            versions[key] = version
+        return version
+
+    def get_cached_descriptor(self, location, depth=0):
+        """
+        Returns the descriptor kept for the published `location` in the descriptor
+        cache, with at least `depth` levels of descendents loaded, or None
+        """
+        if self.descriptor_cache is None or not self.cache_published_descriptors or location.revision is not None:
+            return None
+        return self.descriptor_cache.get(location.url(), self.get_course_content_version(location), depth)
+
+    def cache_descriptor(self, descriptor, depth=0):
+        """
+        Keeps `descriptor`, loaded with `depth` levels of descendents, in the descriptor
+        cache, if it is published
+        """
+        location = descriptor.location
+        if self.descriptor_cache is None or not self.cache_published_descriptors or location.revision is not None:
+            return
+        self.descriptor_cache.set(location.url(), self.get_course_content_version(location), descriptor, depth)
 
     def compute_metadata_inheritance_tree(self, location):
         '''
         TODO (cdodge) This method can be deleted when the 'split module store' work has been completed
+
+        Returns the metadata inheritance tree of the course of `location`, a dictionary with the keys
+            'root': the url of the course
+            'children': a dictionary mapping the url of each container to the urls of its children
+            'metadata': a dictionary mapping the url of each container to its own inheritable metadata
+            'inherited': a dictionary mapping the url of each module in the course to the metadata
+                that it inherits
+
+        The structure is kept so that writes can patch the tree rather than recompute it.
         '''
 
         # get all collections in the course, this query should not return any leaf nodes
-        # note this is a bit ugly as when we add new categories of containers, we have to add it here
         query = {'_id.org': location.org,
                  '_id.course': location.course,
-                 '_id.category': {'$in': ['course', 'chapter', 'sequential', 'vertical', 'videosequence',
-                                          'wrapper', 'problemset', 'conditional', 'randomize']}
+                 '_id.category': {'$in': CONTAINER_CATEGORIES}
                  }
         # we just want the Location, children, and inheritable metadata
         record_filter = {'_id': 1, 'definition.children': 1}
@@ -330,56 +492,58 @@ class MongoModuleStore(ModuleStoreBase):
         # call out to the DB
         resultset = self.collection.find(query, record_filter)
 
-        results_by_url = {}
-        root = None
+        tree = {'root': None, 'children': {}, 'metadata': {}, 'inherited': {}}
 
         # now go through the results and order them by the location url
         for result in resultset:
             location = Location(result['_id'])
             # We need to collate between draft and non-draft
             # i.e. draft verticals will have draft children but will have non-draft parents currently
-            location = location.replace(revision=None)
-            location_url = location.url()
-            if location_url in results_by_url:
-                existing_children = results_by_url[location_url].get('definition', {}).get('children', [])
-                additional_children = result.get('definition', {}).get('children', [])
-                total_children = existing_children + additional_children
-                results_by_url[location_url].setdefault('definition', {})['children'] = total_children
-            results_by_url[location.url()] = result
-            if location.category == 'course':
-                root = location.url()
-
-        # now traverse the tree and compute down the inherited metadata
-        metadata_to_inherit = {}
-
-        def _compute_inherited_metadata(url):
-            """
-            Helper method for computing inherited metadata for a specific location url
-            """
+            location_url = location.replace(revision=None).url()
             # check for presence of metadata key. Note that a given module may not yet be fully formed.
             # example: update_item -> update_children -> update_metadata sequence on new item create
             # if we get called here without update_metadata called first then 'metadata' hasn't been set
             # as we're not fully transactional at the DB layer. Same comment applies to below key name
             # check
-            my_metadata = results_by_url[url].get('metadata', {})
-
-            # go through all the children and recurse, but only if we have
-            # in the result set. Remember results will not contain leaf nodes
-            for child in results_by_url[url].get('definition', {}).get('children', []):
-                if child in results_by_url:
-                    new_child_metadata = copy.deepcopy(my_metadata)
-                    new_child_metadata.update(results_by_url[child].get('metadata', {}))
-                    results_by_url[child]['metadata'] = new_child_metadata
-                    metadata_to_inherit[child] = new_child_metadata
-                    _compute_inherited_metadata(child)
-                else:
-                    # this is likely a leaf node, so let's record what metadata we need to inherit
-                    metadata_to_inherit[child] = my_metadata
+            tree['children'].setdefault(location_url, []).extend(
+                result.get('definition', {}).get('children', [])
+            )
+            tree['metadata'][location_url] = result.get('metadata', {})
+            if location.category == 'course':
+                tree['root'] = location_url
 
-        if root is not None:
-            _compute_inherited_metadata(root)
+        if tree['root'] is not None:
+            self._compute_inherited_metadata(tree, tree['root'], {})
 
-        return metadata_to_inherit
+        return tree
+
+    @staticmethod
+    def _compute_inherited_metadata(tree, url, parent_metadata):
+        """
+        Computes down the inherited metadata of the subtree of `tree` rooted at the container `url`,
+        whose parent passes down `parent_metadata`.
+
+        Modules that don't override any inheritable metadata share the dictionary of their parent,
+        rather than getting a copy of it.  Inherited metadata is never modified in place.
+        """
+        stack = [(url, parent_metadata)]
+        while stack:
+            url, parent_metadata = stack.pop()
+            own_metadata = tree['metadata'].get(url)
+            if own_metadata:
+                my_metadata = dict(parent_metadata)
+                my_metadata.update(own_metadata)
+            else:
+                my_metadata = parent_metadata
+            tree['inherited'][url] = my_metadata
+
+            # go through all the children and recurse, but only if they are containers.
+            # leaf nodes just inherit the metadata of their container
+            for child in tree['children'].get(url, []):
+                if child in tree['children']:
+                    stack.append((child, my_metadata))
+                else:
+                    tree['inherited'][child] = my_metadata
 
     def get_cached_metadata_inheritance_tree(self, location, force_refresh=False):
         '''
@@ -395,21 +559,34 @@ class MongoModuleStore(ModuleStoreBase):
 
             # then look in any caching subsystem (e.g. memcached)
             if self.metadata_inheritance_cache_subsystem is not None:
-                tree = self.metadata_inheritance_cache_subsystem.get(key, {})
+                tree = self.metadata_inheritance_cache_subsystem.get(self._metadata_inheritance_tree_cache_key(location), {})
             else:
                 logging.warning('Running MongoModuleStore without a metadata_inheritance_cache_subsystem. This is OK in localdev and testing environment. Not OK in production.')
 
         if not tree:
             # if not in subsystem, or we are on force refresh, then we have to compute
+            if force_refresh:
+                # drop any tree being patched by another process
+                self._new_metadata_inheritance_tree_generation(location)
             tree = self.compute_metadata_inheritance_tree(location)
 
-            # now write out computed tree to caching subsystem (e.g. memcached), if available
+            # now write out computed tree to caching subsystem (e.g. memcached), if available.
+            # the tree is only added, so that a tree patched by a write made since the DB was
+            # read isn't overwritten
             if self.metadata_inheritance_cache_subsystem is not None:
-                self.metadata_inheritance_cache_subsystem.set(key, tree)
+                self.metadata_inheritance_cache_subsystem.add(self._metadata_inheritance_tree_cache_key(location), tree)
 
         # now populate a request_cache, if available. NOTE, we are outside of the
         # scope of the above if: statement so that after a memcache hit, it'll get
         # put into the request_cache
+        self._set_request_cached_metadata_inheritance_tree(key, tree)
+
+        return tree
+
+    def _set_request_cached_metadata_inheritance_tree(self, key, tree):
+        """
+        Puts `tree` in the request cache, if there is one.
+        """
         if self.request_cache is not None:
             # we can't assume the 'metadatat_inheritance' part of the request cache dict has been
             # defined
@@ -417,7 +594,43 @@ class MongoModuleStore(ModuleStoreBase):
                 self.request_cache.data['metadata_inheritance'] = {}
             self.request_cache.data['metadata_inheritance'][key] = tree
 
-        return tree
+    def _metadata_inheritance_tree_generation_key(self, location):
+        """
+        Returns the cache key of the generation of the cached metadata inheritance tree of the
+        course of `location`.
+        """
+        return u"{0}/generation".format(metadata_cache_key(location))
+
+    def _metadata_inheritance_tree_cache_key(self, location):
+        """
+        Returns the key the metadata inheritance tree of the course of `location` is kept under in
+        the metadata_inheritance_cache_subsystem, which includes the current generation of the tree.
+        """
+        cache = self.metadata_inheritance_cache_subsystem
+        generation_key = self._metadata_inheritance_tree_generation_key(location)
+        generation = cache.get(generation_key)
+        if generation is None:
+            # Never stored, or evicted: start from the current time, so that no tree cached under
+            # an earlier generation can be picked up again.
+            cache.add(generation_key, int(time.time() * 1000))
+            generation = cache.get(generation_key)
+        return u"{0}/{1}".format(metadata_cache_key(location), generation)
+
+    def _new_metadata_inheritance_tree_generation(self, location):
+        """
+        Moves the cached metadata inheritance tree of the course of `location` to a new generation,
+        so that the tree cached so far, and any patch being made to it, are dropped.
+        """
+        if self.request_cache is not None:
+            self.request_cache.data.get('metadata_inheritance', {}).pop(metadata_cache_key(location), None)
+        cache = self.metadata_inheritance_cache_subsystem
+        if cache is None:
+            return
+        generation_key = self._metadata_inheritance_tree_generation_key(location)
+        try:
+            cache.incr(generation_key)
+        except ValueError:
+            cache.set(generation_key, int(time.time() * 1000))
 
     def refresh_cached_metadata_inheritance_tree(self, location):
         """
@@ -428,6 +641,104 @@ class MongoModuleStore(ModuleStoreBase):
         if pseudo_course_id not in self.ignore_write_events_on_courses:
             self.get_cached_metadata_inheritance_tree(location, force_refresh=True)
 
+    def update_cached_metadata_inheritance_tree(self, location, children=None, metadata=None, deleted=False):
+        """
+        Patches the cached metadata inheritance tree for the org/course combination for location
+        after a write to the module at `location`, rather than recomputing the whole tree.
+
+        `children`: the new children of the module, if they were written
+        `metadata`: the new metadata of the module, if it was written
+        `deleted`: whether the module was deleted
+
+        Only the subtree of a container whose children or metadata changed is recomputed: the own
+        metadata of leaf modules doesn't affect the tree.  The whole tree is computed afresh when
+        a container is deleted or loses children, when there is no cached tree, and every
+        MAX_INHERITANCE_TREE_PATCHES writes.
+
+        Processes patch the tree in the metadata_inheritance_cache_subsystem one at a time.  If
+        another process is patching it, the tree is moved to a new generation instead, so that
+        neither patch is kept, and the tree is computed afresh when it's next read.
+        """
+        location = Location(location)
+        pseudo_course_id = '/'.join([location.org, location.course])
+        if pseudo_course_id in self.ignore_write_events_on_courses:
+            return
+        if location.category not in CONTAINER_CATEGORIES:
+            # leaf modules are not part of the structure of the tree
+            return
+
+        key = metadata_cache_key(location)
+        cache = self.metadata_inheritance_cache_subsystem
+        if cache is None:
+            # only this request's copy of the tree can be patched
+            if self.request_cache is None:
+                return
+            tree = self.request_cache.data.get('metadata_inheritance', {}).get(key)
+            if tree is not None and not self._patch_metadata_inheritance_tree(tree, location, children, metadata, deleted):
+                self._set_request_cached_metadata_inheritance_tree(key, self.compute_metadata_inheritance_tree(location))
+            return
+
+        cache_key = self._metadata_inheritance_tree_cache_key(location)
+        lock_key = u"{0}/lock".format(cache_key)
+        if not cache.add(lock_key, True, INHERITANCE_TREE_LOCK_TIMEOUT):
+            self._new_metadata_inheritance_tree_generation(location)
+            return
+        try:
+            tree = cache.get(cache_key)
+            if not tree or not self._patch_metadata_inheritance_tree(tree, location, children, metadata, deleted):
+                tree = self.compute_metadata_inheritance_tree(location)
+            cache.set(cache_key, tree)
+            self._set_request_cached_metadata_inheritance_tree(key, tree)
+        finally:
+            cache.delete(lock_key)
+
+    def _patch_metadata_inheritance_tree(self, tree, location, children, metadata, deleted):
+        """
+        Patches `tree` after a write to the container at `location`, as per
+        update_cached_metadata_inheritance_tree.  Returns False, leaving `tree` in an undefined
+        state, if it must be computed afresh instead.
+        """
+        if not tree.get('root') or deleted:
+            return False
+        patches = tree.get('patches', 0)
+        if patches >= MAX_INHERITANCE_TREE_PATCHES:
+            return False
+        tree['patches'] = patches + 1
+
+        url = location.replace(revision=None).url()
+        if children is not None:
+            # draft and non-draft versions of a container share a node, so take the children of
+            # both, as stored
+            stored_children = []
+            query = location_to_query(location.replace(revision=None), wildcard=False)
+            del query['_id.revision']
+            for result in self.collection.find(query, {'definition.children': 1}):
+                for child in result.get('definition', {}).get('children', []):
+                    if child not in stored_children:
+                        stored_children.append(child)
+            if any(child not in stored_children for child in tree['children'].get(url, [])):
+                # the children that were removed may have been moved elsewhere, or deleted
+                return False
+            tree['children'][url] = stored_children
+        else:
+            tree['children'].setdefault(url, [])
+        if metadata is not None:
+            tree['metadata'][url] = dict(
+                (field_name, value) for field_name, value in metadata.iteritems()
+                if field_name in InheritanceMixin.fields
+            )
+
+        # recompute the subtree from the metadata passed down by the parent. A container that
+        # isn't attached to the course yet is computed when it is added to its parent's children
+        if url == tree['root']:
+            self._compute_inherited_metadata(tree, url, {})
+        else:
+            for parent_url, parent_children in tree['children'].iteritems():
+                if url in parent_children and parent_url in tree['inherited']:
+                    self._compute_inherited_metadata(tree, url, tree['inherited'][parent_url])
+                    break
+        return True
+
     def _clean_item_data(self, item):
         """
         Renames the '_id' field in item to 'location'
@@ -440,7 +751,113 @@ class MongoModuleStore(ModuleStoreBase):
         query = {
             '_id': {'$in': [namedtuple_to_son(Location(item)) for item in items]}
         }
-        return list(self.collection.find(query))
+        return list(self.collection.find(query, MODULE_FIELDS))
+
+    def _query_course_for_cache_children(self, location):
+        """
+        Returns a dictionary mapping url -> item data for all of the modules in the course
+        of `location`, fetched in a single round-trip.
+        """
+        query = {
+            '_id.tag': location.tag,
+            '_id.org': location.org,
+            '_id.course': location.course,
+            '_id.revision': None,
+        }
+        return dict(
+            (Location(item['_id']).url(), item) for item in self.collection.find(query, MODULE_FIELDS)
+        )
+
+    def _get_course_items_for_cache_children(self, location):
+        """
+        Returns the items of the course of `location` as per _query_course_for_cache_children,
+        along with whether they are shared with other callers and so must be copied before use.
+
+        The items are kept in the request cache while a request is being handled, or in the
+        cache of a read_batch, so that any later load of modules in the course is served
+        without going to the DB.  Elsewhere, e.g. in celery tasks, nothing would clear them,
+        so they are only shared by the loads of a single call.
+        """
+        request_cache = self._get_active_request_cache()
+        if request_cache is None:
+            return self._query_course_for_cache_children(location), False
+
+        course_items = request_cache.data.setdefault('course_items', {})
+        key = (id(self), metadata_cache_key(location))
+        if key not in course_items:
+            course_items[key] = self._query_course_for_cache_children(location)
+        return course_items[key], True
+
+    def _clear_request_cached_course_items(self, location):
+        """
+        Drops the items of the course of `location` from the request cache, after a write.
+        """
+        request_cache = self._get_active_request_cache()
+        if request_cache is not None:
+            course_items = request_cache.data.get('course_items', {})
+            cache_key = metadata_cache_key(location)
+            for key in [key for key in course_items if key[1] == cache_key]:
+                del course_items[key]
+
+    def _has_request_cached_course_items(self, items):
+        """
+        Returns whether the items of the courses of all of `items` are in the request cache,
+        or the cache of the current read_batch.
+        """
+        request_cache = self._get_active_request_cache()
+        if request_cache is None:
+            return False
+        course_items = request_cache.data.get('course_items', {})
+        return all(
+            (id(self), metadata_cache_key(Location(item['_id']))) in course_items
+            for item in items
+        )
+
+    def _cache_subtrees(self, items, depth=None):
+        """
+        Returns a dictionary mapping Location -> item data, populated with json data
+        for all descendents of items up to the specified depth, as per _cache_children.
+
+        The descendents are picked out of all of the modules of their course, which are
+        loaded in a single query, rather than being queried for level by level.
+        """
+        data = {}
+        seen = set()
+        course_items = {}
+        to_process = list(items)
+        while to_process and (depth is None or depth >= 0):
+            children = []
+            for item in to_process:
+                self._clean_item_data(item)
+                location = Location(item['location'])
+                data[location] = item
+                children.extend((location, child) for child in item.get('definition', {}).get('children', []))
+
+            if depth == 0:
+                break
+
+            to_process = []
+            for parent_location, child in children:
+                if child in seen:
+                    continue
+                seen.add(child)
+
+                # children are always in the same course as their parent
+                course_key = (parent_location.tag, parent_location.org, parent_location.course)
+                if course_key not in course_items:
+                    course_items[course_key] = self._get_course_items_for_cache_children(parent_location)
+                items_by_url, shared = course_items[course_key]
+
+                child_item = items_by_url.get(child)
+                if child_item is not None:
+                    # the item data is modified as it is loaded, so items that may be
+                    # loaded again later in the request are copied
+                    to_process.append(copy.deepcopy(child_item) if shared else child_item)
+
+            if depth is not None:
+                depth -= 1
+
+        return data
 
     def _cache_children(self, items, depth=0):
         """
@@ -448,12 +865,19 @@ class MongoModuleStore(ModuleStoreBase):
         for all descendents of items up to the specified depth.
         (0 = no descendents, 1 = children, 2 = grandchildren, etc)
         If depth is None, will load all the children.
-        This will make a number of queries that is linear in the depth.
+        This will make a number of queries that is linear in the depth, unless whole courses
+        are loaded, or the modules of the course have already been loaded during this request
+        or read_batch: then all the modules of the course are loaded in a single query (or
+        none at all).
         """
+        if depth != 0 and self._has_request_cached_course_items(items):
+            return self._cache_subtrees(items, depth)
+        if depth is None and all(item['_id']['category'] == 'course' for item in items):
+            return self._cache_subtrees(items, depth)
 
         data = {}
         to_process = list(items)
-        while to_process and depth is None or depth >= 0:
+        while to_process and (depth is None or depth >= 0):
             children = []
             for item in to_process:
                 self._clean_item_data(item)
@@ -490,7 +914,7 @@ class MongoModuleStore(ModuleStoreBase):
 
         cached_metadata = {}
         if apply_cached_metadata:
-            cached_metadata = self.get_cached_metadata_inheritance_tree(Location(item['location']))
+            cached_metadata = self.get_cached_metadata_inheritance_tree(Location(item['location'])).get('inherited', {})
 
         # TODO (cdodge): When the 'split module store' work has been completed, we should remove
         # the 'metadata_inheritance_tree' parameter
@@ -504,7 +928,8 @@ class MongoModuleStore(ModuleStoreBase):
             cached_metadata=cached_metadata,
             mixins=self.xblock_mixins,
         )
-        return system.load_item(item['location'])
+        # get_item has already looked in the descriptor cache
+        return system.load_item(item['location'], use_descriptor_cache=False)
 
     def _load_items(self, items, depth=0):
         """
@@ -574,8 +999,13 @@ class MongoModuleStore(ModuleStoreBase):
             calls to get_children() to cache. None indicates to cache all descendents.
         """
         location = Location.ensure_fully_specified(location)
+        module = self.get_cached_descriptor(location, depth)
+        if module is not None:
+            return module
         item = self._find_one(location)
         module = self._load_items([item], depth)[0]
+        # keep the descriptor with the descendents that were loaded along with it
+        self.cache_descriptor(module, depth)
         return module
 
     def get_instance(self, course_id, location, depth=0):
@@ -661,8 +1091,12 @@ class MongoModuleStore(ModuleStoreBase):
                     'children': xmodule.children if xmodule.has_children else []
                 }
             })
-        # recompute (and update) the metadata inheritance tree which is cached
-        self.refresh_cached_metadata_inheritance_tree(xmodule.location)
+        # update the metadata inheritance tree which is cached
+        self.update_cached_metadata_inheritance_tree(
+            xmodule.location,
+            children=xmodule.children if xmodule.has_children else [],
+            metadata=own_metadata(xmodule),
+        )
         self.fire_updated_modulestore_signal(get_course_id_no_run(xmodule.location), xmodule.location)
 
     def create_and_save_xmodule(self, location, definition_data=None, metadata=None, system=None):
@@ -704,6 +1138,15 @@ class MongoModuleStore(ModuleStoreBase):
         """
         Send a signal using `self.modulestore_update_signal`, if that has been set
         """
+        # every write ends here, so this is also where modules and descriptors of the
+        # course that were loaded earlier are dropped
+        location = Location(location)
+        self._clear_request_cached_course_items(location)
+        request_cache = self._get_active_request_cache()
+        if request_cache is not None:
+            request_cache.data.get('course_content_versions', {}).pop(metadata_cache_key(location), None)
+        if self.descriptor_cache is not None:
+            self.descriptor_cache.clear_course(location.org, location.course)
         if self.modulestore_update_signal is not None:
             self.modulestore_update_signal.send(self, modulestore=self, course_id=course_id,
                                                 location=location)
@@ -768,6 +1211,9 @@ class MongoModuleStore(ModuleStoreBase):
         except ItemNotFoundError:
             if not allow_not_found:
                 raise
+        else:
+            # fire signal that we've written to DB
+            self.fire_updated_modulestore_signal(get_course_id_no_run(Location(location)), Location(location))
 
     def update_children(self, location, children):
         """
@@ -779,8 +1225,8 @@ class MongoModuleStore(ModuleStoreBase):
         """
 
         self._update_single_item(location, {'definition.children': children})
-        # recompute (and update) the metadata inheritance tree which is cached
-        self.refresh_cached_metadata_inheritance_tree(Location(location))
+        # update the metadata inheritance tree which is cached
+        self.update_cached_metadata_inheritance_tree(location, children=children)
         # fire signal that we've written to DB
         self.fire_updated_modulestore_signal(get_course_id_no_run(Location(location)), Location(location))
 
@@ -809,8 +1255,8 @@ class MongoModuleStore(ModuleStoreBase):
             self.update_metadata(course.location, own_metadata(course))
 
         self._update_single_item(location, {'metadata': metadata})
-        # recompute (and update) the metadata inheritance tree which is cached
-        self.refresh_cached_metadata_inheritance_tree(loc)
+        # update the metadata inheritance tree which is cached
+        self.update_cached_metadata_inheritance_tree(loc, metadata=metadata)
         self.fire_updated_modulestore_signal(get_course_id_no_run(Location(location)), Location(location))
 
     def delete_item(self, location, delete_all_versions=False):
@@ -835,8 +1281,8 @@ class MongoModuleStore(ModuleStoreBase):
         # Must include this to avoid the django debug toolbar (which defines the deprecated "safe=False")
         # from overriding our default value set in the init method.
         self.collection.remove({'_id': Location(location).dict()}, safe=self.collection.safe)
-        # recompute (and update) the metadata inheritance tree which is cached
-        self.refresh_cached_metadata_inheritance_tree(Location(location))
+        # update the metadata inheritance tree which is cached
+        self.update_cached_metadata_inheritance_tree(location, deleted=True)
         self.fire_updated_modulestore_signal(get_course_id_no_run(Location(location)), Location(location))
 
     def get_parent_locations(self, location, course_id):
@@ -12,7 +12,9 @@ from xmodule.exceptions import InvalidVersionError
 from xmodule.modulestore import Location
 from xmodule.modulestore.exceptions import ItemNotFoundError, DuplicateItemError
 from xmodule.modulestore.inheritance import own_metadata
-from xmodule.modulestore.mongo.base import location_to_query, namedtuple_to_son, get_course_id_no_run, MongoModuleStore
+from xmodule.modulestore.mongo.base import (
+    location_to_query, namedtuple_to_son, get_course_id_no_run, MongoModuleStore, MODULE_FIELDS
+)
 import pymongo
 from pytz import UTC
 from xblock.fields import Scope
@@ -58,6 +60,9 @@ class DraftModuleStore(MongoModuleStore):
     their children) to published modules.
     """
 
+    # Reads may return drafts, so descriptors are never kept between requests
+    cache_published_descriptors = False
+
     def get_item(self, location, depth=0):
         """
         Returns an XModuleDescriptor instance for the item at location.
@@ -152,7 +157,11 @@ class DraftModuleStore(MongoModuleStore):
         except pymongo.errors.DuplicateKeyError:
             raise DuplicateItemError(original['_id'])
 
-        self.refresh_cached_metadata_inheritance_tree(draft_location)
+        self.update_cached_metadata_inheritance_tree(
+            draft_location,
+            children=original.get('definition', {}).get('children', []),
+            metadata=original.get('metadata', {}),
+        )
         self.fire_updated_modulestore_signal(get_course_id_no_run(draft_location), draft_location)
 
         return self._load_items([original])[0]
@@ -265,6 +274,25 @@ class DraftModuleStore(MongoModuleStore):
         self.convert_to_draft(location)
         super(DraftModuleStore, self).delete_item(location)
 
+    def _query_course_for_cache_children(self, location):
+        # first get non-draft in a round-trip
+        items_by_url = super(DraftModuleStore, self)._query_course_for_cache_children(location)
+
+        # now query all draft content in another round-trip, and replace the non-draft
+        # with the draft, as for _query_children_for_cache_children
+        query = {
+            '_id.tag': location.tag,
+            '_id.org': location.org,
+            '_id.course': location.course,
+            '_id.revision': DRAFT,
+        }
+        for draft in self.collection.find(query, MODULE_FIELDS):
+            url = Location(draft['_id']).replace(revision=None).url()
+            if url in items_by_url:
+                items_by_url[url] = draft
+
+        return items_by_url
+
     def _query_children_for_cache_children(self, items):
         # first get non-draft in a round-trip
         to_process_non_drafts = super(DraftModuleStore, self)._query_children_for_cache_children(items)
@@ -277,7 +305,7 @@ class DraftModuleStore(MongoModuleStore):
         query = {
             '_id': {'$in': [namedtuple_to_son(as_draft(Location(item))) for item in items]}
         }
-        to_process_drafts = list(self.collection.find(query))
+        to_process_drafts = list(self.collection.find(query, MODULE_FIELDS))
 
         # now we have to go through all drafts and replace the non-draft
         # with the draft. This is because the semantics of the DraftStore is to
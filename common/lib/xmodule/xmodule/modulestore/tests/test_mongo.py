@@ -7,6 +7,7 @@ from itertools import ifilter
 import pymongo
 import logging
 from uuid import uuid4
+from mock import Mock, patch
 
 from xblock.fields import Scope
 from xblock.runtime import KeyValueStore
@@ -23,6 +24,7 @@ from xmodule.modulestore.tests.test_modulestore import check_path_to_location
 from IPython.testing.nose_assert_methods import assert_in, assert_not_in
 from xmodule.exceptions import NotFoundError
 from xmodule.modulestore.exceptions import InsufficientSpecificationError
+from xmodule.modulestore.inheritance import own_metadata
 
 log = logging.getLogger(__name__)
 
@@ -35,6 +37,29 @@ DEFAULT_CLASS = 'xmodule.raw_module.RawDescriptor'
 RENDER_TEMPLATE = lambda t_n, d, ctx = None, nsp = 'main': ''
 
 
+class DictCache(dict):
+    """
+    A minimal stand-in for a django cache, for use as a metadata_inheritance_cache_subsystem.
+    """
+    def set(self, key, value, timeout=None):
+        self[key] = value
+
+    def add(self, key, value, timeout=None):
+        if key in self:
+            return False
+        self[key] = value
+        return True
+
+    def delete(self, key):
+        self.pop(key, None)
+
+    def incr(self, key, delta=1):
+        if key not in self:
+            raise ValueError("Key '{0}' not found".format(key))
+        self[key] += delta
+        return self[key]
+
+
 class TestMongoModuleStore(object):
     '''Tests!'''
     @classmethod
@@ -214,6 +239,179 @@ class TestMongoModuleStore(object):
         assert_equals('Resources', get_tab_name(3))
         assert_equals('Discussion', get_tab_name(4))
 
+    def test_get_item_depth_none(self):
+        '''Make sure loading a whole course caches the data of all of its modules'''
+        course = self.store.get_item(Location('i4x', 'edX', 'toy', 'course', '2012_Fall'), depth=None)
+        module_data = course.runtime.module_data
+
+        def check_descendents(descriptor):
+            for child in descriptor.get_children():
+                assert_in(child.location, module_data)
+                check_descendents(child)
+
+        check_descendents(course)
+
+    def test_course_items_are_only_kept_during_requests(self):
+        course_location = Location('i4x', 'edX', 'toy', 'course', '2012_Fall')
+        for in_request in (False, True):
+            request_cache = Mock(data={})
+            store = MongoModuleStore(
+                {'host': HOST, 'db': DB, 'collection': COLLECTION},
+                FS_ROOT, RENDER_TEMPLATE, default_class=DEFAULT_CLASS,
+                request_cache=request_cache, request_cache_is_active=lambda: in_request
+            )
+            store.get_item(course_location, depth=None)
+            assert_equals(in_request, bool(request_cache.data.get('course_items')))
+
+    def test_only_whole_courses_are_loaded_in_a_single_query(self):
+        course_location = Location('i4x', 'edX', 'toy', 'course', '2012_Fall')
+        section_location = Location('i4x', 'edX', 'toy', 'chapter', 'Overview')
+        store = MongoModuleStore(
+            {'host': HOST, 'db': DB, 'collection': COLLECTION},
+            FS_ROOT, RENDER_TEMPLATE, default_class=DEFAULT_CLASS,
+        )
+        with patch.object(store, '_query_course_for_cache_children', wraps=store._query_course_for_cache_children) as query_course:
+            store.get_item(section_location, depth=None)
+            assert_equals(0, query_course.call_count)
+
+            store.get_item(course_location, depth=None)
+            store.get_item(course_location, depth=None)
+            assert_equals(2, query_course.call_count)
+
+            # a batch shares the modules of the course between loads
+            with store.read_batch():
+                store.get_item(course_location, depth=None)
+                store.get_item(section_location, depth=None)
+            assert_equals(3, query_course.call_count)
+
+    def test_descriptor_cache(self):
+        store = MongoModuleStore(
+            {'host': HOST, 'db': DB, 'collection': COLLECTION},
+            FS_ROOT, RENDER_TEMPLATE, default_class=DEFAULT_CLASS,
+            descriptor_cache_size=2
+        )
+        course_location = Location('i4x', 'edX', 'toy', 'course', '2012_Fall')
+        course = store.get_item(course_location)
+        assert store.get_item(course_location) is course
+        assert_equals({'size': 1, 'hits': 1, 'misses': 1, 'evictions': 0}, store.descriptor_cache.stats())
+
+        # children are cached as they are loaded, evicting the least recently used descriptors
+        chapters = course.get_children()
+        assert_equals(2, store.descriptor_cache.stats()['size'])
+        assert_equals(len(chapters) - 1, store.descriptor_cache.stats()['evictions'])
+
+        # writes to the course drop its descriptors
+        store.fire_updated_modulestore_signal('edX/toy', course_location)
+        assert_equals(0, store.descriptor_cache.stats()['size'])
+        assert store.get_item(course_location) is not course
+
+    def test_descriptor_cache_depth(self):
+        store = MongoModuleStore(
+            {'host': HOST, 'db': DB, 'collection': COLLECTION},
+            FS_ROOT, RENDER_TEMPLATE, default_class=DEFAULT_CLASS,
+            descriptor_cache_size=10
+        )
+        course_location = Location('i4x', 'edX', 'toy', 'course', '2012_Fall')
+        course = store.get_item(course_location)
+
+        # a descriptor loaded without its descendents isn't used when they are asked for
+        deep_course = store.get_item(course_location, depth=None)
+        assert deep_course is not course
+        assert store.get_item(course_location, depth=2) is deep_course
+        assert store.get_item(course_location) is deep_course
+
+    def test_update_item_fires_signal(self):
+        signal = Mock()
+        store = MongoModuleStore(
+            {'host': HOST, 'db': DB, 'collection': COLLECTION},
+            FS_ROOT, RENDER_TEMPLATE, default_class=DEFAULT_CLASS,
+            descriptor_cache_size=10, modulestore_update_signal=signal
+        )
+        location = Location('i4x', 'edX', 'toy', 'course_info', 'handouts')
+        handouts = store.get_item(location)
+        store.update_item(location, handouts.data)
+
+        signal.send.assert_called_once_with(store, modulestore=store, course_id='edX/toy', location=location)
+        assert store.get_item(location) is not handouts
+
+    def test_incremental_metadata_inheritance(self):
+        store = MongoModuleStore(
+            {'host': HOST, 'db': DB, 'collection': COLLECTION},
+            FS_ROOT, RENDER_TEMPLATE, default_class=DEFAULT_CLASS,
+            metadata_inheritance_cache_subsystem=DictCache()
+        )
+        course_location = Location('i4x', 'edX', 'toy', 'course', '2012_Fall')
+        store.get_cached_metadata_inheritance_tree(course_location)
+
+        chapter = store.get_item(store.get_item(course_location).children[0])
+        original_metadata = own_metadata(chapter)
+        try:
+            metadata = dict(original_metadata, xqa_key='incremental')
+            store.update_metadata(chapter.location, metadata)
+
+            # the cached tree was patched, rather than dropped, and matches a full recompute
+            tree = store.get_cached_metadata_inheritance_tree(course_location)
+            assert_equals(tree['inherited'], store.compute_metadata_inheritance_tree(course_location)['inherited'])
+            for child in chapter.children:
+                assert_equals('incremental', tree['inherited'][child]['xqa_key'])
+        finally:
+            store.update_metadata(chapter.location, original_metadata)
+
+    def test_moving_a_child_between_parents(self):
+        store = MongoModuleStore(
+            {'host': HOST, 'db': DB, 'collection': COLLECTION},
+            FS_ROOT, RENDER_TEMPLATE, default_class=DEFAULT_CLASS,
+            metadata_inheritance_cache_subsystem=DictCache()
+        )
+        course_location = Location('i4x', 'edX', 'toy', 'course', '2012_Fall')
+        store.get_cached_metadata_inheritance_tree(course_location)
+
+        course = store.get_item(course_location)
+        old_parent = store.get_item(course.children[0])
+        new_parent = store.get_item(course.children[2])
+        moved = old_parent.children[0]
+        original_metadata = own_metadata(new_parent)
+        try:
+            store.update_metadata(new_parent.location, dict(original_metadata, xqa_key='moved'))
+            store.update_children(new_parent.location, new_parent.children + [moved])
+            store.update_children(old_parent.location, old_parent.children[1:])
+
+            tree = store.get_cached_metadata_inheritance_tree(course_location)
+            assert_equals(tree['inherited'], store.compute_metadata_inheritance_tree(course_location)['inherited'])
+            assert_not_in(moved, tree['children'][old_parent.location.url()])
+            assert_equals('moved', tree['inherited'][moved]['xqa_key'])
+            for child in store.get_item(moved).children:
+                assert_equals('moved', tree['inherited'][child]['xqa_key'])
+        finally:
+            store.update_children(old_parent.location, old_parent.children)
+            store.update_children(new_parent.location, new_parent.children)
+            store.update_metadata(new_parent.location, original_metadata)
+
+    def test_concurrent_patches_drop_the_cached_tree(self):
+        cache = DictCache()
+        store = MongoModuleStore(
+            {'host': HOST, 'db': DB, 'collection': COLLECTION},
+            FS_ROOT, RENDER_TEMPLATE, default_class=DEFAULT_CLASS,
+            metadata_inheritance_cache_subsystem=cache
+        )
+        course_location = Location('i4x', 'edX', 'toy', 'course', '2012_Fall')
+        store.get_cached_metadata_inheritance_tree(course_location)
+        cache_key = store._metadata_inheritance_tree_cache_key(course_location)  # pylint: disable=protected-access
+
+        chapter = store.get_item(store.get_item(course_location).children[0])
+        original_metadata = own_metadata(chapter)
+        try:
+            # another process is patching the tree
+            cache.add(u"{0}/lock".format(cache_key), True)
+            store.update_metadata(chapter.location, dict(original_metadata, xqa_key='concurrent'))
+
+            assert_not_equals(cache_key, store._metadata_inheritance_tree_cache_key(course_location))  # pylint: disable=protected-access
+            tree = store.get_cached_metadata_inheritance_tree(course_location)
+            for child in chapter.children:
+                assert_equals('concurrent', tree['inherited'][child]['xqa_key'])
+        finally:
+            store.update_metadata(chapter.location, original_metadata)
+
     def test_contentstore_attrs(self):
         """
         Test getting, setting, and defaulting the locked attr and arbitrary attrs.
@@ -186,3 +186,60 @@ class DiscussionTopicsTestCase(unittest.TestCase):
     def test_default_discussion_topics(self):
         d = get_dummy_course('2012-12-02T12:00')
         self.assertEqual({'General': {'id': 'i4x-test_org-test_course-course-test'}}, d.discussion_topics)
+
+
+class GradingPlanTestCase(unittest.TestCase):
+    """Make sure the grading context is built from a compiled grading plan"""
+
+    def setUp(self):
+        self.course = self.load_course()
+
+    def load_course(self):
+        """Load the test course afresh"""
+        system = DummySystem(load_error_modules=True)
+        return system.process_xml('''
+            <course org="{org}" course="{course}" url_name="test">
+                <chapter url_name="ch">
+                    <sequential url_name="hw" graded="true" format="Homework">
+                        <vertical url_name="v">
+                            <problem url_name="p1" weight="2"/>
+                            <html url_name="h">Two houses, ...</html>
+                        </vertical>
+                        <problem url_name="p2"/>
+                    </sequential>
+                    <sequential url_name="notes">
+                        <problem url_name="p3"/>
+                    </sequential>
+                </chapter>
+            </course>
+            '''.format(org=ORG, course=COURSE))
+
+    def test_grading_plan(self):
+        plan = self.course.compile_grading_plan()
+        names = [url.split('/')[-1] for url in plan['locations']]
+        self.assertEqual(['v', 'p1', 'h', 'p2', 'hw'], names)
+        self.assertEqual(
+            [{'format': 'Homework', 'section': 4, 'scorable': [1, 3]}],
+            plan['graded_sections']
+        )
+
+    def test_grading_context(self):
+        context = self.course.grading_context
+        self.assertEqual(['v', 'p1', 'h', 'p2', 'hw'],
+                         [descriptor.url_name for descriptor in context['all_descriptors']])
+        self.assertEqual(['Homework'], context['graded_sections'].keys())
+        section = context['graded_sections']['Homework'][0]
+        self.assertEqual('hw', section['section_descriptor'].url_name)
+        self.assertEqual(['p1', 'p2'], [descriptor.url_name for descriptor in section['xmoduledescriptors']])
+
+    def test_grading_context_from_a_cached_plan(self):
+        course = self.load_course()
+        course.grading_plan = self.course.compile_grading_plan()
+        course.runtime.modulestore = Mock()
+        course.runtime.modulestore.get_item.return_value = self.course
+
+        context = course.grading_context
+        # The course is loaded once with its descendants, and the sections taken from it
+        course.runtime.modulestore.get_item.assert_called_once_with(course.location, depth=None)
+        self.assertEqual(['v', 'p1', 'h', 'p2', 'hw'],
+                         [descriptor.url_name for descriptor in context['all_descriptors']])
@@ -2,6 +2,8 @@ from xmodule.modulestore.django import modulestore
 from xmodule.course_module import CourseDescriptor
 from django.conf import settings
 
+from course_summaries.models import CourseSummary
+
 
 def pick_subdomain(domain, options, default='default'):
     for option in options:
@@ -12,12 +14,16 @@ def pick_subdomain(domain, options, default='default'):
 
 def get_visible_courses(domain=None):
     """
-    Return the set of CourseDescriptors that should be visible in this branded instance
+    Return the set of CourseDescriptors that should be visible in this branded instance,
+    or their CourseSummaries when MITX_FEATURES['USE_COURSE_SUMMARIES'] is on
     """
-    _courses = modulestore().get_courses()
+    if settings.MITX_FEATURES.get('USE_COURSE_SUMMARIES'):
+        courses = CourseSummary.all_summaries()
+    else:
+        _courses = modulestore().get_courses()
 
-    courses = [c for c in _courses
-               if isinstance(c, CourseDescriptor)]
+        courses = [c for c in _courses
+                   if isinstance(c, CourseDescriptor)]
     courses = sorted(courses, key=lambda course: course.number)
 
     if domain and settings.MITX_FEATURES.get('SUBDOMAIN_COURSE_LISTINGS'):
@@ -12,6 +12,8 @@ file and check it in at the same time as your model changes. To do that,
 
 """
 import logging
+from string import Formatter
+
 from django.db import models, transaction
 from django.contrib.auth.models import User
 from html_to_text import html_to_text
@@ -136,6 +138,9 @@ class Optout(models.Model):
 # the location where the email message body is to be inserted.
 COURSE_EMAIL_MESSAGE_BODY_TAG = '{{message_body}}'
 
+# The fields of the email templates that differ from one recipient to the next.
+COURSE_EMAIL_RECIPIENT_FIELDS = ('name', 'email')
+
 
 class CourseEmailTemplate(models.Model):
     """
@@ -213,6 +218,84 @@ class CourseEmailTemplate(models.Model):
         """
         return CourseEmailTemplate._render(self.html_template, htmltext, context)
 
+    def compile_plaintext(self, plaintext, context):
+        """
+        Return a CompiledEmailTemplate of the plain text message with body
+        `plaintext`, rendered with the `context` shared by all recipients.
+        """
+        return CompiledEmailTemplate(self.plain_template, plaintext, context)
+
+    def compile_htmltext(self, htmltext, context):
+        """
+        Return a CompiledEmailTemplate of the HTML message with body
+        `htmltext`, rendered with the `context` shared by all recipients.
+        """
+        return CompiledEmailTemplate(self.html_template, htmltext, context)
+
+
+class CompiledEmailTemplate(object):
+    """
+    An email message rendered once for all of its recipients, apart from the
+    COURSE_EMAIL_RECIPIENT_FIELDS, which are filled in by `render`.
+
+    The template is rendered with a marker in place of each recipient field,
+    and split around the markers, so that rendering it for a recipient only
+    joins the pieces with their name and email.  Templates that format a
+    recipient field in a way a plain substitution can't reproduce (e.g.
+    `{name!r}` or `{name:>20}`) are rendered in full for each recipient.
+    """
+    def __init__(self, format_string, message_body, context):
+        self.format_string = format_string
+        self.message_body = message_body
+        self.context = dict(context)
+        self.pieces = None
+        self.fields = None
+
+        markers = dict((field, u'\x00{0}\x00'.format(field)) for field in COURSE_EMAIL_RECIPIENT_FIELDS)
+        if self._can_substitute(format_string, markers):
+            marked_context = dict(self.context)
+            marked_context.update(markers)
+            result = CourseEmailTemplate._render(format_string, message_body, marked_context)
+            # Odd pieces are the names of the fields between the even ones.
+            pieces = result.split(u'\x00')
+            self.pieces = pieces[0::2]
+            self.fields = pieces[1::2]
+
+    def _can_substitute(self, format_string, markers):
+        """
+        Return whether the recipient fields of `format_string` are all plain
+        `{field}`s, and none of the text could be mistaken for a marker.
+        """
+        texts = [format_string, self.message_body] + self.context.values()
+        if any(isinstance(text, basestring) and '\x00' in text for text in texts):
+            return False
+        for _text, field_name, format_spec, conversion in Formatter().parse(format_string):
+            if field_name is None:
+                continue
+            if format_spec and '{' in format_spec:
+                return False
+            if field_name.split('.')[0].split('[')[0] in markers:
+                if field_name not in markers or format_spec or conversion:
+                    return False
+        return True
+
+    def render(self, recipient_context):
+        """
+        Return the message for the recipient whose COURSE_EMAIL_RECIPIENT_FIELDS
+        are given in the `recipient_context` dict.
+        """
+        if self.pieces is None:
+            context = dict(self.context)
+            context.update(recipient_context)
+            return CourseEmailTemplate._render(self.format_string, self.message_body, context)
+
+        values = [unicode(recipient_context[field]) for field in self.fields]
+        result = [self.pieces[0]]
+        for value, piece in zip(values, self.pieces[1:]):
+            result.append(value)
+            result.append(piece)
+        return u''.join(result)
+
 
 class CourseAuthorization(models.Model):
     """
@@ -242,6 +325,18 @@ class CourseAuthorization(models.Model):
         except cls.DoesNotExist:
             return False
 
+    @classmethod
+    def instructor_email_enabled_courses(cls, course_ids):
+        """
+        Returns the set of the `course_ids` for which email is enabled, in one query.
+        """
+        if not settings.MITX_FEATURES['REQUIRE_COURSE_EMAIL_AUTH']:
+            return set(course_ids)
+
+        return set(cls.objects.filter(
+            course_id__in=list(course_ids), email_enabled=True
+        ).values_list('course_id', flat=True))
+
     def __unicode__(self):
         not_en = "Not "
         if self.email_enabled:
@@ -5,7 +5,9 @@ to a course.
 import re
 import random
 import json
-from time import sleep
+import sys
+from threading import Event, Lock, Thread
+from time import sleep, time
 
 from dogapi import dog_stats_api
 from smtplib import SMTPServerDisconnected, SMTPDataError, SMTPConnectError, SMTPException
@@ -382,6 +384,101 @@ def _get_source_address(course_id, course_title):
     return from_addr
 
 
+class _SendThrottle(object):
+    """
+    Spaces out the emails sent by a subtask, adapting to the mail server.
+
+    Each time the server says we are sending too fast, the delay between sends
+    is doubled, starting at settings.BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS, and
+    the email is sent again.  Each email sent takes that much off the delay
+    again, down to the delay we started with.  Once the delay would go over
+    settings.BULK_EMAIL_MAX_DELAY_BETWEEN_SENDS, the task is retried instead.
+    """
+    def __init__(self, delay):
+        self.min_delay = delay
+        self.delay = delay
+        self.step = settings.BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS
+        self.max_delay = settings.BULK_EMAIL_MAX_DELAY_BETWEEN_SENDS
+        self._lock = Lock()
+
+    def wait(self):
+        """
+        Sleep for the current delay before a send.
+        """
+        if self.delay > 0:
+            sleep(self.delay)
+
+    def slow_down(self, course_title):
+        """
+        Double the delay after the server throttled a send.  Returns False,
+        leaving the delay alone, if it would go over the maximum.
+        """
+        with self._lock:
+            delay = max(2 * self.delay, self.step)
+            if delay <= 0 or delay > self.max_delay:
+                return False
+            self.delay = delay
+        dog_stats_api.increment('course_email.throttled', tags=[_statsd_tag(course_title)])
+        return True
+
+    def speed_up(self):
+        """
+        Shorten the delay after a send went through.
+        """
+        with self._lock:
+            self.delay = max(self.min_delay, self.delay - self.step)
+
+
+def _send_in_parallel(send_messages, to_list, connections):
+    """
+    Send to the recipients of `to_list` over all of the `connections` at once.
+
+    `send_messages(recipients, connection, stop)` is called in a thread for
+    each connection, with its share of the recipients.  When one of them
+    raises an exception, the others are stopped after their current email,
+    and the exception is raised again here.  Either way, `to_list` is left
+    with the recipients that remain to be emailed.
+    """
+    num_connections = len(connections)
+    shares = [to_list[index::num_connections] for index in xrange(num_connections)]
+    stop = Event()
+    errors = []
+
+    def send_share(share, connection):
+        """
+        Send to `share` over `connection`, stopping the others on an error.
+        """
+        try:
+            send_messages(share, connection, stop)
+        except Exception:  # pylint: disable=broad-except
+            errors.append(sys.exc_info())
+            stop.set()
+
+    threads = [Thread(target=send_share, args=args) for args in zip(shares, connections)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    to_list[:] = [recipient for share in shares for recipient in share]
+    if errors:
+        exc_type, exc_value, exc_traceback = errors[0]
+        raise exc_type, exc_value, exc_traceback
+
+
+def _record_send_rate(task_id, course_title, num_attempted, duration, num_connections):
+    """
+    Log and report to DataDog the rate at which a subtask sent `num_attempted`
+    emails in `duration` seconds.
+    """
+    if num_attempted <= 0 or duration <= 0:
+        return
+    rate = num_attempted / duration
+    dog_stats_api.histogram('course_email.send_rate', rate, tags=[_statsd_tag(course_title)])
+    log.info('Task %s: sent %d emails in %.1f seconds (%.1f per second) over %d connections',
+             task_id, num_attempted, duration, rate, num_connections)
+
+
 def _send_course_email(entry_id, email_id, to_list, global_email_context, subtask_status):
     """
     Performs the email sending task.
@@ -401,7 +498,8 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
       * `subtask_status` : object of class SubtaskStatus representing current status.
 
     Sends to all addresses contained in to_list that are not also in the Optout table.
-    Emails are sent multi-part, in both plain text and html.
+    Emails are sent multi-part, in both plain text and html, over
+    settings.BULK_EMAIL_CONNECTIONS_PER_TASK connections at once.
 
     Returns a tuple of two values:
       * First value is a SubtaskStatus object which represents current progress at the end of this call.
@@ -434,28 +532,40 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
     from_addr = _get_source_address(course_email.course_id, course_title)
 
     course_email_template = CourseEmailTemplate.get_template()
-    try:
-        connection = get_connection()
-        connection.open()
+    # Render the messages once, leaving only the recipients' names and emails to fill in.
+    plaintext_template = course_email_template.compile_plaintext(course_email.text_message, global_email_context)
+    html_template = course_email_template.compile_htmltext(course_email.html_message, global_email_context)
+
+    # Throttle if we have gotten the rate limiter.  If a task has been retried for
+    # rate-limiting reasons, then we sleep for a period of time between all emails
+    # within this task.  Choice of the value depends on the number of workers that
+    # might be sending email in parallel, and what the SES throttle rate is.
+    if subtask_status.retried_nomax > 0:
+        throttle = _SendThrottle(settings.BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS)
+    else:
+        throttle = _SendThrottle(0)
 
-        # Define context values to use in all course emails:
-        email_context = {'name': '', 'email': ''}
-        email_context.update(global_email_context)
+    # The subtask status is shared by the connections sending in parallel.
+    status_lock = Lock()
 
-        while to_list:
+    def send_messages(recipients, connection, stop):
+        """
+        Send the email to the `recipients`, a list which is emptied from the end
+        as they are processed, over `connection`, until `stop` is set.
+        """
+        while recipients and not stop.is_set():
             # Update context with user-specific values from the user at the end of the list.
-            # At the end of processing this user, they will be popped off of the to_list.
-            # That way, the to_list will always contain the recipients remaining to be emailed.
+            # At the end of processing this user, they will be popped off of the list.
+            # That way, the list will always contain the recipients remaining to be emailed.
             # This is convenient for retries, which will need to send to those who haven't
             # yet been emailed, but not send to those who have already been sent to.
-            current_recipient = to_list[-1]
+            current_recipient = recipients[-1]
             email = current_recipient['email']
-            email_context['email'] = email
-            email_context['name'] = current_recipient['profile__name']
+            recipient_context = {'name': current_recipient['profile__name'], 'email': email}
 
             # Construct message content using templates and context:
-            plaintext_msg = course_email_template.render_plaintext(course_email.text_message, email_context)
-            html_msg = course_email_template.render_htmltext(course_email.html_message, email_context)
+            plaintext_msg = plaintext_template.render(recipient_context)
+            html_msg = html_template.render(recipient_context)
 
             # Create email:
             email_msg = EmailMultiAlternatives(
@@ -467,13 +577,7 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
             )
             email_msg.attach_alternative(html_msg, 'text/html')
 
-            # Throttle if we have gotten the rate limiter.  This is not very high-tech,
-            # but if a task has been retried for rate-limiting reasons, then we sleep
-            # for a period of time between all emails within this task.  Choice of
-            # the value depends on the number of workers that might be sending email in
-            # parallel, and what the SES throttle rate is.
-            if subtask_status.retried_nomax > 0:
-                sleep(settings.BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS)
+            throttle.wait()
 
             try:
                 log.debug('Email with id %s to be sent to %s', email_id, email)
@@ -484,32 +588,65 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
             except SMTPDataError as exc:
                 # According to SMTP spec, we'll retry error codes in the 4xx range.  5xx range indicates hard failure.
                 if exc.smtp_code >= 400 and exc.smtp_code < 500:
-                    # This will cause the outer handler to catch the exception and retry the entire task.
-                    raise exc
+                    # Send to the same recipient again more slowly, or if we are already
+                    # sending as slowly as we will, have the outer handler catch the
+                    # exception and retry the entire task.
+                    if not throttle.slow_down(course_title):
+                        raise exc
+                    continue
                 else:
                     # This will fall through and not retry the message.
                     log.warning('Task %s: email with id %s not delivered to %s due to error %s', task_id, email_id, email, exc.smtp_error)
                     dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
-                    subtask_status.increment(failed=1)
+                    with status_lock:
+                        subtask_status.increment(failed=1)
+
+            except SESMaxSendingRateExceededError as exc:
+                if not throttle.slow_down(course_title):
+                    raise exc
+                continue
 
             except SINGLE_EMAIL_FAILURE_ERRORS as exc:
                 # This will fall through and not retry the message.
                 log.warning('Task %s: email with id %s not delivered to %s due to error %s', task_id, email_id, email, exc)
                 dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
-                subtask_status.increment(failed=1)
+                with status_lock:
+                    subtask_status.increment(failed=1)
 
             else:
+                throttle.speed_up()
                 dog_stats_api.increment('course_email.sent', tags=[_statsd_tag(course_title)])
                 if settings.BULK_EMAIL_LOG_SENT_EMAILS:
                     log.info('Email with id %s sent to %s', email_id, email)
                 else:
                     log.debug('Email with id %s sent to %s', email_id, email)
-                subtask_status.increment(succeeded=1)
+                with status_lock:
+                    subtask_status.increment(succeeded=1)
 
             # Pop the user that was emailed off the end of the list only once they have
             # successfully been processed.  (That way, if there were a failure that
             # needed to be retried, the user is still on the list.)
-            to_list.pop()
+            recipients.pop()
+
+    connections = []
+    try:
+        num_connections = max(1, min(settings.BULK_EMAIL_CONNECTIONS_PER_TASK, len(to_list)))
+        for _ in xrange(num_connections):
+            connection = get_connection()
+            connections.append(connection)
+            connection.open()
+
+        num_attempted = subtask_status.attempted
+        start_time = time()
+        try:
+            if num_connections == 1:
+                send_messages(to_list, connections[0], Event())
+            else:
+                _send_in_parallel(send_messages, to_list, connections)
+        finally:
+            _record_send_rate(
+                task_id, course_title, subtask_status.attempted - num_attempted, time() - start_time, num_connections
+            )
 
     except INFINITE_RETRY_ERRORS as exc:
         dog_stats_api.increment('course_email.infinite_retry', tags=[_statsd_tag(course_title)])
@@ -565,7 +702,8 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
         return subtask_status, None
     finally:
         # Clean up at the end.
-        connection.close()
+        for connection in connections:
+            connection.close()
 
 
 def _get_current_task():
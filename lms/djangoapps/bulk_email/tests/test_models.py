@@ -103,6 +103,28 @@ class CourseEmailTemplateTest(TestCase):
         context = self._get_sample_plain_context()
         template.render_plaintext("My new plain text.", context)
 
+    def test_compiled_templates_match_rendering(self):
+        template = CourseEmailTemplate.get_template()
+        context = self._get_sample_html_context()
+        del context['email']
+        compiled_plain = template.compile_plaintext("My new plain text.", context)
+        compiled_html = template.compile_htmltext("My new html text.", context)
+        for name, email in [(u'Robot', 'robot@test.com'), (u'R\xf6b\xf6t {name}', 'robot2@test.com')]:
+            recipient_context = dict(context, name=name, email=email)
+            self.assertEquals(
+                compiled_plain.render({'name': name, 'email': email}),
+                template.render_plaintext("My new plain text.", recipient_context)
+            )
+            self.assertEquals(
+                compiled_html.render({'name': name, 'email': email}),
+                template.render_htmltext("My new html text.", recipient_context)
+            )
+
+    def test_compiled_template_with_formatted_field(self):
+        template = CourseEmailTemplate(plain_template=u"Dear {name!r}, {{message_body}}", html_template=u"")
+        compiled = template.compile_plaintext("Hello.", {})
+        self.assertEquals(compiled.render({'name': u'Robot', 'email': 'robot@test.com'}), u"Dear u'Robot', Hello.")
+
 
 class CourseAuthorizationTest(TestCase):
     """Test the CourseAuthorization model."""
@@ -145,3 +167,22 @@ class CourseAuthorizationTest(TestCase):
 
         # Now, course should STILL be authorized!
         self.assertTrue(CourseAuthorization.instructor_email_enabled(course_id))
+
+    @patch.dict(settings.MITX_FEATURES, {'REQUIRE_COURSE_EMAIL_AUTH': True})
+    def test_enabled_courses_auth_on(self):
+        CourseAuthorization(course_id='abc/123/doremi', email_enabled=True).save()
+        CourseAuthorization(course_id='abc/456/fasola', email_enabled=False).save()
+
+        self.assertEquals(
+            CourseAuthorization.instructor_email_enabled_courses(['abc/123/doremi', 'abc/456/fasola', 'abc/789/tido']),
+            set(['abc/123/doremi'])
+        )
+
+    @patch.dict(settings.MITX_FEATURES, {'REQUIRE_COURSE_EMAIL_AUTH': False})
+    def test_enabled_courses_auth_off(self):
+        CourseAuthorization(course_id='abc/456/fasola', email_enabled=False).save()
+
+        self.assertEquals(
+            CourseAuthorization.instructor_email_enabled_courses(['abc/456/fasola', 'abc/789/tido']),
+            set(['abc/456/fasola', 'abc/789/tido'])
+        )
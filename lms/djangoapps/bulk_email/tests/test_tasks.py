@@ -27,6 +27,7 @@ from celery.states import SUCCESS, FAILURE
 
 from django.conf import settings
 from django.core.management import call_command
+from django.test.utils import override_settings
 
 from bulk_email.models import CourseEmail, Optout, SEND_TO_ALL
 
@@ -372,6 +373,36 @@ class TestBulkEmailInstructorTask(InstructorTaskCourseTestCase):
     def test_retry_after_ses_throttling_error(self):
         self._test_retry_after_unlimited_retry_error(SESMaxSendingRateExceededError(455, "Throttling: Sending rate exceeded"))
 
+    @override_settings(BULK_EMAIL_MAX_DELAY_BETWEEN_SENDS=1)
+    def test_resend_after_throttling_error(self):
+        """Test that throttled emails are sent again more slowly, without retrying the task."""
+        num_emails = 8
+        # We also send email to the instructor:
+        self._create_students(num_emails - 1)
+        with patch('bulk_email.tasks.get_connection', autospec=True) as get_conn:
+            # Every email is throttled once before it goes through.
+            get_conn.return_value.send_messages.side_effect = cycle(
+                [SMTPDataError(455, "Throttling: Sending rate exceeded"), None]
+            )
+            self._test_run_with_task(send_bulk_course_email, 'emailed', num_emails, num_emails)
+
+    @override_settings(BULK_EMAIL_CONNECTIONS_PER_TASK=3)
+    def test_parallel_connections(self):
+        num_emails = settings.BULK_EMAIL_EMAILS_PER_TASK
+        # We also send email to the instructor:
+        self._create_students(num_emails - 1)
+        # have every fourth email fail due to blacklisting:
+        expected_fails = int((num_emails + 3) / 4.0)
+        with patch('bulk_email.tasks.get_connection', autospec=True) as get_conn:
+            get_conn.return_value.send_messages.side_effect = cycle(
+                [SMTPDataError(554, "Email address is blacklisted"), None, None, None]
+            )
+            self._test_run_with_task(
+                send_bulk_course_email, 'emailed', num_emails, num_emails - expected_fails, failed=expected_fails
+            )
+        self.assertEquals(get_conn.call_count, 3)
+        self.assertEquals(get_conn.return_value.close.call_count, 3)
+
     def _test_immediate_failure(self, exception):
         """Test that celery can hit a maximum number of retries."""
         # Doesn't really matter how many recipients, since we expect
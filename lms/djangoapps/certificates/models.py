@@ -129,13 +129,33 @@ def certificate_status_for_student(student, course_id):
     try:
         generated_certificate = GeneratedCertificate.objects.get(
                 user=student, course_id=course_id)
-        d = {'status': generated_certificate.status}
-        if generated_certificate.grade:
-            d['grade'] = generated_certificate.grade
-        if generated_certificate.status == CertificateStatuses.downloadable:
-            d['download_url'] = generated_certificate.download_url
-
-        return d
+        return _certificate_status(generated_certificate)
     except GeneratedCertificate.DoesNotExist:
         pass
     return {'status': CertificateStatuses.unavailable}
+
+
+def certificate_statuses_for_student(student, course_ids):
+    '''
+    Returns a dictionary from each of the `course_ids` to the dictionary that
+    certificate_status_for_student returns for the course, in one query.
+    '''
+    statuses = {course_id: {'status': CertificateStatuses.unavailable} for course_id in course_ids}
+    generated_certificates = GeneratedCertificate.objects.filter(
+        user=student, course_id__in=list(course_ids))
+    for generated_certificate in generated_certificates:
+        statuses[generated_certificate.course_id] = _certificate_status(generated_certificate)
+    return statuses
+
+
+def _certificate_status(generated_certificate):
+    '''
+    Returns the status dictionary of a GeneratedCertificate.
+    '''
+    d = {'status': generated_certificate.status}
+    if generated_certificate.grade:
+        d['grade'] = generated_certificate.grade
+    if generated_certificate.status == CertificateStatuses.downloadable:
+        d['download_url'] = generated_certificate.download_url
+
+    return d
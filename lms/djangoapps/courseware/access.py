@@ -5,17 +5,22 @@ import logging
 from datetime import datetime, timedelta
 from functools import partial
 
+from crum import get_current_request
 from django.conf import settings
-from django.contrib.auth.models import Group
+from django.contrib.auth.models import Group, User
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
 
 from xmodule.course_module import CourseDescriptor
 from xmodule.error_module import ErrorDescriptor
 from xmodule.modulestore import Location
 from xmodule.x_module import XModule, XModuleDescriptor
 
+from course_summaries.models import CourseSummary
 from student.models import CourseEnrollmentAllowed
 from external_auth.models import ExternalAuthMap
 from courseware.masquerade import is_masquerading_as_student
+from request_cache.middleware import RequestCache
 from django.utils.timezone import UTC
 from student.models import CourseEnrollment
 
@@ -49,8 +54,8 @@ def has_access(user, obj, action, course_context=None):
 
     user: a Django user object. May be anonymous.
 
-    obj: The object to check access for.  A module, descriptor, location, or
-                    certain special strings (e.g. 'global')
+    obj: The object to check access for.  A module, descriptor, course summary,
+                    location, or certain special strings (e.g. 'global')
 
     action: A string specifying the action that the client is trying to perform.
 
@@ -66,7 +71,7 @@ def has_access(user, obj, action, course_context=None):
     """
     # delegate the work to type-specific functions.
     # (start with more specific types, then get more general)
-    if isinstance(obj, CourseDescriptor):
+    if isinstance(obj, (CourseDescriptor, CourseSummary)):
         return _has_access_course_desc(user, obj, action)
 
     if isinstance(obj, ErrorDescriptor):
@@ -371,7 +376,74 @@ def _dispatch(table, action, user, obj):
 
 
 def _does_course_group_name_exist(name):
-    return len(Group.objects.filter(name=name)) > 0
+    cache = _access_cache()
+    if cache is None:
+        return len(Group.objects.filter(name=name)) > 0
+
+    exists = cache['groups'].get(name)
+    if exists is None:
+        cache['misses'] += 1
+        exists = cache['groups'][name] = len(Group.objects.filter(name=name)) > 0
+    else:
+        cache['hits'] += 1
+    return exists
+
+
+def _user_group_names(user):
+    """
+    Returns the set of the names of the groups `user` is in, which are the
+    user's roles in courses.  During a request, these are looked up once for
+    each user.
+    """
+    cache = _access_cache()
+    if cache is None:
+        return frozenset(g.name for g in user.groups.all())
+
+    names = cache['user_groups'].get(user.id)
+    if names is None:
+        cache['misses'] += 1
+        names = cache['user_groups'][user.id] = frozenset(g.name for g in user.groups.all())
+    else:
+        cache['hits'] += 1
+    return names
+
+
+def _access_cache():
+    """
+    Returns the dictionary in which the group lookups of access checks are kept
+    for the rest of the current request, or None outside of requests.
+    """
+    if get_current_request() is None:
+        return None
+    data = RequestCache.get_request_cache().data
+    if 'courseware_access' not in data:
+        data['courseware_access'] = {'hits': 0, 'misses': 0, 'user_groups': {}, 'groups': {}}
+    return data['courseware_access']
+
+
+def access_cache_stats():
+    """
+    Returns a dictionary with the number of group lookups of access checks in
+    the current request that were answered from the request cache ('hits'),
+    and the number that were made in the database ('misses').
+    """
+    cache = _access_cache()
+    if cache is None:
+        return {'hits': 0, 'misses': 0}
+    return {'hits': cache['hits'], 'misses': cache['misses']}
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def _clear_access_cache(sender, **kwargs):  # pylint: disable=unused-argument
+    """
+    Forget the group lookups made in this request when groups or their members change.
+    """
+    cache = RequestCache.get_request_cache().data.get('courseware_access')
+    if cache is not None:
+        cache['user_groups'].clear()
+        cache['groups'].clear()
 
 
 def _course_org_staff_group_name(location, course_context=None):
@@ -530,7 +602,7 @@ def _adjust_start_date_for_beta_testers(user, descriptor):
         # bail early if no beta testing is set up
         return descriptor.start
 
-    user_groups = [g.name for g in user.groups.all()]
+    user_groups = _user_group_names(user)
 
     beta_group = course_beta_test_group_name(descriptor.location)
     if beta_group in user_groups:
@@ -577,7 +649,7 @@ def _has_access_to_location(user, location, access_level, course_context):
         return True
 
     # If not global staff, is the user in the Auth group for this class?
-    user_groups = [g.name for g in user.groups.all()]
+    user_groups = _user_group_names(user)
 
     if access_level == 'staff':
         staff_groups = group_names_for_staff(location, course_context) + \
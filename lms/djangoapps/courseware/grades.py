@@ -1,24 +1,57 @@
 # Compute grades using real division, with no integer truncation
 from __future__ import division
 
+import hashlib
+import json
 import random
 import logging
 
 from collections import defaultdict
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
 
-from courseware.model_data import FieldDataCache, DjangoKeyValueStore
+from courseware.model_data import FieldDataCache, DjangoKeyValueStore, chunks
 from xblock.fields import Scope
 from .module_render import get_module, get_module_for_descriptor
 from xmodule import graders
 from xmodule.capa_module import CapaModule
 from xmodule.graders import Score
-from .models import StudentModule
+from xmodule.modulestore.django import course_content_version
+from .models import StudentModule, StudentSectionScore
 
 log = logging.getLogger("mitx.courseware")
 
 
+# Grading plans of the courses graded by this process, keyed by course id and content version
+_GRADING_PLANS = {}
+_MAX_GRADING_PLANS = 100
+
+
+def get_grading_context(course):
+    """
+    Returns course.grading_context, using a compiled grading plan from the
+    process or the Django cache when there is one for the current version of
+    the course, so that the course tree doesn't have to be walked again.
+    """
+    if 'grading_plan' not in course.__dict__ and 'grading_context' not in course.__dict__:
+        version = course_content_version(course.id)
+        if version is not None:
+            key = u"grading_plan/{0}/{1}".format(course.id, version)
+            plan = _GRADING_PLANS.get(key)
+            if plan is None:
+                plan = cache.get(key)
+                if plan is None:
+                    plan = course.compile_grading_plan()
+                    cache.set(key, plan)
+                if len(_GRADING_PLANS) >= _MAX_GRADING_PLANS:
+                    _GRADING_PLANS.clear()
+                _GRADING_PLANS[key] = plan
+            course.grading_plan = plan
+
+    return course.grading_context
+
+
 def yield_module_descendents(module):
     stack = module.get_display_items()
     stack.reverse()
@@ -58,7 +91,7 @@ def yield_problems(request, course, student):
     potentially answered.  (all that student has answered will definitely be in
     the list, but there may be others as well).
     """
-    grading_context = course.grading_context
+    grading_context = get_grading_context(course)
 
     descriptor_locations = (descriptor.location.url() for descriptor in grading_context['all_descriptors'])
     existing_student_modules = set(StudentModule.objects.filter(
@@ -121,7 +154,37 @@ def answer_distributions(request, course):
     return counts
 
 
-def grade(student, request, course, field_data_cache=None, keep_raw_scores=False):
+def _graded_sections(course):
+    """
+    The graded sections of `course`, as entries of grading_context['graded_sections']
+    """
+    return [
+        section
+        for sections in get_grading_context(course)['graded_sections'].itervalues()
+        for section in sections
+    ]
+
+
+def load_section_scores(student, course):
+    """
+    Returns a dict mapping the location urls of the graded sections of
+    `course` to the StudentSectionScores of `student`, ready for grade() to
+    use, or None if MITX_FEATURES['ENABLE_PERSISTENT_SECTION_SCORES'] isn't set.
+
+    This must be called before the student's StudentModules are read, e.g.
+    before building the FieldDataCache passed to grade(), so that scores
+    computed from modules that are regraded meanwhile aren't stored.
+    """
+    if not settings.MITX_FEATURES.get('ENABLE_PERSISTENT_SECTION_SCORES'):
+        return None
+    section_scores = dict(
+        (section_score.section_state_key, section_score)
+        for section_score in StudentSectionScore.objects.filter(student=student, course_id=course.id)
+    )
+    return StudentSectionScore.prepare(student, course.id, _graded_sections(course), section_scores)
+
+
+def grade(student, request, course, field_data_cache=None, keep_raw_scores=False, section_scores=None):
     """
     This grades a student as quickly as possible. It returns the
     output from the course grader, augmented with the final letter
@@ -138,13 +201,54 @@ def grade(student, request, course, field_data_cache=None, keep_raw_scores=False
     - keep_raw_scores : if True, then value for key 'raw_scores' contains scores for every graded module
 
     More information on the format is in the docstring for CourseGrader.
+
+    If MITX_FEATURES['ENABLE_PERSISTENT_SECTION_SCORES'] is set, the scores
+    of each graded section are read from StudentSectionScore, and only missing
+    or stale sections are recomputed. In that case the FieldDataCache is only
+    built if some section has to be recomputed.
+
+    section_scores : the result of load_section_scores(), which must be called
+        before `field_data_cache` is built. If `field_data_cache` is passed
+        without them, every section is recomputed.
     """
+    field_data_caches = [field_data_cache] if field_data_cache is not None else []
 
-    grading_context = course.grading_context
-    raw_scores = []
+    def get_field_data_cache():
+        """Build the FieldDataCache for the graded descriptors on first use"""
+        if not field_data_caches:
+            field_data_caches.append(FieldDataCache(get_grading_context(course)['all_descriptors'], course.id, student))
+        return field_data_caches[0]
+
+    if section_scores is None and field_data_cache is None:
+        section_scores = load_section_scores(student, course)
 
-    if field_data_cache is None:
-        field_data_cache = FieldDataCache(grading_context['all_descriptors'], course.id, student)
+    return _grade(
+        student, request, course, get_field_data_cache, get_field_data_cache, keep_raw_scores, section_scores
+    )
+
+
+def _grade(student, request, course, get_score_cache, get_field_data_cache, keep_raw_scores, stored_scores=None):
+    """
+    Implements grade(), separating the lookup of stored scores from the
+    instantiation of modules.
+
+    get_score_cache: a function returning an object with a FieldDataCache-style
+        `find(key)` method, used to look up the StudentModule for a
+        Scope.user_state key
+    get_field_data_cache: a function returning the FieldDataCache to use when an
+        XModule has to be instantiated. It is only called when a score can't be
+        read from the stored StudentModule.
+    stored_scores: a dict mapping section location urls to the student's
+        StudentSectionScores, or None if persisted section scores aren't used.
+        They must have been read before the StudentModules behind
+        `get_score_cache`. Sections that are missing or stale are recomputed,
+        and stored unless a module of the section changed since the row was
+        read.
+
+    See grade() for a description of the other arguments and the return value.
+    """
+    grading_context = get_grading_context(course)
+    raw_scores = []
 
     totaled_scores = {}
     # This next complicated loop is just to collect the totaled_scores, which is
@@ -155,55 +259,21 @@ def grade(student, request, course, field_data_cache=None, keep_raw_scores=False
             section_descriptor = section['section_descriptor']
             section_name = section_descriptor.display_name_with_default
 
-            should_grade_section = False
-            # If we haven't seen a single problem in the section, we don't have to grade it at all! We can assume 0%
-            for moduledescriptor in section['xmoduledescriptors']:
-                # some problems have state that is updated independently of interaction
-                # with the LMS, so they need to always be scored. (E.g. foldit.)
-                if moduledescriptor.always_recalculate_grades:
-                    should_grade_section = True
-                    break
-
-                # Create a fake key to pull out a StudentModule object from the FieldDataCache
-
-                key = DjangoKeyValueStore.Key(
-                    Scope.user_state,
-                    student.id,
-                    moduledescriptor.location,
-                    None
-                )
-                if field_data_cache.find(key):
-                    should_grade_section = True
-                    break
-
-            if should_grade_section:
-                scores = []
-
-                def create_module(descriptor):
-                    '''creates an XModule instance given a descriptor'''
-                    # TODO: We need the request to pass into here. If we could forego that, our arguments
-                    # would be simpler
-                    return get_module_for_descriptor(student, request, descriptor, field_data_cache, course.id)
-
-                for module_descriptor in yield_dynamic_descriptor_descendents(section_descriptor, create_module):
-
-                    (correct, total) = get_score(course.id, student, module_descriptor, create_module, field_data_cache)
-                    if correct is None and total is None:
-                        continue
-
-                    if settings.GENERATE_PROFILE_SCORES:  	# for debugging!
-                        if total > 1:
-                            correct = random.randrange(max(total - 2, 1), total + 1)
-                        else:
-                            correct = total
-
-                    graded = module_descriptor.graded
-                    if not total > 0:
-                        #We simply cannot grade a problem that is 12/0, because we might need it as a percentage
-                        graded = False
-
-                    scores.append(Score(correct, total, graded, module_descriptor.display_name_with_default))
-
+            if stored_scores is None:
+                scores, _ = _section_scores(student, request, course, section, get_score_cache, get_field_data_cache)
+            else:
+                fingerprint = _section_fingerprint(section)
+                section_score = stored_scores.get(section_descriptor.location.url())
+                if section_score is not None and section_score.is_fresh(fingerprint):
+                    scores = section_score.get_scores()
+                else:
+                    scores, cacheable = _section_scores(
+                        student, request, course, section, get_score_cache, get_field_data_cache
+                    )
+                    if cacheable and section_score is not None:
+                        section_score.store_scores(fingerprint, scores)
+
+            if scores is not None:
                 _, graded_total = graders.aggregate_scores(scores, section_name)
                 if keep_raw_scores:
                     raw_scores += scores
@@ -234,6 +304,217 @@ def grade(student, request, course, field_data_cache=None, keep_raw_scores=False
     return grade_summary
 
 
+def _section_scores(student, request, course, section, get_score_cache, get_field_data_cache):
+    """
+    Compute the scores of `student` on the modules of the graded `section` of
+    `course`, an entry of grading_context['graded_sections'].
+
+    Returns a tuple (scores, cacheable). `scores` is a list of Score, or None if
+    the student hasn't seen a single problem in the section. `cacheable` is
+    False if the scores may change without the student submitting anything, so
+    they must not be persisted.
+    """
+    section_descriptor = section['section_descriptor']
+    score_cache = get_score_cache()
+
+    should_grade_section = False
+    # If we haven't seen a single problem in the section, we don't have to grade it at all! We can assume 0%
+    for moduledescriptor in section['xmoduledescriptors']:
+        # some problems have state that is updated independently of interaction
+        # with the LMS, so they need to always be scored. (E.g. foldit.)
+        if moduledescriptor.always_recalculate_grades:
+            should_grade_section = True
+            break
+
+        # Create a fake key to pull out a StudentModule object from the FieldDataCache
+
+        key = DjangoKeyValueStore.Key(
+            Scope.user_state,
+            student.id,
+            moduledescriptor.location,
+            None
+        )
+        if score_cache.find(key):
+            should_grade_section = True
+            break
+
+    cacheable = not settings.GENERATE_PROFILE_SCORES and not any(
+        moduledescriptor.always_recalculate_grades for moduledescriptor in section['xmoduledescriptors']
+    )
+    if not should_grade_section:
+        return None, cacheable
+
+    scores = []
+
+    def create_module(descriptor):
+        '''creates an XModule instance given a descriptor'''
+        # TODO: We need the request to pass into here. If we could forego that, our arguments
+        # would be simpler
+        return get_module_for_descriptor(student, request, descriptor, get_field_data_cache(), course.id)
+
+    for module_descriptor in yield_dynamic_descriptor_descendents(section_descriptor, create_module):
+        # The children of modules with dynamic children can differ from one
+        # rendering to the next, so their scores can't be persisted
+        if module_descriptor.has_dynamic_children():
+            cacheable = False
+
+        (correct, total) = get_score(course.id, student, module_descriptor, create_module, score_cache)
+        if correct is None and total is None:
+            continue
+
+        if settings.GENERATE_PROFILE_SCORES:  	# for debugging!
+            if total > 1:
+                correct = random.randrange(max(total - 2, 1), total + 1)
+            else:
+                correct = total
+
+        graded = module_descriptor.graded
+        if not total > 0:
+            #We simply cannot grade a problem that is 12/0, because we might need it as a percentage
+            graded = False
+
+        scores.append(Score(correct, total, graded, module_descriptor.display_name_with_default))
+
+    return scores, cacheable
+
+
+def _section_fingerprint(section):
+    """
+    Return a hash of the structure of the graded `section` that its persisted
+    scores depend on, so that they are recomputed when the course is edited,
+    or when settings.PERSISTENT_SECTION_SCORES_GENERATION is bumped.
+    """
+    section_descriptor = section['section_descriptor']
+    structure = [
+        settings.PERSISTENT_SECTION_SCORES_GENERATION,
+        section_descriptor.location.url(),
+        section_descriptor.display_name_with_default,
+    ]
+    structure.extend(
+        (descriptor.location.url(), descriptor.weight, descriptor.graded, descriptor.display_name_with_default)
+        for descriptor in section['xmoduledescriptors']
+    )
+    return hashlib.md5(json.dumps(structure)).hexdigest()
+
+
+class BulkStudentModuleCache(object):
+    """
+    Holds the graded StudentModules of a group of students, loaded with a few
+    bulk queries instead of one FieldDataCache per student.
+
+    Only the columns needed for grading are fetched. `for_student` returns an
+    object with the FieldDataCache `find(key)` interface that `_grade` and
+    `get_score` use to look up stored scores.
+
+    If MITX_FEATURES['ENABLE_PERSISTENT_SECTION_SCORES'] is set, the
+    StudentSectionScores of the students on the graded `sections` are loaded
+    (and prepared) first, so that they are read before the StudentModules.
+    """
+    def __init__(self, course_id, students, descriptors, sections=(), chunk_size=500):
+        self.course_id = course_id
+        self._modules = defaultdict(dict)
+        self._section_scores = None
+
+        student_ids = [student.id for student in students]
+        if settings.MITX_FEATURES.get('ENABLE_PERSISTENT_SECTION_SCORES'):
+            self._section_scores = defaultdict(dict)
+            for student_chunk in chunks(student_ids, chunk_size):
+                section_scores = StudentSectionScore.objects.filter(course_id=course_id, student__in=student_chunk)
+                for section_score in section_scores:
+                    self._section_scores[section_score.student_id][section_score.section_state_key] = section_score
+            for student in students:
+                StudentSectionScore.prepare(student, course_id, sections, self._section_scores[student.id])
+
+        module_state_keys = [descriptor.location.url() for descriptor in descriptors]
+        # Keep the number of query parameters below sqlite's limit of 999
+        for student_chunk in chunks(student_ids, chunk_size // 5):
+            for key_chunk in chunks(module_state_keys, chunk_size):
+                student_modules = StudentModule.objects.filter(
+                    course_id=course_id,
+                    student__in=student_chunk,
+                    module_state_key__in=key_chunk,
+                ).only('student', 'module_state_key', 'grade', 'max_grade')
+                for student_module in student_modules:
+                    self._modules[student_module.student_id][student_module.module_state_key] = student_module
+
+    def for_student(self, student):
+        """
+        Return a `find(key)`-compatible view of the StudentModules of `student`
+        """
+        return _StudentModuleView(self._modules.get(student.id, {}))
+
+    def section_scores_for_student(self, student):
+        """
+        Return a dict mapping section location urls to the StudentSectionScores
+        of `student`, or None if persisted section scores aren't enabled
+        """
+        if self._section_scores is None:
+            return None
+        return self._section_scores.get(student.id, {})
+
+
+class _StudentModuleView(object):
+    """
+    Serves Scope.user_state lookups for a single student out of a BulkStudentModuleCache
+    """
+    def __init__(self, modules):
+        self._modules = modules
+
+    def find(self, key):
+        """
+        Return the StudentModule for the DjangoKeyValueStore.Key `key`, or None
+        """
+        if key.scope != Scope.user_state:
+            return None
+        return self._modules.get(key.block_scope_id.url())
+
+
+def iterate_grades_for(course, students, request, keep_raw_scores=False, chunk_size=100):
+    """
+    Grade many students of `course`, yielding (student, gradeset, err_msg)
+    tuples in the order of `students`. The gradesets are the same as those
+    returned by grade(). If grading a student fails, the error is logged, the
+    gradeset is an empty dict and err_msg describes the failure; otherwise
+    err_msg is an empty string.
+
+    StudentModules are loaded in bulk for `chunk_size` students at a time, and
+    scores are read straight from the stored grade/max_grade columns. A
+    FieldDataCache is only built for a student when one of their modules has to
+    be instantiated (e.g. for `always_recalculate_grades` problems, problems
+    that were never graded, or descriptors with dynamic children).
+
+    request: the request passed through to get_module_for_descriptor. Note that
+        the same request is used for every student.
+    """
+    all_descriptors = get_grading_context(course)['all_descriptors']
+    sections = _graded_sections(course)
+
+    for student_chunk in chunks(students, chunk_size):
+        bulk_cache = BulkStudentModuleCache(course.id, student_chunk, all_descriptors, sections)
+
+        for student in student_chunk:
+            field_data_caches = []
+
+            def get_field_data_cache(student=student, field_data_caches=field_data_caches):
+                """Build the full FieldDataCache for `student` on first use"""
+                if not field_data_caches:
+                    field_data_caches.append(FieldDataCache(all_descriptors, course.id, student))
+                return field_data_caches[0]
+
+            score_cache = bulk_cache.for_student(student)
+            try:
+                gradeset = _grade(
+                    student, request, course, lambda score_cache=score_cache: score_cache, get_field_data_cache,
+                    keep_raw_scores, bulk_cache.section_scores_for_student(student)
+                )
+            except Exception as exc:  # pylint: disable=broad-except
+                # Keep grading the other students, and let the caller decide what to do
+                log.exception("Cannot grade student %s (%s) in course %s", student.username, student.id, course.id)
+                yield student, {}, exc.message or repr(exc)
+            else:
+                yield student, gradeset, ''
+
+
 def grade_for_percentage(grade_cutoffs, percentage):
     """
     Returns a letter grade as defined in grading_policy (e.g. 'A' 'B' 'C' for 6.002x) or None.
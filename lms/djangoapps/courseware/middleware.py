@@ -0,0 +1,48 @@
+"""
+Middleware that saves the student state changed during a request all at once,
+when MITX_FEATURES['ENABLE_STUDENT_STATE_WRITE_BEHIND'] is set.
+"""
+import logging
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.http import HttpResponseServerError
+
+from courseware.model_data import PendingWrites
+
+log = logging.getLogger(__name__)
+
+
+class PendingWritesMiddleware(object):
+    """
+    Defers the writes of student state made through the FieldDataCache until
+    the response is ready, and then flushes them together.
+
+    It must come after django.middleware.transaction.TransactionMiddleware, so
+    that the writes are part of the request's transaction.
+    """
+    def process_request(self, request):
+        if settings.MITX_FEATURES.get('ENABLE_STUDENT_STATE_WRITE_BEHIND'):
+            PendingWrites.start()
+
+    def process_exception(self, request, exception):
+        # The request failed, so its writes are rolled back with everything else
+        PendingWrites.stop()
+
+    def process_response(self, request, response):
+        pending_writes = PendingWrites.stop()
+        if not pending_writes:
+            return response
+
+        # So that either all of the writes are saved, or none are
+        sid = transaction.savepoint() if transaction.is_managed() else None
+        try:
+            pending_writes.flush()
+        except DatabaseError:
+            log.exception('Error saving the student state of %s', request.path)
+            if sid is not None:
+                transaction.savepoint_rollback(sid)
+            return HttpResponseServerError()
+        if sid is not None:
+            transaction.savepoint_commit(sid)
+        return response
@@ -2,11 +2,13 @@
 Classes to provide the LMS runtime data storage to XBlocks
 """
 
+import copy
 import json
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 from itertools import chain
 from .models import (
     StudentModule,
+    StudentModuleHistory,
     XModuleUserStateSummaryField,
     XModuleStudentPrefsField,
     XModuleStudentInfoField
@@ -14,6 +16,9 @@ from .models import (
 import logging
 
 from django.db import DatabaseError
+from django.utils.timezone import now
+
+from request_cache.middleware import RequestCache
 
 from xblock.runtime import KeyValueStore
 from xblock.exceptions import KeyValueMultiSaveError, InvalidScopeError
@@ -21,6 +26,9 @@ from xblock.fields import Scope
 
 log = logging.getLogger(__name__)
 
+# Values of these types can be returned from a shared decoded state as they are
+IMMUTABLE_TYPES = (basestring, int, long, float, bool, type(None))
+
 
 class InvalidWriteError(Exception):
     """
@@ -37,12 +45,134 @@ def chunks(items, chunk_size):
     return (items[i:i + chunk_size] for i in xrange(0, len(items), chunk_size))
 
 
+class PendingWrites(object):
+    """
+    The model data objects changed during a request, which are saved together
+    when the request ends rather than each time they change.
+
+    Writes are only deferred while courseware.middleware.PendingWritesMiddleware
+    has started a PendingWrites for the current request, which it does when
+    MITX_FEATURES['ENABLE_STUDENT_STATE_WRITE_BEHIND'] is set.
+    """
+    REQUEST_CACHE_KEY = 'courseware_pending_writes'
+
+    def __init__(self):
+        # The changed objects, by model class and primary key, in the order they were first changed
+        self._objects = OrderedDict()
+        # Functions to call once the objects have been saved
+        self._callbacks = []
+
+    @classmethod
+    def start(cls):
+        """
+        Start deferring the writes of the current request.
+        """
+        RequestCache.get_request_cache().data[cls.REQUEST_CACHE_KEY] = cls()
+
+    @classmethod
+    def current(cls):
+        """
+        Returns the PendingWrites of the current request, or None if writes
+        aren't being deferred.
+        """
+        return RequestCache.get_request_cache().data.get(cls.REQUEST_CACHE_KEY)
+
+    @classmethod
+    def stop(cls):
+        """
+        Stop deferring the writes of the current request, and return its
+        PendingWrites (or None), whose objects haven't been saved yet.
+        """
+        return RequestCache.get_request_cache().data.pop(cls.REQUEST_CACHE_KEY, None)
+
+    def add(self, field_object):
+        """
+        Save `field_object` when the pending writes are flushed.
+        """
+        self._objects[(type(field_object), field_object.pk)] = field_object
+
+    def discard(self, field_object):
+        """
+        Don't save `field_object`, which is being deleted.
+        """
+        self._objects.pop((type(field_object), field_object.pk), None)
+
+    def after_flush(self, callback):
+        """
+        Call `callback` once the pending objects have been saved.
+        """
+        self._callbacks.append(callback)
+
+    def pending(self, field_object):
+        """
+        Returns the object waiting to be saved to the same row as
+        `field_object`, which has the latest changes to it, or `field_object`
+        if there isn't one.
+        """
+        return self._objects.get((type(field_object), field_object.pk), field_object)
+
+    def __len__(self):
+        return len(self._objects) + len(self._callbacks)
+
+    def flush(self):
+        """
+        Save the pending objects, each with a single UPDATE however many times
+        it was changed, and the history of the StudentModules in one INSERT.
+
+        An object whose row has been deleted since it was loaded, for instance
+        by an instructor resetting the student's attempts, is not saved again.
+        The after_flush() callbacks are called once everything is saved.
+        Raises DatabaseError if saving fails, after which the caller should
+        roll back what was saved.
+        """
+        objects = self._objects.values()
+        self._objects = OrderedDict()
+        callbacks, self._callbacks = self._callbacks, []
+
+        modified = now()
+        history = []
+        for field_object in objects:
+            if isinstance(field_object, StudentModule):
+                values = {
+                    'state': field_object.state,
+                    'grade': field_object.grade,
+                    'max_grade': field_object.max_grade,
+                }
+            else:
+                values = {'value': field_object.value}
+
+            # update() doesn't check first whether the row exists, as save() does
+            updated = type(field_object).objects.filter(pk=field_object.pk).update(modified=modified, **values)
+            if not updated:
+                log.warning('%r was deleted before its changes were saved, dropping them', field_object)
+                continue
+            field_object.modified = modified
+
+            # update() doesn't send post_save, so the history is written here instead
+            if (isinstance(field_object, StudentModule) and
+                    field_object.module_type in StudentModuleHistory.HISTORY_SAVING_TYPES):
+                history.append(StudentModuleHistory(
+                    student_module=field_object,
+                    version=None,
+                    created=modified,
+                    state=field_object.state,
+                    grade=field_object.grade,
+                    max_grade=field_object.max_grade,
+                ))
+
+        if history:
+            StudentModuleHistory.objects.bulk_create(history)
+
+        for callback in callbacks:
+            callback()
+
+
 class FieldDataCache(object):
     """
     A cache of django model objects needed to supply the data
     for a module and its decendants
     """
-    def __init__(self, descriptors, course_id, user, select_for_update=False):
+    def __init__(self, descriptors, course_id, user, select_for_update=False, lazy=True):
         '''
         Find any courseware.models objects that are needed by any descriptor
         in descriptors. Attempts to minimize the number of queries to the database.
@@ -54,17 +184,43 @@ class FieldDataCache(object):
         course_id: The id of the current course
         user: The user for which to cache data
         select_for_update: True if rows should be locked until end of transaction
+        lazy: If True, the objects of each scope are only queried when a field
+            in that scope is first looked up, so scopes that aren't used cost
+            nothing.  Rows that are locked with select_for_update are always
+            queried at once.
         '''
         self.cache = {}
-        self.descriptors = descriptors
+        self.descriptors = []
         self.select_for_update = select_for_update
         self.course_id = course_id
         self.user = user
 
-        if user.is_authenticated():
-            for scope, fields in self._fields_to_cache().items():
-                for field_object in self._retrieve_fields(scope, fields):
-                    self.cache[self._cache_key_from_field_object(scope, field_object)] = field_object
+        # The descriptors and fields of each scope that haven't been queried yet
+        self._pending_descriptors = defaultdict(list)
+        self._pending_fields = defaultdict(set)
+
+        # The decoded state of StudentModules, by cache key, with the string it was decoded from
+        self._decoded_states = {}
+
+        self.add_descriptors(descriptors)
+        if not lazy or select_for_update:
+            for scope in self._pending_fields.keys():
+                self._retrieve_pending(scope)
+
+    def add_descriptors(self, descriptors):
+        """
+        Add `descriptors` to those whose data this cache supplies.  Their objects
+        are queried along with those of the other descriptors that haven't been
+        queried yet.
+        """
+        for descriptor in descriptors:
+            self.descriptors.append(descriptor)
+            scopes = set()
+            for field in descriptor.fields.values():
+                self._pending_fields[field.scope].add(field)
+                scopes.add(field.scope)
+            for scope in scopes:
+                self._pending_descriptors[scope].append(descriptor)
 
     @classmethod
     def cache_for_descriptor_descendents(cls, course_id, user, descriptor, depth=None,
@@ -133,7 +289,25 @@ class FieldDataCache(object):
         )
         return res
 
-    def _retrieve_fields(self, scope, fields):
+    def _retrieve_pending(self, scope):
+        """
+        Query the objects of `scope` for the descriptors and fields that haven't
+        been queried yet, and cache them.
+        """
+        descriptors = self._pending_descriptors.pop(scope, [])
+        fields = self._pending_fields.pop(scope, set())
+        if not fields or not self.user.is_authenticated():
+            return
+
+        pending_writes = PendingWrites.current()
+        for field_object in self._retrieve_fields(scope, fields, descriptors):
+            if pending_writes is not None:
+                # changes made through another cache in this request haven't been saved yet
+                field_object = pending_writes.pending(field_object)
+            # objects created since the cache was made are kept, as they may be in use
+            self.cache.setdefault(self._cache_key_from_field_object(scope, field_object), field_object)
+
+    def _retrieve_fields(self, scope, fields, descriptors):
         """
         Queries the database for all of the fields in the specified scope
         """
@@ -141,7 +315,7 @@ class FieldDataCache(object):
             return self._chunked_query(
                 StudentModule,
                 'module_state_key__in',
-                (descriptor.location.url() for descriptor in self.descriptors),
+                set(descriptor.location.url() for descriptor in descriptors),
                 course_id=self.course_id,
                 student=self.user.pk,
             )
@@ -149,14 +323,14 @@ class FieldDataCache(object):
             return self._chunked_query(
                 XModuleUserStateSummaryField,
                 'usage_id__in',
-                (descriptor.location.url() for descriptor in self.descriptors),
+                set(descriptor.location.url() for descriptor in descriptors),
                 field_name__in=set(field.name for field in fields),
             )
         elif scope == Scope.preferences:
             return self._chunked_query(
                 XModuleStudentPrefsField,
                 'module_type__in',
-                set(descriptor.module_class.__name__ for descriptor in self.descriptors),
+                set(descriptor.module_class.__name__ for descriptor in descriptors),
                 student=self.user.pk,
                 field_name__in=set(field.name for field in fields),
             )
@@ -169,16 +343,6 @@ class FieldDataCache(object):
         else:
             return []
 
-    def _fields_to_cache(self):
-        """
-        Returns a map of scopes to fields in that scope that should be cached
-        """
-        scope_map = defaultdict(set)
-        for descriptor in self.descriptors:
-            for field in descriptor.fields.values():
-                scope_map[field.scope].add(field)
-        return scope_map
-
     def _cache_key_from_kvs_key(self, key):
         """
         Return the key used in the FieldDataCache for the specified KeyValueStore key
@@ -214,8 +378,31 @@ class FieldDataCache(object):
 
         returns the found object, or None if the object doesn't exist
         '''
+        if key.scope in self._pending_fields:
+            self._retrieve_pending(key.scope)
         return self.cache.get(self._cache_key_from_kvs_key(key))
 
+    def get_state(self, key, field_object):
+        '''
+        Returns the decoded state of `field_object`, the StudentModule found for
+        `key`.  The state is only decoded again when it has been changed.
+        The returned dictionary must not be modified.
+        '''
+        cache_key = self._cache_key_from_kvs_key(key)
+        raw_state, state = self._decoded_states.get(cache_key, (None, None))
+        if raw_state is not field_object.state:
+            state = json.loads(field_object.state)
+            self._decoded_states[cache_key] = (field_object.state, state)
+        return state
+
+    def set_state(self, key, field_object, state):
+        '''
+        Encode `state` as the state of `field_object`, the StudentModule found
+        for `key`, and keep it as its decoded state.
+        '''
+        field_object.state = json.dumps(state)
+        self._decoded_states[self._cache_key_from_kvs_key(key)] = (field_object.state, state)
+
     def find_or_create(self, key):
         '''
         Find a model data object in this cache, or create it if it doesn't
@@ -253,10 +440,35 @@ class FieldDataCache(object):
                 student=self.user,
             )
 
+        pending_writes = PendingWrites.current()
+        if pending_writes is not None:
+            field_object = pending_writes.pending(field_object)
+
         cache_key = self._cache_key_from_kvs_key(key)
         self.cache[cache_key] = field_object
         return field_object
 
+    def save(self, field_object):
+        """
+        Save `field_object`, a model data object from this cache, or, if writes
+        are being deferred, have it saved at the end of the request.
+        """
+        pending_writes = PendingWrites.current()
+        if pending_writes is None:
+            field_object.save()
+        else:
+            pending_writes.add(field_object)
+
+    def delete(self, field_object):
+        """
+        Delete `field_object`, a model data object from this cache, along with
+        any of its changes that haven't been saved yet.
+        """
+        pending_writes = PendingWrites.current()
+        if pending_writes is not None:
+            pending_writes.discard(field_object)
+        field_object.delete()
+
 
 class DjangoKeyValueStore(KeyValueStore):
     """
@@ -296,7 +508,9 @@ class DjangoKeyValueStore(KeyValueStore):
             raise KeyError(key.field_name)
 
         if key.scope == Scope.user_state:
-            return json.loads(field_object.state)[key.field_name]
+            value = self._field_data_cache.get_state(key, field_object)[key.field_name]
+            # the decoded state is shared, so it mustn't be changed through mutable values
+            return value if isinstance(value, IMMUTABLE_TYPES) else copy.deepcopy(value)
         else:
             return json.loads(field_object.value)
 
@@ -331,9 +545,9 @@ class DjangoKeyValueStore(KeyValueStore):
 
             # Special case when scope is for the user state, because this scope saves fields in a single row
             if field.scope == Scope.user_state:
-                state = json.loads(field_object.state)
+                state = dict(self._field_data_cache.get_state(field, field_object))
                 state[field.field_name] = kv_dict[field]
-                field_object.state = json.dumps(state)
+                self._field_data_cache.set_state(field, field_object, state)
             else:
             # The remaining scopes save fields on different rows, so
             # we don't have to worry about conflicts
@@ -341,8 +555,9 @@ class DjangoKeyValueStore(KeyValueStore):
 
         for field_object in field_objects:
             try:
-                # Save the field object that we made above
-                field_object.save()
+                # Save the field object that we made above, or have it saved
+                # at the end of the request
+                self._field_data_cache.save(field_object)
                 # If save is successful on this scope, add the saved fields to
                 # the list of successful saves
                 saved_fields.extend([field.field_name for field in field_objects[field_object]])
@@ -359,12 +574,12 @@ class DjangoKeyValueStore(KeyValueStore):
             raise KeyError(key.field_name)
 
         if key.scope == Scope.user_state:
-            state = json.loads(field_object.state)
+            state = dict(self._field_data_cache.get_state(key, field_object))
             del state[key.field_name]
-            field_object.state = json.dumps(state)
-            field_object.save()
+            self._field_data_cache.set_state(key, field_object, state)
+            self._field_data_cache.save(field_object)
         else:
-            field_object.delete()
+            self._field_data_cache.delete(field_object)
 
     def has(self, key):
         if key.scope not in self._allowed_scopes:
@@ -375,6 +590,6 @@ class DjangoKeyValueStore(KeyValueStore):
             return False
 
         if key.scope == Scope.user_state:
-            return key.field_name in json.loads(field_object.state)
+            return key.field_name in self._field_data_cache.get_state(key, field_object)
         else:
             return True
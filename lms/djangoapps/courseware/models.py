@@ -12,10 +12,17 @@ file and check it in at the same time as your model changes. To do that,
 ASSUMPTIONS: modules have unique IDs, even across different module_types
 
 """
+import json
+
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from django.utils.timezone import now
+
+from xmodule.graders import Score
 
 
 class StudentModule(models.Model):
@@ -102,6 +109,165 @@ class StudentModuleHistory(models.Model):
             history_entry.save()
 
 
+class StudentSectionScore(models.Model):
+    """
+    Persisted scores of a student on the modules of a graded section, so that
+    grades.grade() only has to recompute the sections that changed.
+
+    A row is marked stale when one of the modules in its section publishes a
+    new grade, and is ignored when the structure of the section no longer
+    matches the fingerprint it was computed against.
+
+    Every change to a row increments its version, and new scores are only
+    stored if the version hasn't changed since the row was read, so that
+    scores computed before a module of the section was regraded are never
+    stored as fresh.
+    """
+    class Meta:
+        unique_together = (('student', 'section_state_key', 'course_id'),)
+
+    student = models.ForeignKey(User, db_index=True)
+    course_id = models.CharField(max_length=255, db_index=True)
+
+    # Location url of the graded section
+    section_state_key = models.CharField(max_length=255, db_index=True)
+
+    # JSON list of the module_state_keys of the scorable modules in the section
+    module_state_keys = models.TextField(default='[]')
+
+    # Hash of the section structure that the scores were computed against
+    fingerprint = models.CharField(max_length=32)
+
+    # JSON list of [earned, possible, graded, section] for every scored module,
+    # or null if the student hasn't seen any problem in the section
+    scores = models.TextField(null=True, blank=True)
+
+    stale = models.BooleanField(default=False, db_index=True)
+
+    # Incremented by every change to the row
+    version = models.IntegerField(default=0)
+
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+    modified = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __repr__(self):
+        return 'StudentSectionScore<%r>' % ({
+            'course_id': self.course_id,
+            'student_id': self.student_id,
+            'section_state_key': self.section_state_key,
+            'stale': self.stale,
+        },)
+
+    def __unicode__(self):
+        return unicode(repr(self))
+
+    def is_fresh(self, fingerprint):
+        """
+        True if these scores can be used for a section with the given fingerprint
+        """
+        return not self.stale and self.fingerprint == fingerprint
+
+    def get_scores(self):
+        """
+        Return the stored scores as a list of Score, or None if the student
+        hasn't seen any problem in the section
+        """
+        scores = json.loads(self.scores) if self.scores else None
+        if scores is None:
+            return None
+        return [Score(*score) for score in scores]
+
+    @staticmethod
+    def _module_state_keys(section):
+        """
+        The JSON list of the module_state_keys of the scorable modules of `section`
+        """
+        return json.dumps([descriptor.location.url() for descriptor in section['xmoduledescriptors']])
+
+    @classmethod
+    def prepare(cls, student, course_id, sections, section_scores):
+        """
+        Make sure that `section_scores`, a dict mapping section location urls
+        to the rows of `student` that have been read, has a row for each of
+        the graded `sections` (entries of grading_context['graded_sections'])
+        with the modules of the section recorded on it, and return it.
+
+        This must be done before the StudentModules that the scores are
+        computed from are read: missing rows are created, stale, so that a
+        grade published from then on marks them stale, and store_scores()
+        refuses to store scores computed from a StudentModule that was read
+        before it changed.
+        """
+        for section in sections:
+            section_state_key = section['section_descriptor'].location.url()
+            module_state_keys = cls._module_state_keys(section)
+            section_score = section_scores.get(section_state_key)
+            if section_score is None:
+                section_score, _ = cls.objects.get_or_create(
+                    student=student,
+                    course_id=course_id,
+                    section_state_key=section_state_key,
+                    defaults={'module_state_keys': module_state_keys, 'stale': True},
+                )
+                section_scores[section_state_key] = section_score
+            if section_score.module_state_keys != module_state_keys:
+                # The modules of the section have changed
+                cls.objects.filter(pk=section_score.pk).update(module_state_keys=module_state_keys)
+                section_score.module_state_keys = module_state_keys
+        return section_scores
+
+    def store_scores(self, fingerprint, scores):
+        """
+        Persist `scores` (a list of Score, or None) as the fresh scores of the
+        section, if the row hasn't changed since it was read.
+
+        Returns whether the scores were stored.
+        """
+        scores = json.dumps([list(score) for score in scores] if scores is not None else None)
+        stored = type(self).objects.filter(pk=self.pk, version=self.version).update(
+            fingerprint=fingerprint,
+            scores=scores,
+            stale=False,
+            version=F('version') + 1,
+            modified=now(),
+        )
+        if stored:
+            self.fingerprint = fingerprint
+            self.scores = scores
+            self.stale = False
+            self.version += 1
+        return bool(stored)
+
+    @classmethod
+    def mark_stale(cls, student_id, course_id, module_state_key):
+        """
+        Mark the scores of the student's sections that contain the module
+        `module_state_key` as stale.
+
+        Rows that are already stale are changed too, so that scores being
+        computed for them aren't stored.
+        """
+        section_scores = cls.objects.filter(
+            student=student_id, course_id=course_id
+        ).only('module_state_keys')
+        stale_ids = [
+            section_score.id for section_score in section_scores
+            if module_state_key in json.loads(section_score.module_state_keys)
+        ]
+        if stale_ids:
+            cls.objects.filter(id__in=stale_ids).update(stale=True, version=F('version') + 1, modified=now())
+
+    @receiver(post_delete, sender=StudentModule)
+    def invalidate_deleted_module(sender, instance, **kwargs):
+        """
+        Deleting a StudentModule (e.g. when an instructor resets a student's
+        state) changes the scores of the sections that contain it
+        """
+        if not settings.MITX_FEATURES.get('ENABLE_PERSISTENT_SECTION_SCORES'):
+            return
+        StudentSectionScore.mark_stale(instance.student_id, instance.course_id, instance.module_state_key)
+
+
 class XModuleUserStateSummaryField(models.Model):
     """
     Stores data set in the Scope.user_state_summary scope by an xmodule field
@@ -230,5 +396,41 @@ class OfflineComputedGradeLog(models.Model):
     seconds = models.IntegerField(default=0)  	# seconds elapsed for computation
     nstudents = models.IntegerField(default=0)
 
+    # Progress of a computation that is still running.  Logs written before
+    # computations were sharded have no progress (null), and are complete.
+    nprocessed = models.IntegerField(null=True, blank=True)
+    nfailed = models.IntegerField(default=0)
+
     def __unicode__(self):
         return "[OCGLog] %s: %s" % (self.course_id, self.created)
+
+    @property
+    def is_complete(self):
+        """True once every student has been processed"""
+        return self.nprocessed is None or self.nprocessed >= self.nstudents
+
+    @property
+    def students_per_second(self):
+        """Throughput of the computation so far"""
+        nprocessed = self.nstudents if self.nprocessed is None else self.nprocessed
+        return float(nprocessed) / self.seconds if self.seconds else 0.0
+
+    @classmethod
+    def completed(cls, course_id):
+        """Returns a query of the logs of complete computations for `course_id`"""
+        return cls.objects.filter(course_id=course_id).filter(
+            models.Q(nprocessed__isnull=True) | models.Q(nprocessed__gte=models.F('nstudents'))
+        )
+
+    @classmethod
+    def record_progress(cls, log_id, seconds, nsucceeded, nfailed):
+        """
+        Add the results of one shard of students to the log with id `log_id`.
+        Safe to call concurrently from several workers.
+        """
+        cls.objects.filter(pk=log_id).update(
+            nprocessed=models.F('nprocessed') + nsucceeded + nfailed,
+            nfailed=models.F('nfailed') + nfailed,
+        )
+        # The elapsed time only ever grows, so a stale write from a slower worker is harmless
+        cls.objects.filter(pk=log_id, seconds__lt=seconds).update(seconds=seconds)
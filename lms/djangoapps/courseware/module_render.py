@@ -15,6 +15,7 @@ from django.views.decorators.csrf import csrf_exempt
 from requests.auth import HTTPBasicAuth
 from dogapi import dog_stats_api
 
+from capa.safe_exec import SafeExecCache
 from capa.xqueue_interface import XQueueInterface
 from mitxmako.shortcuts import render_to_string
 from xblock.runtime import DbModel
@@ -33,7 +34,8 @@ from student.models import unique_id_for_user
 
 from courseware.access import has_access
 from courseware.masquerade import setup_masquerade
-from courseware.model_data import FieldDataCache, DjangoKeyValueStore
+from courseware.model_data import FieldDataCache, DjangoKeyValueStore, PendingWrites
+from courseware.models import StudentSectionScore
 from xblock.runtime import KeyValueStore
 from xblock.fields import Scope
 from util.sandboxing import can_execute_unsafe_code
@@ -54,6 +56,14 @@ xqueue_interface = XQueueInterface(
     requests_auth,
 )
 
+# Results of running course code, kept in this process in front of the Django cache
+safe_exec_cache = SafeExecCache(
+    cache,
+    max_entries=settings.SAFE_EXEC_CACHE_MAX_ENTRIES,
+    max_result_size=settings.SAFE_EXEC_CACHE_MAX_RESULT_SIZE,
+    max_bytes=settings.SAFE_EXEC_CACHE_MAX_BYTES,
+)
+
 
 def make_track_function(request):
     '''
@@ -315,7 +325,19 @@ def get_module_for_descriptor_internal(user, descriptor, field_data_cache, cours
         student_module.grade = event.get('value')
         student_module.max_grade = event.get('max_value')
         # Save all changes to the underlying KeyValueStore
-        student_module.save()
+        field_data_cache.save(student_module)
+
+        if settings.MITX_FEATURES.get('ENABLE_PERSISTENT_SECTION_SCORES'):
+            # Only the sections containing this module need to be regraded.  If
+            # the grade is only saved at the end of the request, they're marked
+            # stale after that, so that they can't be regraded in between from
+            # the old grade and stored as fresh.
+            mark_stale = partial(StudentSectionScore.mark_stale, user.id, course_id, descriptor.location.url())
+            pending_writes = PendingWrites.current()
+            if pending_writes is None:
+                mark_stale()
+            else:
+                pending_writes.after_flush(mark_stale)
 
         # Bin score into range and increment stats
         score_bucket = get_score_bucket(student_module.grade, student_module.max_grade)
@@ -409,7 +431,7 @@ def get_module_for_descriptor_internal(user, descriptor, field_data_cache, cours
         course_id=course_id,
         open_ended_grading_interface=open_ended_grading_interface,
         s3_interface=s3_interface,
-        cache=cache,
+        cache=safe_exec_cache,
         can_execute_unsafe_code=(lambda: can_execute_unsafe_code(course_id)),
         # TODO: When we merge the descriptor and module systems, we can stop reaching into the mixologist (cpennington)
         mixins=descriptor.runtime.mixologist._mixins,  # pylint: disable=protected-access
@@ -1,10 +1,12 @@
-from mock import Mock
+from mock import Mock, patch
 
+from django.contrib.auth.models import Group
 from django.test import TestCase
 
 from xmodule.modulestore import Location
 import courseware.access as access
-from .factories import CourseEnrollmentAllowedFactory
+from request_cache.middleware import RequestCache
+from .factories import CourseEnrollmentAllowedFactory, UserFactory
 import datetime
 from django.utils.timezone import UTC
 
@@ -106,3 +108,27 @@ class AccessTestCase(TestCase):
 
         # TODO:
         # Non-staff cannot enroll outside the open enrollment period if not specifically allowed
+
+
+@patch('courseware.access.get_current_request', Mock(return_value=Mock()))
+class AccessCacheTestCase(TestCase):
+    """
+    The group lookups of access checks are made once per request.
+    """
+    def setUp(self):
+        RequestCache().clear_request_cache()
+        self.addCleanup(RequestCache().clear_request_cache)
+        self.user = UserFactory.create()
+        self.location = Location('i4x://edX/toy/course/2012_Fall')
+
+    def test_groups_are_looked_up_once(self):
+        with self.assertNumQueries(1):
+            self.assertFalse(access._has_access_to_location(self.user, self.location, 'staff', None))
+            self.assertFalse(access._has_access_to_location(self.user, self.location, 'instructor', None))
+        self.assertEqual(access.access_cache_stats(), {'hits': 1, 'misses': 1})
+
+    def test_group_changes_are_seen(self):
+        self.assertFalse(access._has_access_to_location(self.user, self.location, 'staff', None))
+
+        self.user.groups.add(Group.objects.create(name='staff_edX/toy/2012_Fall'))
+        self.assertTrue(access._has_access_to_location(self.user, self.location, 'staff', None))
@@ -6,8 +6,8 @@ from mock import Mock, patch
 from functools import partial
 
 from courseware.model_data import DjangoKeyValueStore
-from courseware.model_data import InvalidScopeError, FieldDataCache
-from courseware.models import StudentModule, XModuleUserStateSummaryField
+from courseware.model_data import InvalidScopeError, FieldDataCache, PendingWrites
+from courseware.models import StudentModule, StudentModuleHistory, XModuleUserStateSummaryField
 from courseware.models import XModuleStudentInfoField, XModuleStudentPrefsField
 
 from student.tests.factories import UserFactory
@@ -184,6 +184,136 @@ class TestMissingStudentModule(TestCase):
         self.assertFalse(self.kvs.has(user_state_key('a_field')))
 
 
+class TestLazyFieldDataCache(TestCase):
+    """
+    The objects of each scope are queried when a field in that scope is first looked up
+    """
+    def setUp(self):
+        student_module = StudentModuleFactory(state=json.dumps({'a_field': 'a_value', 'b_field': ['b_value']}))
+        self.user = student_module.student
+        self.fields = [
+            mock_field(Scope.user_state, 'a_field'),
+            mock_field(Scope.user_state_summary, 'summary_field'),
+            mock_field(Scope.preferences, 'prefs_field'),
+            mock_field(Scope.user_info, 'info_field'),
+        ]
+
+    def test_scopes_are_queried_when_used(self):
+        with self.assertNumQueries(0):
+            field_data_cache = FieldDataCache([mock_descriptor(self.fields)], course_id, self.user)
+        kvs = DjangoKeyValueStore(field_data_cache)
+
+        with self.assertNumQueries(1):
+            self.assertEquals('a_value', kvs.get(user_state_key('a_field')))
+            self.assertEquals(['b_value'], kvs.get(user_state_key('b_field')))
+        with self.assertNumQueries(1):
+            self.assertFalse(kvs.has(user_info_key('info_field')))
+
+    def test_eager_cache(self):
+        with self.assertNumQueries(4):
+            field_data_cache = FieldDataCache([mock_descriptor(self.fields)], course_id, self.user, lazy=False)
+        with self.assertNumQueries(0):
+            self.assertEquals('a_value', DjangoKeyValueStore(field_data_cache).get(user_state_key('a_field')))
+
+    def test_added_descriptors_are_queried_together(self):
+        other_descriptor = mock_descriptor(self.fields)
+        other_descriptor.location = location('other_id')
+        StudentModuleFactory(student=self.user, module_state_key=location('other_id').url())
+
+        field_data_cache = FieldDataCache([mock_descriptor(self.fields)], course_id, self.user)
+        field_data_cache.add_descriptors([other_descriptor])
+        with self.assertNumQueries(1):
+            self.assertIsNotNone(field_data_cache.find(user_state_key('a_field')))
+            self.assertIsNotNone(field_data_cache.find(
+                DjangoKeyValueStore.Key(Scope.user_state, 'user', location('other_id'), 'a_field')
+            ))
+
+    def test_state_is_decoded_once(self):
+        kvs = DjangoKeyValueStore(FieldDataCache([mock_descriptor(self.fields)], course_id, self.user))
+
+        with patch('courseware.model_data.json.loads', wraps=json.loads) as mock_loads:
+            kvs.get(user_state_key('a_field'))
+            kvs.get(user_state_key('b_field'))
+            self.assertTrue(kvs.has(user_state_key('a_field')))
+        self.assertEquals(mock_loads.call_count, 1)
+
+        # Changing a returned value doesn't change the state
+        kvs.get(user_state_key('b_field')).append('changed')
+        self.assertEquals(['b_value'], kvs.get(user_state_key('b_field')))
+
+        kvs.set(user_state_key('a_field'), 'new_value')
+        self.assertEquals('new_value', kvs.get(user_state_key('a_field')))
+        self.assertEquals('new_value', json.loads(StudentModule.objects.get(student=self.user).state)['a_field'])
+
+
+class TestPendingWrites(TestCase):
+    """
+    While writes are pending, changes are saved when they are flushed
+    """
+    def setUp(self):
+        student_module = StudentModuleFactory(state=json.dumps({'a_field': 'a_value'}))
+        self.user = student_module.student
+        self.fields = [mock_field(Scope.user_state, 'a_field'), mock_field(Scope.preferences, 'prefs_field')]
+        PendingWrites.start()
+        self.addCleanup(PendingWrites.stop)
+
+    def kvs(self):
+        """Returns a DjangoKeyValueStore with a new FieldDataCache"""
+        return DjangoKeyValueStore(FieldDataCache([mock_descriptor(self.fields)], course_id, self.user))
+
+    def test_writes_are_deferred(self):
+        kvs = self.kvs()
+        kvs.set(user_state_key('a_field'), 'new_value')
+        kvs.set(user_state_key('b_field'), 'b_value')
+        kvs.set(prefs_key('prefs_field'), 'prefs_value')
+
+        self.assertEquals({'a_field': 'a_value'}, json.loads(StudentModule.objects.get(student=self.user).state))
+        self.assertEquals(0, StudentModuleHistory.objects.count())
+
+        # One update per row, and one insert for the history
+        with self.assertNumQueries(3):
+            PendingWrites.stop().flush()
+
+        student_module = StudentModule.objects.get(student=self.user)
+        self.assertEquals({'a_field': 'new_value', 'b_field': 'b_value'}, json.loads(student_module.state))
+        self.assertEquals('prefs_value', self.kvs().get(prefs_key('prefs_field')))
+        history = StudentModuleHistory.objects.get(student_module=student_module)
+        self.assertEquals(student_module.state, history.state)
+        self.assertEquals(student_module.modified, history.created)
+
+    def test_callbacks_are_called_after_the_flush(self):
+        self.kvs().set(user_state_key('a_field'), 'new_value')
+        states = []
+        PendingWrites.current().after_flush(
+            lambda: states.append(json.loads(StudentModule.objects.get(student=self.user).state))
+        )
+        self.assertEquals([], states)
+
+        PendingWrites.stop().flush()
+        self.assertEquals([{'a_field': 'new_value'}], states)
+
+    def test_pending_changes_are_seen_by_other_caches(self):
+        self.kvs().set(user_state_key('a_field'), 'new_value')
+        self.assertEquals('new_value', self.kvs().get(user_state_key('a_field')))
+
+    def test_deleted_rows_are_not_saved_again(self):
+        self.kvs().set(user_state_key('a_field'), 'new_value')
+        StudentModule.objects.filter(student=self.user).delete()
+
+        PendingWrites.stop().flush()
+        self.assertFalse(StudentModule.objects.filter(student=self.user).exists())
+        self.assertEquals(0, StudentModuleHistory.objects.count())
+
+    def test_deleted_fields_are_not_saved(self):
+        kvs = self.kvs()
+        kvs.set(prefs_key('prefs_field'), 'prefs_value')
+        kvs.delete(prefs_key('prefs_field'))
+
+        with self.assertNumQueries(0):
+            PendingWrites.stop().flush()
+        self.assertFalse(XModuleStudentPrefsField.objects.exists())
+
+
 class StorageTestBase(object):
     """
     A base class for that gets subclassed when testing each of the scopes.
@@ -3,7 +3,9 @@
 # text processing dependancies
 import json
 from textwrap import dedent
+from mock import patch
 
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.test.client import RequestFactory
 from django.core.urlresolvers import reverse
@@ -12,6 +14,7 @@ from django.test.utils import override_settings
 # Need access to internal func to put users in the right group
 from courseware import grades
 from courseware.model_data import FieldDataCache
+from courseware.models import StudentSectionScore
 
 from xmodule.modulestore.django import modulestore, editable_modulestore
 
@@ -19,6 +22,7 @@ from xmodule.modulestore.django import modulestore, editable_modulestore
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from capa.tests.response_xml_factory import OptionResponseXMLFactory, CustomResponseXMLFactory, SchematicResponseXMLFactory
+from courseware.tests.factories import UserFactory
 from courseware.tests.helpers import LoginEnrollmentTestCase
 from courseware.tests.modulestore_config import TEST_DATA_MIXED_MODULESTORE
 
@@ -234,6 +238,7 @@ class TestCourseGrader(TestSubmittingProblems):
             make up the final grade. (For display)
         """
 
+        section_scores = grades.load_section_scores(self.student_user, self.course)
         field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
             self.course.id, self.student_user, self.course)
 
@@ -241,7 +246,7 @@ class TestCourseGrader(TestSubmittingProblems):
                                         kwargs={'course_id': self.course.id}))
 
         return grades.grade(self.student_user, fake_request,
-                            self.course, field_data_cache)
+                            self.course, field_data_cache, section_scores=section_scores)
 
     def get_progress_summary(self):
         """
@@ -550,6 +555,81 @@ class TestCourseGrader(TestSubmittingProblems):
         self.assertEqual(self.earned_hw_scores(), [1.0, 2.0, 2.0])  # Order matters
         self.assertEqual(self.score_for_hw('homework3'), [1.0, 1.0])
 
+    def test_iterate_grades_for(self):
+        """
+        Test that grading students in bulk gives the same results as grading them one at a time.
+        """
+        self.dropping_setup()
+        self.dropping_homework_stage1()
+        other_student = UserFactory.create()
+
+        fake_request = self.factory.get(reverse('progress',
+                                        kwargs={'course_id': self.course.id}))
+        gradesets = list(grades.iterate_grades_for(self.course, [self.student_user, other_student], fake_request))
+
+        self.assertEqual([student for student, _, _ in gradesets], [self.student_user, other_student])
+        self.assertEqual([err_msg for _, _, err_msg in gradesets], ['', ''])
+        student_gradeset = gradesets[0][1]
+        self.assertEqual(student_gradeset['percent'], 0.75)
+        self.assertEqual(student_gradeset['totaled_scores'], self.get_grade_summary()['totaled_scores'])
+        self.assertEqual(gradesets[1][1]['percent'], 0.0)
+
+    @patch.dict(settings.MITX_FEATURES, {'ENABLE_PERSISTENT_SECTION_SCORES': True})
+    def test_persistent_section_scores(self):
+        """
+        Test that section scores are stored, and regraded when a new grade is published.
+        """
+        self.dropping_setup()
+        self.dropping_homework_stage1()
+
+        self.check_grade_percent(0.75)
+        section_scores = StudentSectionScore.objects.filter(student=self.student_user, course_id=self.course.id)
+        self.assertEqual(section_scores.count(), 3)
+        self.assertFalse(any(section_score.stale for section_score in section_scores))
+
+        # Only the section containing the problem is marked stale
+        self.submit_question_answer(self.hw1_names[1], {'2_1': 'Correct'})
+        stale_scores = section_scores.filter(stale=True)
+        self.assertEqual([s.section_state_key for s in stale_scores], [self.homework1.location.url()])
+
+        self.check_grade_percent(1.0)
+        self.assertEqual(self.earned_hw_scores(), [2.0, 2.0, 0])
+        self.assertFalse(section_scores.filter(stale=True).exists())
+
+    @patch.dict(settings.MITX_FEATURES, {'ENABLE_PERSISTENT_SECTION_SCORES': True})
+    def test_scores_regraded_meanwhile_are_not_stored(self):
+        """
+        Test that scores computed before a new grade was published aren't stored as fresh.
+        """
+        self.dropping_setup()
+        self.dropping_homework_stage1()
+        self.check_grade_percent(0.75)
+
+        section_scores = grades.load_section_scores(self.student_user, self.course)
+        section_score = section_scores[self.homework1.location.url()]
+        self.submit_question_answer(self.hw1_names[1], {'2_1': 'Correct'})
+
+        self.assertFalse(section_score.store_scores(section_score.fingerprint, section_score.get_scores()))
+        self.assertTrue(StudentSectionScore.objects.get(pk=section_score.pk).stale)
+        self.check_grade_percent(1.0)
+
+    @patch.dict(settings.MITX_FEATURES, {'ENABLE_PERSISTENT_SECTION_SCORES': True})
+    def test_persistent_section_scores_generation(self):
+        """
+        Test that section scores stored under an older generation are regraded.
+        """
+        self.dropping_setup()
+        self.dropping_homework_stage1()
+        self.check_grade_percent(0.75)
+
+        # A grade published while persisted scores are disabled isn't tracked
+        with patch.dict(settings.MITX_FEATURES, {'ENABLE_PERSISTENT_SECTION_SCORES': False}):
+            self.submit_question_answer(self.hw1_names[1], {'2_1': 'Correct'})
+        self.check_grade_percent(0.75)
+
+        with override_settings(PERSISTENT_SECTION_SCORES_GENERATION=settings.PERSISTENT_SECTION_SCORES_GENERATION + 1):
+            self.check_grade_percent(1.0)
+
 
 class TestPythonGradedResponse(TestSubmittingProblems):
     """
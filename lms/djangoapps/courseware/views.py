@@ -696,12 +696,15 @@ def progress(request, course_id, student_id=None):
     # additional DB lookup (this kills the Progress page in particular).
     student = User.objects.prefetch_related("groups").get(id=student.id)
 
+    # Read before the student's state, so that grade() can store the scores it recomputes
+    section_scores = grades.load_section_scores(student, course)
+
     field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
         course_id, student, course, depth=None)
 
     courseware_summary = grades.progress_summary(student, request, course,
                                                  field_data_cache)
-    grade_summary = grades.grade(student, request, course, field_data_cache)
+    grade_summary = grades.grade(student, request, course, field_data_cache, section_scores=section_scores)
 
     if courseware_summary is None:
         #This means the student didn't have access to the course (which the instructor requested)
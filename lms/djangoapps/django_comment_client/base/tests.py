@@ -11,6 +11,7 @@ from django.core.management import call_command
 from util.testing import UrlResetMixin
 
 from courseware.tests.modulestore_config import TEST_DATA_MIXED_MODULESTORE
+import comment_client.utils as cc_utils
 from nose.tools import assert_true, assert_equal  # pylint: disable=E0611
 from mock import patch, ANY
 
@@ -18,7 +19,7 @@ log = logging.getLogger(__name__)
 
 
 @override_settings(MODULESTORE=TEST_DATA_MIXED_MODULESTORE)
-@patch('comment_client.utils.requests.request')
+@patch('comment_client.utils.requests.Session.request')
 class ViewsTestCase(UrlResetMixin, ModuleStoreTestCase):
 
     @patch.dict("django.conf.settings.MITX_FEATURES", {"ENABLE_DISCUSSION_SERVICE": True})
@@ -103,6 +104,22 @@ class ViewsTestCase(UrlResetMixin, ModuleStoreTestCase):
         )
         assert_equal(response.status_code, 200)
 
+    @patch.object(cc_utils.settings, 'CACHE_TIMEOUT', 60)
+    def test_write_views_drop_cached_reads(self, mock_request):
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.text = u'{}'
+        generations = cc_utils._generations(self.course_id, self.student.id)
+
+        url = reverse('follow_thread', kwargs={'thread_id': '518d4237b023791dca00000d', 'course_id': self.course_id})
+        response = self.client.post(url)
+        assert_equal(response.status_code, 200)
+
+        # Both the listings of the course and the user's own info are dropped
+        assert_equal(
+            cc_utils._generations(self.course_id, self.student.id),
+            [generation + 1 for generation in generations]
+        )
+
     def test_flag_thread(self, mock_request):
         mock_request.return_value.status_code = 200
         mock_request.return_value.text = u'{"title":"Hello",\
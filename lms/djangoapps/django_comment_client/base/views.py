@@ -50,6 +50,20 @@ def permitted(fn):
     return wrapper
 
 
+def invalidates_cached_reads(fn):
+    """
+    Drops the thread listings of the course and the info of the user that the
+    comment client has cached, once the view has changed them.
+    """
+    @functools.wraps(fn)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return fn(request, *args, **kwargs)
+        finally:
+            cc.utils.invalidate_cached_reads(kwargs['course_id'], request.user.id)
+    return wrapper
+
+
 def ajax_content_response(request, course_id, content, template_name):
     context = {
         'course_id': course_id,
@@ -68,6 +82,7 @@ def ajax_content_response(request, course_id, content, template_name):
 @require_POST
 @login_required
 @permitted
+@invalidates_cached_reads
 def create_thread(request, course_id, commentable_id):
     """
     Given a course and commentble ID, create the thread
@@ -139,6 +154,7 @@ def create_thread(request, course_id, commentable_id):
 @require_POST
 @login_required
 @permitted
+@invalidates_cached_reads
 def update_thread(request, course_id, thread_id):
     """
     Given a course id and thread id, update a existing thread, used for both static and ajax submissions
@@ -192,6 +208,7 @@ def _create_comment(request, course_id, thread_id=None, parent_id=None):
 @require_POST
 @login_required
 @permitted
+@invalidates_cached_reads
 def create_comment(request, course_id, thread_id):
     """
     given a course_id and thread_id, test for comment depth. if not too deep,
@@ -206,6 +223,7 @@ def create_comment(request, course_id, thread_id):
 @require_POST
 @login_required
 @permitted
+@invalidates_cached_reads
 def delete_thread(request, course_id, thread_id):
     """
     given a course_id and thread_id, delete this thread
@@ -219,6 +237,7 @@ def delete_thread(request, course_id, thread_id):
 @require_POST
 @login_required
 @permitted
+@invalidates_cached_reads
 def update_comment(request, course_id, comment_id):
     """
     given a course_id and comment_id, update the comment with payload attributes
@@ -236,6 +255,7 @@ def update_comment(request, course_id, comment_id):
 @require_POST
 @login_required
 @permitted
+@invalidates_cached_reads
 def endorse_comment(request, course_id, comment_id):
     """
     given a course_id and comment_id, toggle the endorsement of this comment,
@@ -250,6 +270,7 @@ def endorse_comment(request, course_id, comment_id):
 @require_POST
 @login_required
 @permitted
+@invalidates_cached_reads
 def openclose_thread(request, course_id, thread_id):
     """
     given a course_id and thread_id, toggle the status of this thread
@@ -268,6 +289,7 @@ def openclose_thread(request, course_id, thread_id):
 @require_POST
 @login_required
 @permitted
+@invalidates_cached_reads
 def create_sub_comment(request, course_id, comment_id):
     """
     given a course_id and comment_id, create a response to a comment
@@ -282,6 +304,7 @@ def create_sub_comment(request, course_id, comment_id):
 @require_POST
 @login_required
 @permitted
+@invalidates_cached_reads
 def delete_comment(request, course_id, comment_id):
     """
     given a course_id and comment_id delete this comment
@@ -295,6 +318,7 @@ def delete_comment(request, course_id, comment_id):
 @require_POST
 @login_required
 @permitted
+@invalidates_cached_reads
 def vote_for_comment(request, course_id, comment_id, value):
     """
     given a course_id and comment_id,
@@ -308,6 +332,7 @@ def vote_for_comment(request, course_id, comment_id, value):
 @require_POST
 @login_required
 @permitted
+@invalidates_cached_reads
 def undo_vote_for_comment(request, course_id, comment_id):
     """
     given a course id and comment id, remove vote
@@ -322,6 +347,7 @@ def undo_vote_for_comment(request, course_id, comment_id):
 @require_POST
 @login_required
 @permitted
+@invalidates_cached_reads
 def vote_for_thread(request, course_id, thread_id, value):
     """
     given a course id and thread id vote for this thread
@@ -336,6 +362,7 @@ def vote_for_thread(request, course_id, thread_id, value):
 @require_POST
 @login_required
 @permitted
+@invalidates_cached_reads
 def flag_abuse_for_thread(request, course_id, thread_id):
     """
     given a course_id and thread_id flag this thread for abuse
@@ -350,6 +377,7 @@ def flag_abuse_for_thread(request, course_id, thread_id):
 @require_POST
 @login_required
 @permitted
+@invalidates_cached_reads
 def un_flag_abuse_for_thread(request, course_id, thread_id):
     """
     given a course id and thread id, remove abuse flag for this thread
@@ -366,6 +394,7 @@ def un_flag_abuse_for_thread(request, course_id, thread_id):
 @require_POST
 @login_required
 @permitted
+@invalidates_cached_reads
 def flag_abuse_for_comment(request, course_id, comment_id):
     """
     given a course and comment id, flag comment for abuse
@@ -380,6 +409,7 @@ def flag_abuse_for_comment(request, course_id, comment_id):
 @require_POST
 @login_required
 @permitted
+@invalidates_cached_reads
 def un_flag_abuse_for_comment(request, course_id, comment_id):
     """
     given a course_id and comment id, unflag comment for abuse
@@ -396,6 +426,7 @@ def un_flag_abuse_for_comment(request, course_id, comment_id):
 @require_POST
 @login_required
 @permitted
+@invalidates_cached_reads
 def undo_vote_for_thread(request, course_id, thread_id):
     """
     given a course id and thread id, remove users vote for thread
@@ -410,6 +441,7 @@ def undo_vote_for_thread(request, course_id, thread_id):
 @require_POST
 @login_required
 @permitted
+@invalidates_cached_reads
 def pin_thread(request, course_id, thread_id):
     """
     given a course id and thread id, pin this thread
@@ -421,6 +453,7 @@ def pin_thread(request, course_id, thread_id):
     return JsonResponse(utils.safe_content(thread.to_dict()))
 
 
+@invalidates_cached_reads
 def un_pin_thread(request, course_id, thread_id):
     """
     given a course id and thread id, remove pin from this thread
@@ -435,6 +468,7 @@ def un_pin_thread(request, course_id, thread_id):
 @require_POST
 @login_required
 @permitted
+@invalidates_cached_reads
 def follow_thread(request, course_id, thread_id):
     user = cc.User.from_django_user(request.user)
     thread = cc.Thread.find(thread_id)
@@ -445,6 +479,7 @@ def follow_thread(request, course_id, thread_id):
 @require_POST
 @login_required
 @permitted
+@invalidates_cached_reads
 def follow_commentable(request, course_id, commentable_id):
     """
     given a course_id and commentable id, follow this commentable
@@ -459,6 +494,7 @@ def follow_commentable(request, course_id, commentable_id):
 @require_POST
 @login_required
 @permitted
+@invalidates_cached_reads
 def follow_user(request, course_id, followed_user_id):
     user = cc.User.from_django_user(request.user)
     followed_user = cc.User.find(followed_user_id)
@@ -469,6 +505,7 @@ def follow_user(request, course_id, followed_user_id):
 @require_POST
 @login_required
 @permitted
+@invalidates_cached_reads
 def unfollow_thread(request, course_id, thread_id):
     """
     given a course id and thread id, stop following this thread
@@ -483,6 +520,7 @@ def unfollow_thread(request, course_id, thread_id):
 @require_POST
 @login_required
 @permitted
+@invalidates_cached_reads
 def unfollow_commentable(request, course_id, commentable_id):
     """
     given a course id and commentable id stop following commentable
@@ -497,6 +535,7 @@ def unfollow_commentable(request, course_id, commentable_id):
 @require_POST
 @login_required
 @permitted
+@invalidates_cached_reads
 def unfollow_user(request, course_id, followed_user_id):
     """
     given a course id and user id, stop following this user
@@ -0,0 +1,195 @@
+"""
+Tests of the helpers through which the comment client calls the comments service.
+"""
+import threading
+
+from django.core.cache import cache
+from django.test import TestCase
+from mock import Mock, call, patch
+
+import comment_client as cc
+import comment_client.utils as cc_utils
+from request_cache.middleware import RequestCache
+
+URL = 'http://localhost:4567/api/v1/threads'
+COURSE_ID = 'edX/toy/2012_Fall'
+
+
+def service_response(text='{"id": 1}', status_code=200):
+    """
+    A response of the comments service
+    """
+    return Mock(text=text, status_code=status_code)
+
+
+class PerformRequestTestCase(TestCase):
+    def setUp(self):
+        RequestCache().clear_request_cache()
+        self.addCleanup(RequestCache().clear_request_cache)
+        patcher = patch.object(cc_utils.get_session(), 'request', return_value=service_response())
+        self.mock_request = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def in_request(self):
+        """
+        Handle the calls made in the block as if they were made by a request
+        """
+        return patch('comment_client.utils.get_current_request', return_value=Mock())
+
+    def test_connections_are_reused(self):
+        cc_utils.perform_request('get', URL)
+        cc_utils.perform_request('post', URL, {'body': 'Hello'})
+        self.assertIs(cc_utils.get_session(), cc_utils.get_session())
+        self.assertEqual(self.mock_request.call_count, 2)
+
+    def test_processes_have_their_own_session(self):
+        session = cc_utils.get_session()
+        with patch('comment_client.utils.os.getpid', return_value=-1):
+            self.assertIsNot(cc_utils.get_session(), session)
+
+    def test_gets_are_coalesced_within_a_request(self):
+        with self.in_request():
+            first = cc_utils.perform_request('get', URL, {'course_id': 'edX/toy/2012_Fall'})
+            second = cc_utils.perform_request('get', URL, {'course_id': 'edX/toy/2012_Fall'})
+            self.assertEqual(self.mock_request.call_count, 1)
+            self.assertEqual(first, {'id': 1})
+            # Callers may change what they're given
+            self.assertEqual(first, second)
+            self.assertIsNot(first, second)
+
+            cc_utils.perform_request('get', URL, {'course_id': 'MITx/6.002x/2012_Fall'})
+            self.assertEqual(self.mock_request.call_count, 2)
+
+    def test_gets_are_not_coalesced_outside_requests(self):
+        cc_utils.perform_request('get', URL)
+        cc_utils.perform_request('get', URL)
+        self.assertEqual(self.mock_request.call_count, 2)
+
+    def test_other_calls_clear_the_memo(self):
+        with self.in_request():
+            cc_utils.perform_request('get', URL)
+            cc_utils.perform_request('post', URL, {'body': 'Hello'})
+            cc_utils.perform_request('get', URL)
+        self.assertEqual([args[0] for args, _ in self.mock_request.call_args_list], ['get', 'post', 'get'])
+
+    def test_errors_are_not_memoized(self):
+        self.mock_request.return_value = service_response('Not found', 404)
+        with self.in_request():
+            for _ in range(2):
+                with self.assertRaises(cc_utils.CommentClientRequestError):
+                    cc_utils.perform_request('get', URL)
+        self.assertEqual(self.mock_request.call_count, 2)
+
+
+@patch.object(cc_utils.settings, 'MAX_CONCURRENT_REQUESTS', 4)
+class PerformConcurrentlyTestCase(TestCase):
+    def setUp(self):
+        RequestCache().clear_request_cache()
+        self.addCleanup(RequestCache().clear_request_cache)
+
+    def test_results_are_in_order(self):
+        threads = []
+
+        def call(result):
+            threads.append(threading.current_thread())
+            return result
+
+        self.assertEqual(cc_utils.perform_concurrently(lambda: call(1), lambda: call(2)), [1, 2])
+        self.assertNotIn(threading.current_thread(), threads)
+
+    def test_exceptions_are_raised(self):
+        def fail():
+            raise cc_utils.CommentClientRequestError('Not found', 404)
+
+        with self.assertRaises(cc_utils.CommentClientRequestError):
+            cc_utils.perform_concurrently(lambda: 1, fail)
+
+    def test_nested_calls_are_made_in_turn(self):
+        def nested():
+            return cc_utils.perform_concurrently(lambda: 1, lambda: 2)
+
+        self.assertEqual(cc_utils.perform_concurrently(nested, nested), [[1, 2], [1, 2]])
+
+    def test_the_memo_of_the_request_is_shared(self):
+        with patch.object(cc_utils.get_session(), 'request', return_value=service_response()) as mock_request:
+            with patch('comment_client.utils.get_current_request', return_value=Mock()):
+                cc_utils.perform_request('get', URL)
+                results = cc_utils.perform_concurrently(
+                    lambda: cc_utils.perform_request('get', URL),
+                    lambda: cc_utils.perform_request('get', URL),
+                )
+        self.assertEqual(results, [{'id': 1}, {'id': 1}])
+        self.assertEqual(mock_request.call_count, 1)
+
+
+@patch.object(cc_utils.settings, 'CACHE_TIMEOUT', 60)
+class CachedReadsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        RequestCache().clear_request_cache()
+        self.addCleanup(RequestCache().clear_request_cache)
+        patcher = patch.object(cc_utils.get_session(), 'request', side_effect=self.respond)
+        self.mock_request = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def respond(self, method, url, **kwargs):
+        """
+        Answer a call to the comments service with a thread listing or a thread
+        """
+        if url == URL:
+            return service_response('{"collection": [{"id": "t1"}], "page": 1, "num_pages": 1}')
+        return service_response('{"id": "t1", "title": "Hello"}')
+
+    def search(self, user_id='1'):
+        """
+        List the threads of the course, as seen by the user with id `user_id`
+        """
+        return cc.Thread.search({'course_id': COURSE_ID, 'user_id': user_id})
+
+    def test_listings_are_reused(self):
+        self.assertEqual(self.search(), ([{'id': 't1'}], 1, 1))
+        self.assertEqual(self.search(), ([{'id': 't1'}], 1, 1))
+        self.assertEqual(self.mock_request.call_count, 1)
+
+        # Every user sees their own listing
+        self.search(user_id='2')
+        self.assertEqual(self.mock_request.call_count, 2)
+
+    def test_changes_drop_the_cached_listings(self):
+        self.search()
+        cc_utils.invalidate_cached_reads(course_id=COURSE_ID)
+        self.search()
+        self.assertEqual(self.mock_request.call_count, 2)
+
+        cc_utils.invalidate_cached_reads(user_id='1')
+        self.search()
+        self.assertEqual(self.mock_request.call_count, 3)
+
+        cc_utils.invalidate_cached_reads(course_id='MITx/6.002x/2012_Fall', user_id='2')
+        self.search()
+        self.assertEqual(self.mock_request.call_count, 3)
+
+    def test_marking_a_thread_as_read_drops_the_listings_of_the_reader(self):
+        self.search(user_id='1')
+        self.search(user_id='2')
+        cc.Thread.find('t1').retrieve(user_id='1', mark_as_read=True)
+        self.assertEqual(self.mock_request.call_count, 3)
+
+        self.search(user_id='1')
+        self.search(user_id='2')
+        self.assertEqual(self.mock_request.call_count, 4)
+
+    def test_hits_and_misses_are_counted(self):
+        with patch('comment_client.utils.dog_stats_api') as mock_stats:
+            self.search()
+            self.search()
+        self.assertEqual(mock_stats.increment.call_args_list, [
+            call('comment_client.cache.miss', tags=['kind:threads']),
+            call('comment_client.cache.hit', tags=['kind:threads']),
+        ])
+
+    def test_nothing_is_cached_without_a_timeout(self):
+        with patch.object(cc_utils.settings, 'CACHE_TIMEOUT', 0):
+            self.search()
+            self.search()
+        self.assertEqual(self.mock_request.call_count, 2)
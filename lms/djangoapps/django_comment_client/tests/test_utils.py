@@ -1,4 +1,5 @@
 from datetime import datetime
+from mock import patch
 from django.core.urlresolvers import reverse
 from django.test import TestCase
 from django.test.utils import override_settings
@@ -64,6 +65,38 @@ class AccessUtilsTestCase(TestCase):
         self.assertFalse(ret)
 
 
+class AnnotatedContentInfoTestCase(TestCase):
+    def setUp(self):
+        self.course_id = 'edX/toy/2012_Fall'
+        self.student = UserFactory(username='student', email='student@edx.org')
+        self.user_info = {'upvoted_ids': ['2'], 'downvoted_ids': [], 'subscribed_thread_ids': ['1']}
+
+    def make_thread(self, thread_id, user_id, closed=False):
+        comment = {'id': thread_id + '0', 'type': 'comment', 'user_id': user_id, 'closed': closed}
+        return {'id': thread_id, 'type': 'thread', 'user_id': user_id, 'closed': closed, 'children': [comment]}
+
+    def test_metadata_for_threads(self):
+        threads = [
+            self.make_thread('1', str(self.student.id)),
+            self.make_thread('2', '12345'),
+            self.make_thread('3', '12345'),
+            self.make_thread('4', '12345', closed=True),
+        ]
+        with patch('django_comment_client.utils.get_ability', wraps=utils.get_ability) as mock_get_ability:
+            metadata = utils.get_metadata_for_threads(self.course_id, threads, self.student, self.user_info)
+
+        # Abilities are only worked out once for each kind of content
+        self.assertEqual(mock_get_ability.call_count, 6)
+        self.assertEqual(len(metadata), 8)
+        for thread in threads:
+            for content in [thread] + thread['children']:
+                info = metadata[content['id']]
+                self.assertEqual(info['ability'], utils.get_ability(self.course_id, content, self.student))
+        self.assertEqual(metadata['1']['subscribed'], True)
+        self.assertEqual(metadata['2']['voted'], 'up')
+        self.assertEqual(metadata['3']['voted'], '')
+
+
 @override_settings(MODULESTORE=TEST_DATA_MONGO_MODULESTORE)
 class CoursewareContextTestCase(ModuleStoreTestCase):
     def setUp(self):
@@ -153,6 +186,20 @@ class CategoryMapTestCase(ModuleStoreTestCase):
             {"entries": {}, "subcategories": {}, "children": []}
         )
 
+    def test_map_is_compiled_once_per_version(self):
+        self.create_discussion("Chapter", "Discussion 1")
+        utils.get_discussion_category_map(self.course)
+
+        with patch('django_comment_client.utils._get_discussion_modules') as mock_get_modules:
+            category_map = utils.get_discussion_category_map(self.course)
+        self.assertFalse(mock_get_modules.called)
+        self.assertEqual(category_map["subcategories"]["Chapter"]["children"], ["Discussion 1"])
+
+        # Adding a discussion changes the content version of the course
+        self.create_discussion("Chapter", "Discussion 2")
+        category_map = utils.get_discussion_category_map(self.course)
+        self.assertItemsEqual(category_map["subcategories"]["Chapter"]["children"], ["Discussion 1", "Discussion 2"])
+
     def test_configured_topics(self):
         self.course.discussion_topics = {
             "Topic A": {"id": "Topic_A"},
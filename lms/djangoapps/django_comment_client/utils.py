@@ -1,25 +1,33 @@
 import pytz
 from collections import defaultdict
+import hashlib
+import json
 import logging
 import urllib
 from datetime import datetime
 
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.db import connection
 from django.http import HttpResponse
 from django.utils import simplejson
 from django_comment_common.models import Role
-from django_comment_client.permissions import check_permissions_by_view
+from django_comment_client.permissions import check_permissions_by_view, check_condition
 
 import mitxmako
 import pystache_custom as pystache
 
-from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.django import modulestore, course_content_version
 from django.utils.timezone import UTC
 
 log = logging.getLogger(__name__)
 
+# Category maps and discussion id maps of the courses served by this process,
+# keyed by course id and content version
+_COMPILED_MAPS = {}
+_MAX_COMPILED_MAPS = 100
+
 
 def extract(dic, keys):
     return {k: dic.get(k) for k in keys}
@@ -74,7 +82,38 @@ def _get_discussion_modules(course):
     return filter(has_required_keys, all_modules)
 
 
+def _get_compiled_map(name, course, compile_map, variant=''):
+    """
+    Returns the result of `compile_map()`, a map of the discussions of
+    `course`, which is kept in the process and the Django cache for the current
+    content version of the course, so that its discussion modules only have to
+    be loaded again once the course has changed.  `variant` tells apart maps
+    that also depend on other settings of the course.
+
+    The returned map is shared, and mustn't be changed.
+    """
+    version = course_content_version(course.id)
+    if version is None:
+        return compile_map()
+
+    key = u"discussion_{0}/{1}/{2}/{3}".format(name, course.id, version, variant)
+    compiled = _COMPILED_MAPS.get(key)
+    if compiled is None:
+        compiled = cache.get(key)
+        if compiled is None:
+            compiled = compile_map()
+            cache.set(key, compiled)
+        if len(_COMPILED_MAPS) >= _MAX_COMPILED_MAPS:
+            _COMPILED_MAPS.clear()
+        _COMPILED_MAPS[key] = compiled
+    return compiled
+
+
 def _get_discussion_id_map(course):
+    return _get_compiled_map('id_map', course, lambda: _compile_discussion_id_map(course))
+
+
+def _compile_discussion_id_map(course):
     def get_entry(module):
         discussion_id = module.discussion_id
         title = module.discussion_target
@@ -135,8 +174,27 @@ def _sort_map_entries(category_map, sort_alpha):
 
 
 def get_discussion_category_map(course):
-    course_id = course.id
+    """
+    Returns the map of the discussion categories of the course that have
+    started.  The complete map is only compiled once for each version of the
+    course, and then filtered by start date each time.
+    """
+    # The configured topics and sort order are course settings, which can be
+    # changed on the descriptor without changing the content version
+    variant = hashlib.md5(
+        json.dumps([course.discussion_topics, course.discussion_sort_alpha], sort_keys=True)
+    ).hexdigest()
+    category_map = _get_compiled_map(
+        'category_map', course, lambda: _compile_discussion_category_map(course), variant
+    )
+    return _filter_unstarted_categories(category_map)
+
 
+def _compile_discussion_category_map(course):
+    """
+    Returns the sorted map of all of the discussion categories of the course,
+    with the start dates of its entries and categories.
+    """
     unexpanded_category_map = defaultdict(list)
 
     modules = _get_discussion_modules(course)
@@ -197,7 +255,7 @@ def get_discussion_category_map(course):
 
     _sort_map_entries(category_map, course.discussion_sort_alpha)
 
-    return _filter_unstarted_categories(category_map)
+    return category_map
 
 
 class JsonResponse(HttpResponse):
@@ -267,32 +325,59 @@ def get_ability(course_id, content, user):
 # TODO: RENAME
 
 
-def get_annotated_content_info(course_id, content, user, user_info):
+def get_shared_ability(course_id, content, user, abilities):
+    """
+    Return get_ability(course_id, content, user), which only depends on the
+    type of the content, whether it's open and whether the user wrote it.  It's
+    kept in `abilities` for other content that's the same in those ways, so
+    annotating many contents only checks each permission a few times.
+    """
+    data = {'content': content}
+    key = (
+        content['type'],
+        check_condition(user, 'is_open', course_id, data),
+        check_condition(user, 'is_author', course_id, data),
+    )
+    if key not in abilities:
+        abilities[key] = get_ability(course_id, content, user)
+    return dict(abilities[key])
+
+
+def get_annotated_content_info(course_id, content, user, user_info, abilities=None):
     """
     Get metadata for an individual content (thread or comment)
+
+    `abilities` is a dictionary in which the user's abilities are shared
+    between contents, as by get_shared_ability.
     """
     voted = ''
     if content['id'] in user_info['upvoted_ids']:
         voted = 'up'
     elif content['id'] in user_info['downvoted_ids']:
         voted = 'down'
+    if abilities is None:
+        ability = get_ability(course_id, content, user)
+    else:
+        ability = get_shared_ability(course_id, content, user, abilities)
     return {
         'voted': voted,
         'subscribed': content['id'] in user_info['subscribed_thread_ids'],
-        'ability': get_ability(course_id, content, user),
+        'ability': ability,
     }
 
 # TODO: RENAME
 
 
-def get_annotated_content_infos(course_id, thread, user, user_info):
+def get_annotated_content_infos(course_id, thread, user, user_info, abilities=None):
     """
     Get metadata for a thread and its children
     """
     infos = {}
+    if abilities is None:
+        abilities = {}
 
     def annotate(content):
-        infos[str(content['id'])] = get_annotated_content_info(course_id, content, user, user_info)
+        infos[str(content['id'])] = get_annotated_content_info(course_id, content, user, user_info, abilities)
         for child in content.get('children', []):
             annotate(child)
     annotate(thread)
@@ -300,10 +385,14 @@ def get_annotated_content_infos(course_id, thread, user, user_info):
 
 
 def get_metadata_for_threads(course_id, threads, user, user_info):
-    def infogetter(thread):
-        return get_annotated_content_infos(course_id, thread, user, user_info)
-
-    metadata = reduce(merge_dict, map(infogetter, threads), {})
+    """
+    Get metadata for the threads and their children, in one pass that shares
+    the user's abilities between them.
+    """
+    metadata = {}
+    abilities = {}
+    for thread in threads:
+        metadata.update(get_annotated_content_infos(course_id, thread, user, user_info, abilities))
     return metadata
 
 # put this method in utils.py to avoid circular import dependency between helpers and mustache_helpers
@@ -8,14 +8,24 @@ from courseware.courses import get_course_by_id
 from xmodule.modulestore.django import modulestore
 
 from django.core.management.base import BaseCommand
+from optparse import make_option
 
 
 class Command(BaseCommand):
     help = "Compute grades for all students in a course, and store result in DB.\n"
-    help += "Usage: compute_grades course_id_or_dir \n"
+    help += "Usage: compute_grades course_id_or_dir [--processes N]\n"
     help += "   course_id_or_dir: either course_id or course_dir\n"
+    help += "   N: number of worker processes to grade with (default 1)\n"
     help += 'Example course_id: MITx/8.01rq_MW/Classical_Mechanics_Reading_Questions_Fall_2012_MW_Section'
 
+    option_list = BaseCommand.option_list + (
+        make_option('--processes',
+                    dest='processes',
+                    type='int',
+                    default=1,
+                    help='Number of worker processes to grade with'),
+    )
+
     def handle(self, *args, **options):
 
         print "args = ", args
@@ -40,4 +50,4 @@ class Command(BaseCommand):
         print "-----------------------------------------------------------------------------"
         print "Computing grades for %s" % (course.id)
 
-        offline_grade_calculation(course.id)
+        offline_grade_calculation(course.id, processes=options['processes'])
@@ -6,12 +6,31 @@
 # The grades are stored in the OfflineComputedGrade table of the courseware model.
 
 import json
+import multiprocessing
 import time
 
+from celery import task
+from celery.states import SUCCESS, FAILURE
+from celery.utils.log import get_task_logger
+
 from json import JSONEncoder
 from courseware import grades, models
 from courseware.courses import get_course_by_id
+from courseware.model_data import chunks
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import close_connection, transaction
+
+from instructor_task.models import InstructorTask
+from instructor_task.subtasks import (
+    SubtaskStatus,
+    queue_subtasks_for_query,
+    check_subtask_is_valid,
+    update_subtask_status,
+)
+from xmodule.modulestore.django import modulestore
+
+log = get_task_logger(__name__)
 
 
 class MyEncoder(JSONEncoder):
@@ -25,58 +44,252 @@ class MyEncoder(JSONEncoder):
             yield chunk
 
 
-def offline_grade_calculation(course_id):
+class DummyRequest(object):
+    """
+    Stands in for the request that grading passes to get_module_for_descriptor.
+    The same request is used to grade every student, so it isn't tied to any one of them.
+    """
+    META = {}
+
+    def __init__(self):
+        self.user = None
+        self.session = {}
+
+    def get_host(self):
+        return 'edx.mit.edu'
+
+    def is_secure(self):
+        return False
+
+
+def _enrolled_students(course_id):
     '''
-    Compute grades for all students for a specified course, and save results to the DB.
+    Returns a query of the students actively enrolled in the specified course.
     '''
-
-    tstart = time.time()
-    enrolled_students = User.objects.filter(
+    return User.objects.filter(
         courseenrollment__course_id=course_id,
         courseenrollment__is_active=1
-    ).prefetch_related("groups").order_by('username')
+    )
+
+
+@transaction.commit_on_success
+def _store_offline_grades(course_id, offline_grades):
+    '''
+    Replace the OfflineComputedGrades of the students in `offline_grades` with
+    a bulk delete and a bulk insert, rather than a get_or_create and a save per student.
+    '''
+    for grades_chunk in chunks(offline_grades, 500):
+        models.OfflineComputedGrade.objects.filter(
+            course_id=course_id,
+            user__in=[offline_grade.user_id for offline_grade in grades_chunk],
+        ).delete()
+        models.OfflineComputedGrade.objects.bulk_create(grades_chunk)
+
 
+def compute_offline_grades(course, students):
+    '''
+    Compute grades for `students` in `course`, and save results to the DB.
+
+    Returns a tuple (number of students graded, number of students that could not be graded).
+    '''
     enc = MyEncoder()
+    offline_grades = []
+    nfailed = 0
+    for student, gradeset, err_msg in grades.iterate_grades_for(course, students, DummyRequest(), keep_raw_scores=True):
+        if err_msg:
+            nfailed += 1
+            continue
+        offline_grades.append(
+            models.OfflineComputedGrade(user=student, course_id=course.id, gradeset=enc.encode(gradeset))
+        )
+
+    _store_offline_grades(course.id, offline_grades)
+    return len(offline_grades), nfailed
+
+
+def _compute_offline_grades_for_shard(course_id, student_ids, log_id, tstart, course=None):
+    '''
+    Compute and store grades for the students with ids `student_ids`, and record
+    the progress in the OfflineComputedGradeLog with id `log_id`.
+
+    The course is loaded unless a CourseDescriptor is passed in as `course`.
+    If the shard can't be graded at all, its students are recorded as failed,
+    so that the computation can still complete, and the exception is re-raised.
+    '''
+    try:
+        # The modules of the course are loaded once for the whole shard
+        with modulestore().read_batch():
+            if course is None:
+                course = get_course_by_id(course_id)
+            students = User.objects.filter(pk__in=student_ids).prefetch_related("groups").order_by('username')
+            nsucceeded, nfailed = compute_offline_grades(course, students)
+    except Exception:
+        models.OfflineComputedGradeLog.record_progress(log_id, int(time.time() - tstart), 0, len(student_ids))
+        raise
+    models.OfflineComputedGradeLog.record_progress(log_id, int(time.time() - tstart), nsucceeded, nfailed)
+    return nsucceeded, nfailed
+
+
+def _compute_offline_grades_for_shard_in_pool(args):
+    '''
+    multiprocessing entry point: unpacks the arguments of _compute_offline_grades_for_shard.
+
+    A shard that fails is logged and counted as failed, rather than stopping
+    the grading of the other shards.
+    '''
+    try:
+        return _compute_offline_grades_for_shard(*args)
+    except Exception:
+        log.exception("Offline grade shard for course %s failed unexpectedly!", args[0])
+        return 0, len(args[1])
 
-    class DummyRequest(object):
-        META = {}
-        def __init__(self):
-            return
-        def get_host(self):
-            return 'edx.mit.edu'
-        def is_secure(self):
-            return False
-
-    print "%d enrolled students" % len(enrolled_students)
-    course = get_course_by_id(course_id)
-
-    for student in enrolled_students:
-        request = DummyRequest()
-        request.user = student
-        request.session = {}
-
-        gradeset = grades.grade(student, request, course, keep_raw_scores=True)
-        gs = enc.encode(gradeset)
-        ocg, created = models.OfflineComputedGrade.objects.get_or_create(user=student, course_id=course_id)
-        ocg.gradeset = gs
-        ocg.save()
-        print "%s done" % student  	# print statement used because this is run by a management command
-
-    tend = time.time()
-    dt = tend - tstart
-
-    ocgl = models.OfflineComputedGradeLog(course_id=course_id, seconds=dt, nstudents=len(enrolled_students))
+
+def offline_grade_calculation(course_id, processes=1):
+    '''
+    Compute grades for all students for a specified course, and save results to the DB.
+
+    The enrolled students are split into shards of settings.OFFLINE_GRADES_STUDENTS_PER_TASK
+    students, which are graded by a pool of `processes` local worker processes.  Progress
+    is recorded in an OfflineComputedGradeLog as each shard completes.
+    '''
+
+    tstart = time.time()
+    student_ids = list(_enrolled_students(course_id).order_by('pk').values_list('pk', flat=True))
+    nstudents = len(student_ids)
+
+    print "%d enrolled students" % nstudents
+
+    ocgl = models.OfflineComputedGradeLog(course_id=course_id, nstudents=nstudents, nprocessed=0)
     ocgl.save()
-    print ocgl
+
+    shards = [
+        (course_id, shard, ocgl.id, tstart)
+        for shard in chunks(student_ids, settings.OFFLINE_GRADES_STUDENTS_PER_TASK)
+    ]
+    if processes > 1:
+        # Forked workers must each open their own database connection,
+        # rather than sharing the parent's.
+        close_connection()
+        pool = multiprocessing.Pool(processes, initializer=close_connection)
+        results = pool.imap_unordered(_compute_offline_grades_for_shard_in_pool, shards)
+    else:
+        pool = None
+        course = get_course_by_id(course_id)
+        results = (_compute_offline_grades_for_shard_in_pool(shard + (course,)) for shard in shards)
+
+    try:
+        for _ in results:
+            ocgl = models.OfflineComputedGradeLog.objects.get(pk=ocgl.id)
+            # print statement used because this is run by a management command
+            print "%d/%d students done, %d failed (%.1f students/sec)" % (
+                ocgl.nprocessed, ocgl.nstudents, ocgl.nfailed, ocgl.students_per_second
+            )
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    models.OfflineComputedGradeLog.objects.filter(pk=ocgl.id).update(seconds=int(time.time() - tstart))
+    print models.OfflineComputedGradeLog.objects.get(pk=ocgl.id)
     print "All Done!"
 
 
+def perform_delegate_offline_grade_batches(entry_id, course_id, _task_input, action_name):
+    '''
+    Queues subtasks that each compute the grades of a shard of no more than
+    settings.OFFLINE_GRADES_STUDENTS_PER_TASK of the students enrolled in the course.
+
+    If no students are enrolled, an empty OfflineComputedGradeLog is written and
+    the task completes without queuing any subtasks.
+    '''
+    entry = InstructorTask.objects.get(pk=entry_id)
+
+    # As for bulk email, a requeued parent task must not queue its subtasks again.
+    if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+        log.warning("Task %s has already been processed for course %s!  InstructorTask = %s",
+                    entry.task_id, course_id, entry)
+        return json.loads(entry.task_output)
+
+    # Make sure the course exists before queuing any work.
+    get_course_by_id(course_id)
+
+    tstart = time.time()
+    student_qset = _enrolled_students(course_id)
+    nstudents = student_qset.count()
+    ocgl = models.OfflineComputedGradeLog(course_id=course_id, nstudents=nstudents, nprocessed=0)
+    ocgl.save()
+
+    if nstudents == 0:
+        # There are no subtasks to queue, so the computation is already complete.
+        task_progress = {
+            'action_name': action_name,
+            'attempted': 0,
+            'failed': 0,
+            'skipped': 0,
+            'succeeded': 0,
+            'total': 0,
+            'duration_ms': int((time.time() - tstart) * 1000),
+            'start_time': tstart,
+        }
+        entry.task_output = InstructorTask.create_output_for_success(task_progress)
+        entry.task_state = SUCCESS
+        entry.save_now()
+        return task_progress
+
+    def _create_offline_grades_subtask(student_list, initial_subtask_status):
+        """Creates a subtask to compute the grades of a given list of students."""
+        return compute_offline_grades_subtask.subtask(
+            (
+                entry_id,
+                course_id,
+                [student['pk'] for student in student_list],
+                ocgl.id,
+                tstart,
+                initial_subtask_status.to_dict(),
+            ),
+            task_id=initial_subtask_status.task_id,
+        )
+
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        _create_offline_grades_subtask,
+        student_qset,
+        [],
+        settings.OFFLINE_GRADES_STUDENTS_PER_QUERY,
+        settings.OFFLINE_GRADES_STUDENTS_PER_TASK,
+    )
+
+
+@task  # pylint: disable=E1102
+def compute_offline_grades_subtask(entry_id, course_id, student_ids, log_id, tstart, subtask_status_dict):
+    '''
+    Computes and stores the grades of the students with ids `student_ids`, as a
+    subtask of the InstructorTask with id `entry_id`.
+    '''
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    try:
+        nsucceeded, nfailed = _compute_offline_grades_for_shard(course_id, student_ids, log_id, tstart)
+    except Exception:
+        log.exception("Offline grade subtask %s for course %s: failed unexpectedly!", current_task_id, course_id)
+        subtask_status.increment(failed=len(student_ids), state=FAILURE)
+        update_subtask_status(entry_id, current_task_id, subtask_status)
+        raise
+
+    subtask_status.increment(succeeded=nsucceeded, failed=nfailed, state=SUCCESS)
+    update_subtask_status(entry_id, current_task_id, subtask_status)
+    return subtask_status.to_dict()
+
+
 def offline_grades_available(course_id):
     '''
     Returns False if no offline grades available for specified course.
     Otherwise returns latest log field entry about the available pre-computed grades.
     '''
-    ocgl = models.OfflineComputedGradeLog.objects.filter(course_id=course_id)
+    ocgl = models.OfflineComputedGradeLog.completed(course_id)
     if not ocgl:
         return False
     return ocgl.latest('created')
@@ -1135,7 +1135,13 @@ def get_student_grade_summary_data(request, course, course_id, get_grades=True,
     datatable = {'header': header, 'assignments': assignments, 'students': enrolled_students}
     data = []
 
-    for student in enrolled_students:
+    if get_grades and not use_offline:
+        # Grade the students in bulk, rather than building a FieldDataCache for each of them
+        student_gradesets = grades.iterate_grades_for(course, enrolled_students, request, keep_raw_scores=get_raw_scores)
+    else:
+        student_gradesets = ((student, None, '') for student in enrolled_students)
+
+    for student, gradeset, err_msg in student_gradesets:
         datarow = [student.id, student.username, student.profile.name, student.email]
         try:
             datarow.append(student.externalauthmap.external_email)
@@ -1143,7 +1149,9 @@ def get_student_grade_summary_data(request, course, course_id, get_grades=True,
             datarow.append('')
 
         if get_grades:
-            gradeset = student_grades(student, request, course, keep_raw_scores=get_raw_scores, use_offline=use_offline)
+            if gradeset is None or err_msg:
+                # fall back to grading the student on their own, so errors surface as they used to
+                gradeset = student_grades(student, request, course, keep_raw_scores=get_raw_scores, use_offline=use_offline)
             log.debug('student={0}, gradeset={1}'.format(student, gradeset))
             if get_raw_scores:
                 # TODO (ichuang) encode Score as dict instead of as list, so score[0] -> score['earned']
@@ -1248,6 +1256,8 @@ def _do_enroll_students(course, course_id, students, overload=False, auto_enroll
              'course_url': 'https://' + stripped_site_name + '/courses/' + course_id,
              }
 
+    enrolled = CourseEnrollment.is_enrolled_many(User.objects.filter(email__in=new_students), course_id)
+
     for student in new_students:
         try:
             user = User.objects.get(email=student)
@@ -1281,7 +1291,7 @@ def _do_enroll_students(course, course_id, students, overload=False, auto_enroll
             continue
 
         #Student has already registered
-        if CourseEnrollment.is_enrolled(user, course_id):
+        if enrolled.get(user.id):
             status[student] = 'already enrolled'
             continue
 
@@ -1334,6 +1344,8 @@ def _do_unenroll_students(course_id, students, email_students=False):
         d = {'site_name': stripped_site_name,
              'course': course}
 
+    enrolled = CourseEnrollment.is_enrolled_many(User.objects.filter(email__in=old_students), course_id)
+
     for student in old_students:
 
         isok = False
@@ -1358,7 +1370,7 @@ def _do_unenroll_students(course_id, students, email_students=False):
             continue
 
         #Will be 0 or 1 records as there is a unique key on user + course_id
-        if CourseEnrollment.is_enrolled(user, course_id):
+        if enrolled.get(user.id):
             try:
                 CourseEnrollment.unenroll(user, course_id)
                 status[student] = "un-enrolled"
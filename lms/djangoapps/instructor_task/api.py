@@ -16,7 +16,8 @@ from instructor_task.models import InstructorTask
 from instructor_task.tasks import (rescore_problem,
                                    reset_problem_attempts,
                                    delete_problem_state,
-                                   send_bulk_course_email)
+                                   send_bulk_course_email,
+                                   calculate_offline_grades)
 
 from instructor_task.api_helper import (check_arguments_for_rescoring,
                                         encode_problem_and_student_input,
@@ -206,3 +207,27 @@ def submit_bulk_course_email(request, course_id, email_id):
     # create the key value by using MD5 hash:
     task_key = hashlib.md5(task_key_stub).hexdigest()
     return submit_task(request, task_type, task_class, course_id, task_input, task_key)
+
+
+def submit_calculate_offline_grades(request, course_id):
+    """
+    Request to have the grades of all students enrolled in a course computed
+    and stored as a background task.
+
+    The grades are stored as OfflineComputedGrades, for use by the instructor
+    dashboard's grade downloads.
+
+    AlreadyRunningError is raised if the grades of the course are already being computed.
+
+    This method makes sure the InstructorTask entry is committed.
+    When called from any view that is wrapped by TransactionMiddleware,
+    and thus in a "commit-on-success" transaction, an autocommit buried within here
+    will cause any pending transaction to be committed by a successful
+    save here.  Any future database operations will take place in a
+    separate transaction.
+    """
+    task_type = 'calculate_offline_grades'
+    task_class = calculate_offline_grades
+    task_input = {}
+    task_key = ""
+    return submit_task(request, task_type, task_class, course_id, task_input, task_key)
@@ -31,6 +31,7 @@ from instructor_task.tasks_helper import (
     delete_problem_module_state,
 )
 from bulk_email.tasks import perform_delegate_email_batches
+from instructor.offline_gradecalc import perform_delegate_offline_grade_batches
 
 
 @task(base=BaseInstructorTask)  # pylint: disable=E1102
@@ -127,3 +128,23 @@ def send_bulk_course_email(entry_id, _xmodule_instance_args):
     action_name = ugettext_noop('emailed')
     visit_fcn = perform_delegate_email_batches
     return run_main_task(entry_id, visit_fcn, action_name)
+
+
+@task(base=BaseInstructorTask)  # pylint: disable=E1102
+def calculate_offline_grades(entry_id, _xmodule_instance_args):
+    """Computes and stores the grades of all students enrolled in a course.
+
+    `entry_id` is the id value of the InstructorTask entry that corresponds to this task.
+    The entry contains the `course_id` that identifies the course.  No other `task_input`
+    is needed.
+
+    The enrolled students are split among subtasks, which store the grades as
+    OfflineComputedGrades and record their progress in an OfflineComputedGradeLog.
+
+    `_xmodule_instance_args` provides information needed by _get_module_instance_for_task()
+    to instantiate an xmodule instance.  This is unused here.
+    """
+    # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
+    action_name = ugettext_noop('graded')
+    visit_fcn = perform_delegate_offline_grade_batches
+    return run_main_task(entry_id, visit_fcn, action_name)
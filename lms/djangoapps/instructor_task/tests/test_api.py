@@ -15,6 +15,7 @@ from instructor_task.api import (
     submit_reset_problem_attempts_for_all_students,
     submit_delete_problem_state_for_all_students,
     submit_bulk_course_email,
+    submit_calculate_offline_grades,
 )
 
 from instructor_task.api_helper import AlreadyRunningError
@@ -183,3 +184,14 @@ class InstructorTaskCourseSubmitTest(InstructorTaskCourseTestCase):
 
         with self.assertRaises(AlreadyRunningError):
             instructor_task = submit_bulk_course_email(self.create_task_request(self.instructor), self.course.id, email_id)
+
+    def test_submit_calculate_offline_grades(self):
+        instructor_task = submit_calculate_offline_grades(self.create_task_request(self.instructor), self.course.id)
+
+        # test resubmitting, by updating the existing record:
+        instructor_task = InstructorTask.objects.get(id=instructor_task.id)  # pylint: disable=E1101
+        instructor_task.task_state = PROGRESS
+        instructor_task.save()
+
+        with self.assertRaises(AlreadyRunningError):
+            instructor_task = submit_calculate_offline_grades(self.create_task_request(self.instructor), self.course.id)
@@ -14,10 +14,12 @@ from celery.states import SUCCESS, FAILURE
 
 from xmodule.modulestore.exceptions import ItemNotFoundError
 
-from courseware.models import StudentModule
+from courseware.models import OfflineComputedGradeLog, StudentModule
 from courseware.tests.factories import StudentModuleFactory
+from student.models import CourseEnrollment
 from student.tests.factories import UserFactory, CourseEnrollmentFactory
 
+from instructor.offline_gradecalc import perform_delegate_offline_grade_batches
 from instructor_task.models import InstructorTask
 from instructor_task.tests.test_base import InstructorTaskModuleTestCase
 from instructor_task.tests.factories import InstructorTaskFactory
@@ -437,3 +439,25 @@ class TestDeleteStateInstructorTask(TestInstructorTasks):
                 StudentModule.objects.get(course_id=self.course.id,
                                           student=student,
                                           module_state_key=self.problem_url)
+
+
+class TestOfflineGradesInstructorTask(TestInstructorTasks):
+    """Tests the task that delegates the computation of offline grades to subtasks."""
+
+    def test_no_enrolled_students(self):
+        CourseEnrollment.objects.filter(course_id=self.course.id).update(is_active=False)
+        entry = self._create_input_entry(use_problem_url=False)
+
+        with patch('instructor.offline_gradecalc.queue_subtasks_for_query') as mock_queue:
+            progress = perform_delegate_offline_grade_batches(entry.id, self.course.id, {}, 'graded')
+        self.assertFalse(mock_queue.called)
+        self.assertEqual(progress['total'], 0)
+        self.assertEqual(progress['attempted'], 0)
+
+        entry = InstructorTask.objects.get(id=entry.id)
+        self.assertEqual(entry.task_state, SUCCESS)
+        self.assertEqual(json.loads(entry.task_output), progress)
+
+        ocgl = OfflineComputedGradeLog.objects.get(course_id=self.course.id)
+        self.assertEqual(ocgl.nstudents, 0)
+        self.assertTrue(ocgl.is_complete)
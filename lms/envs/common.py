@@ -66,6 +66,11 @@ MITX_FEATURES = {
     # course_ids (see dev_int.py for an example)
     'SUBDOMAIN_COURSE_LISTINGS': False,
 
+    # When True, course listings and the dashboard show course summaries, which
+    # are kept in the database, rather than loading every course from the
+    # modulestore.  Run the update_course_summaries command when turning it on.
+    'USE_COURSE_SUMMARIES': False,
+
     # When True, will override certain branding with university specific values
     # Expects a SUBDOMAIN_BRANDING dictionary that maps the subdomain to the
     # university to use for branding purposes
@@ -194,6 +199,16 @@ MITX_FEATURES = {
     # Disable instructor dash buttons for downloading course data
     # when enrollment exceeds this number
     'MAX_ENROLLMENT_INSTR_BUTTONS': 200,
+
+    # Persist the scores of each graded section, so that grading a student only
+    # recomputes the sections in which a new grade was published. Rows written
+    # while this is enabled are not invalidated once it is turned off, so bump
+    # PERSISTENT_SECTION_SCORES_GENERATION when turning it back on.
+    'ENABLE_PERSISTENT_SECTION_SCORES': False,
+
+    # Save the student state changed during a request together at the end of
+    # the request, rather than each time a module saves it.
+    'ENABLE_STUDENT_STATE_WRITE_BEHIND': False,
 }
 
 # Used for A/B testing
@@ -407,6 +422,17 @@ CODE_JAIL = {
         # How many CPU seconds can jailed code use?
         'CPU': 1,
     },
+
+    # Warm sandboxed Pythons, with numpy and friends already imported, that
+    # run each piece of jailed code in a fresh child process.
+    'worker_pool': {
+        # How many idle workers to keep?  0 disables the pool.
+        'size': 0,
+        # How many executions before a worker is replaced?
+        'max_executions': 100,
+        # How many real-time seconds can jailed code take in a worker?
+        'timeout': 5,
+    },
 }
 
 # Some courses are allowed to run unsafe code. This is a list of regexes, one
@@ -419,6 +445,33 @@ CODE_JAIL = {
 #   ]
 COURSES_WITH_UNSAFE_CODE = []
 
+# How many results of running course code to keep in each process, in front
+# of the Django cache, how many bytes they may take in all, and the size in
+# bytes of the largest result to cache.
+SAFE_EXEC_CACHE_MAX_ENTRIES = 10000
+SAFE_EXEC_CACHE_MAX_BYTES = 10 * 1024 * 1024
+SAFE_EXEC_CACHE_MAX_RESULT_SIZE = 100000
+
+# How many of the courses it loads the student dashboard keeps in each process,
+# for all users, until their content changes.
+DASHBOARD_COURSE_CACHE_MAX_SIZE = 500
+
+# Part of the fingerprint of every persisted section score (see
+# MITX_FEATURES['ENABLE_PERSISTENT_SECTION_SCORES']). Changing it makes all of
+# the stored section scores stale.
+PERSISTENT_SECTION_SCORES_GENERATION = 1
+
+# How many seconds the courses a user is enrolled in are kept in the cache.
+# They are also dropped from it when the user's enrollments change, and again
+# after the change is committed by requests; this bounds how long a change made
+# outside a request (e.g. by a management command) can go unseen.
+ENROLLMENT_CACHE_TIMEOUT = 900
+
+# How many seconds thread listings and users fetched from the comments service
+# are kept in the cache.  They are also dropped from it when they are changed
+# through the LMS.
+COMMENTS_SERVICE_CACHE_TIMEOUT = 10
+
 ############################ SIGNAL HANDLERS ################################
 # This is imported to register the exception signal handling that logs exceptions
 import monitoring.exceptions  # noqa
@@ -462,6 +515,11 @@ STATICFILES_DIRS = [
 
 FAVICON_PATH = 'images/favicon.ico'
 
+# Local disk cache for course assets (c4x urls) too large for memcached, such as
+# videos and PDF textbooks. Set the directory to enable it.
+STATIC_CONTENT_DISK_CACHE_DIR = None
+STATIC_CONTENT_DISK_CACHE_MAX_SIZE = 10 * 1024 * 1024 * 1024
+
 # Locale/Internationalization
 TIME_ZONE = 'America/New_York'  # http://en.wikipedia.org/wiki/List_of_tz_zones_by_name
 LANGUAGE_CODE = 'en'  # http://www.i18nguy.com/unicode/language-identifiers.html
@@ -611,7 +669,13 @@ MIDDLEWARE_CLASSES = (
     # Detects user-requested locale from 'accept-language' header in http request
     'django.middleware.locale.LocaleMiddleware',
 
+    # Forgets cached enrollments changed by the request after they're committed
+    'student.middleware.EnrollmentModesCacheMiddleware',
     'django.middleware.transaction.TransactionMiddleware',
+
+    # Saves the student state changed during the request within its transaction
+    'courseware.middleware.PendingWritesMiddleware',
+
     # 'debug_toolbar.middleware.DebugToolbarMiddleware',
 
     'django_comment_client.utils.ViewNameMiddleware',
@@ -890,6 +954,21 @@ BULK_EMAIL_LOG_SENT_EMAILS = False
 # parallel, and what the SES rate is.
 BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS = 0.02
 
+# Maximum delay in seconds between individual mail messages.  When the mail
+# server says we're sending too fast, the delay is doubled and the message is
+# sent again, until the delay would go over this; then the task is retried.
+BULK_EMAIL_MAX_DELAY_BETWEEN_SENDS = 1
+
+# Number of connections each bulk email task sends its emails over at once.
+BULK_EMAIL_CONNECTIONS_PER_TASK = 1
+
+########################### Offline grade calculation ##########################
+
+# Parameters for breaking down course enrollment into subtasks (or, when
+# computing grades from the command line, into shards for worker processes).
+OFFLINE_GRADES_STUDENTS_PER_TASK = 100
+OFFLINE_GRADES_STUDENTS_PER_QUERY = 1000
+
 ################################### APPS ######################################
 INSTALLED_APPS = (
     # Standard ones that are always installed...
@@ -983,6 +1062,9 @@ INSTALLED_APPS = (
     # Different Course Modes
     'course_modes',
 
+    # Summaries of courses for course listings
+    'course_summaries',
+
     # Student Identity Verification
     'verify_student',
 )
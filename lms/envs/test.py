@@ -39,6 +39,17 @@ MITX_FEATURES['ENABLE_SHOPPING_CART'] = True
 # Need wiki for courseware views to work. TODO (vshnayder): shouldn't need it.
 WIKI_ENABLED = True
 
+# Tests recreate courses with the same ids, and the content versions that the
+# dashboard keeps courses under aren't reset between tests
+DASHBOARD_COURSE_CACHE_MAX_SIZE = 0
+
+# The cache isn't rolled back with the database between tests
+ENROLLMENT_CACHE_TIMEOUT = 0
+COMMENTS_SERVICE_CACHE_TIMEOUT = 0
+
+# Throttled bulk emails retry their task at once, as the tests of retries expect
+BULK_EMAIL_MAX_DELAY_BETWEEN_SENDS = 0
+
 # Makes the tests run much faster...
 SOUTH_TESTS_MIGRATE = False  # To disable migrations and use syncdb instead
 
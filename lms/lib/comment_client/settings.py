@@ -11,3 +11,21 @@ if hasattr(settings, "COMMENTS_SERVICE_KEY"):
     API_KEY = settings.COMMENTS_SERVICE_KEY
 else:
     API_KEY = "PUT_YOUR_API_KEY_HERE"
+
+# The number of connections to the comments service kept alive by each process
+if hasattr(settings, "COMMENTS_SERVICE_POOL_SIZE"):
+    POOL_SIZE = settings.COMMENTS_SERVICE_POOL_SIZE
+else:
+    POOL_SIZE = 10
+
+# The number of calls to the comments service a request can make at the same time
+if hasattr(settings, "COMMENTS_SERVICE_MAX_CONCURRENT_REQUESTS"):
+    MAX_CONCURRENT_REQUESTS = settings.COMMENTS_SERVICE_MAX_CONCURRENT_REQUESTS
+else:
+    MAX_CONCURRENT_REQUESTS = 4
+
+# The number of seconds thread listings and users are kept in the cache
+if hasattr(settings, "COMMENTS_SERVICE_CACHE_TIMEOUT"):
+    CACHE_TIMEOUT = settings.COMMENTS_SERVICE_CACHE_TIMEOUT
+else:
+    CACHE_TIMEOUT = 0
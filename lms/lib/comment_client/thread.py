@@ -1,4 +1,5 @@
 from .utils import merge_dict, strip_blank, strip_none, extract, perform_request
+from .utils import perform_cached_request, invalidate_cached_reads
 from .utils import CommentClientRequestError
 import models
 import settings
@@ -40,7 +41,9 @@ class Thread(models.Model):
             url = cls.url(action='get_all', params=extract(params, 'commentable_id'))
             if params.get('commentable_id'):
                 del params['commentable_id']
-        response = perform_request('get', url, params, *args, **kwargs)
+        response = perform_cached_request(
+            url, params, params['course_id'], params.get('user_id'), 'threads', *args, **kwargs
+        )
         return response.get('collection', []), response.get('page', 1), response.get('num_pages', 1)
 
     @classmethod
@@ -80,6 +83,9 @@ class Thread(models.Model):
         request_params = strip_none(request_params)
 
         response = perform_request('get', url, request_params)
+        if request_params.get('mark_as_read') and 'user_id' in request_params:
+            # which threads are read is part of the user's thread listings
+            invalidate_cached_reads(user_id=request_params['user_id'])
         self.update_attributes(**response)
 
     def flagAbuse(self, user, voteable):
@@ -1,4 +1,4 @@
-from .utils import merge_dict, perform_request, CommentClientRequestError
+from .utils import merge_dict, perform_request, perform_cached_request, CommentClientRequestError
 
 import models
 import settings
@@ -77,10 +77,10 @@ class User(models.Model):
 
     def _retrieve(self, *args, **kwargs):
         url = self.url(action='get', params=self.attributes)
-        retrieve_params = self.default_retrieve_params
+        retrieve_params = dict(self.default_retrieve_params)
         if self.attributes.get('course_id'):
             retrieve_params['course_id'] = self.course_id
-        response = perform_request('get', url, retrieve_params)
+        response = perform_cached_request(url, retrieve_params, None, self.id, 'user')
         self.update_attributes(**response)
 
 
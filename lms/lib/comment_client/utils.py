@@ -1,14 +1,31 @@
 from contextlib import contextmanager
+from crum import get_current_request
+from django.core.cache import cache
 from dogapi import dog_stats_api
+import hashlib
 import json
 import logging
+from multiprocessing.pool import ThreadPool
+import os
 import requests
+from requests.adapters import HTTPAdapter
+from request_cache.middleware import RequestCache
 import settings
+import threading
 from time import time
 from uuid import uuid4
 
 log = logging.getLogger(__name__)
 
+# The session and thread pool of this process, made when first used
+_session = None
+_session_pid = None
+_pool = None
+_pool_pid = None
+
+# The response memo of the request a thread in the pool is working for
+_thread_state = threading.local()
+
 
 def strip_none(dic):
     return dict([(k, v) for k, v in dic.iteritems() if v is not None])
@@ -49,6 +66,74 @@ def request_timer(request_id, method, url):
     )
 
 
+def get_session():
+    """
+    Returns the requests.Session through which the comments service is called,
+    which keeps up to settings.POOL_SIZE connections to it alive.  Each process
+    has its own.
+    """
+    global _session, _session_pid
+    if _session is None or _session_pid != os.getpid():
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=settings.POOL_SIZE)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _session, _session_pid = session, os.getpid()
+    return _session
+
+
+def _get_pool():
+    """
+    Returns the pool of settings.MAX_CONCURRENT_REQUESTS threads that
+    perform_concurrently uses.  Each process has its own.
+    """
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        _pool, _pool_pid = ThreadPool(settings.MAX_CONCURRENT_REQUESTS), os.getpid()
+    return _pool
+
+
+def _response_memo():
+    """
+    Returns the dictionary in which the responses to the GET requests made
+    for the current request are kept, or None outside of requests.
+    """
+    memo = getattr(_thread_state, 'memo', None)
+    if memo is not None or get_current_request() is None:
+        return memo
+    data = RequestCache.get_request_cache().data
+    if 'comment_client_responses' not in data:
+        data['comment_client_responses'] = {}
+    return data['comment_client_responses']
+
+
+def perform_concurrently(*calls):
+    """
+    Call each of `calls`, functions of no arguments that call the comments
+    service and don't depend on each other, at the same time in a pool of
+    threads, and return a list of their results.  If any of them raises an
+    exception, it's raised once they're all done.
+    """
+    if len(calls) < 2 or settings.MAX_CONCURRENT_REQUESTS < 2 or getattr(_thread_state, 'in_pool', False):
+        return [call() for call in calls]
+
+    memo = _response_memo()
+
+    def call_in_pool(call):
+        """
+        Make `call` in a thread of the pool, sharing the caller's response memo.
+        """
+        _thread_state.in_pool = True
+        _thread_state.memo = memo
+        try:
+            return call()
+        finally:
+            _thread_state.in_pool = False
+            _thread_state.memo = None
+
+    return _get_pool().map(call_in_pool, calls)
+
+
 def perform_request(method, url, data_or_params=None, *args, **kwargs):
     if data_or_params is None:
         data_or_params = {}
@@ -56,34 +141,111 @@ def perform_request(method, url, data_or_params=None, *args, **kwargs):
     request_id = uuid4()
     request_id_dict = {'request_id': request_id}
 
+    # Identical GETs made while handling the same request are only sent once,
+    # and any other call may change what they return
+    memo = _response_memo()
+    memo_key = None
+    if memo is not None:
+        if method == 'get':
+            memo_key = (url, json.dumps(data_or_params, sort_keys=True))
+        else:
+            memo.clear()
+
     if method in ['post', 'put', 'patch']:
         data = data_or_params
         params = request_id_dict
     else:
         data = None
         params = merge_dict(data_or_params, request_id_dict)
-    with request_timer(request_id, method, url):
-        response = requests.request(
-            method,
-            url,
-            data=data,
-            params=params,
-            headers=headers,
-            timeout=5
-        )
 
-    if 200 < response.status_code < 500:
-        raise CommentClientRequestError(response.text, response.status_code)
-    # Heroku returns a 503 when an application is in maintenance mode
-    elif response.status_code == 503:
-        raise CommentClientMaintenanceError(response.text)
-    elif response.status_code == 500:
-        raise CommentClient500Error(response.text)
+    text = memo.get(memo_key) if memo_key is not None else None
+    if text is None:
+        with request_timer(request_id, method, url):
+            response = get_session().request(
+                method,
+                url,
+                data=data,
+                params=params,
+                headers=headers,
+                timeout=5
+            )
+
+        if 200 < response.status_code < 500:
+            raise CommentClientRequestError(response.text, response.status_code)
+        # Heroku returns a 503 when an application is in maintenance mode
+        elif response.status_code == 503:
+            raise CommentClientMaintenanceError(response.text)
+        elif response.status_code == 500:
+            raise CommentClient500Error(response.text)
+
+        text = response.text
+        if memo_key is not None:
+            memo[memo_key] = text
+
+    if kwargs.get("raw", False):
+        return text
     else:
-        if kwargs.get("raw", False):
-            return response.text
-        else:
-            return json.loads(response.text)
+        # decoded afresh each time, as callers change what they're given
+        return json.loads(text)
+
+
+def _generation_key(kind, id):
+    return 'comment_client.generation.{0}.{1}'.format(kind, id)
+
+
+def _generations(course_id, user_id):
+    """
+    Returns the current generations of the cached reads of `course_id` and of
+    `user_id`, either of which may be None.  Reads cached under older
+    generations are out of date.
+    """
+    keys = [_generation_key(kind, id) for kind, id in [('course', course_id), ('user', user_id)] if id is not None]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            # Starting from the time keeps a generation that was evicted from being reused
+            cache.add(key, int(time() * 1000))
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def invalidate_cached_reads(course_id=None, user_id=None):
+    """
+    Drop the cached reads of `course_id` and of `user_id` that
+    perform_cached_request has kept, after they have been changed.
+    """
+    if not settings.CACHE_TIMEOUT:
+        return
+    for kind, id in [('course', course_id), ('user', user_id)]:
+        if id is None:
+            continue
+        try:
+            cache.incr(_generation_key(kind, id))
+        except ValueError:
+            # Nothing has been cached under it since it was evicted
+            pass
+
+
+def perform_cached_request(url, params, course_id, user_id, kind, *args, **kwargs):
+    """
+    Perform a GET request, whose response is kept in the cache for
+    settings.CACHE_TIMEOUT seconds, or until invalidate_cached_reads is called
+    for `course_id` or `user_id`.  `kind` names what's requested in the
+    metrics of cache hits and misses.
+    """
+    if not settings.CACHE_TIMEOUT:
+        return perform_request('get', url, params, *args, **kwargs)
+
+    key_data = json.dumps([url, params, _generations(course_id, user_id), kwargs], sort_keys=True)
+    key = 'comment_client.{0}.{1}'.format(kind, hashlib.md5(key_data).hexdigest())
+    response = cache.get(key)
+    if response is None:
+        dog_stats_api.increment('comment_client.cache.miss', tags=['kind:{0}'.format(kind)])
+        response = perform_request('get', url, params, *args, **kwargs)
+        cache.set(key, response, settings.CACHE_TIMEOUT)
+    else:
+        dog_stats_api.increment('comment_client.cache.hit', tags=['kind:{0}'.format(kind)])
+    return response
 
 
 class CommentClientError(Exception):
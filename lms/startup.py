@@ -9,6 +9,7 @@ from django.conf import settings
 settings.INSTALLED_APPS  # pylint: disable=W0104
 
 from django_startup import autostartup
+from capa.safe_exec import configure_worker_pool
 from xmodule.modulestore.django import modulestore
 
 log = logging.getLogger(__name__)
@@ -19,6 +20,9 @@ def run():
     """
     autostartup()
 
+    # Keep warm sandboxed Pythons for running capa problems' code, if configured.
+    configure_worker_pool(**settings.CODE_JAIL.get('worker_pool', {}))
+
     # Trigger a forced initialization of our modulestores since this can take a while to complete
     # and we want this done before HTTP requests are accepted.
     if settings.INIT_MODULESTORE_ON_STARTUP: